@@ -0,0 +1,161 @@
+"""
+Deterministic frames which draw with every shader in `src/pymgl/shaders`, from layers and sprites drawn with pygame
+rather than loaded from assets, so they only change when rendering does. Used by `bench_render` and `golden_images`
+"""
+import moderngl as mgl
+import pygame as pg
+import os
+
+from src.sim import init_headless
+from src.pymgl import GraphicsEngine
+from src.fight.vfx import ParticlePool, BOOM, SPARK, BOLT
+from src.client import _Settings
+
+from .bench_gpu_particles import RESOLUTION, get_context
+
+
+# the shader files each scene draws with
+COVERAGE = dict(
+    default=('default.vert', 'default.frag'),
+    hud=('default.vert', 'hud.frag'),
+    overlay=('default.vert', 'overlay.frag'),
+    gaussian_blur=('default.vert', 'blur_downsample.frag', 'gaussian_blur.frag', 'blur_composite.frag'),
+    particles=('particles.vert', 'particles.frag', 'default.vert', 'overlay.frag'),
+    sprites=('sprites.vert', 'sprites.frag'),
+    compositor=('default.vert', 'compositor.frag', 'sprites.vert', 'sprites.frag'),
+)
+
+
+def get_engine() -> GraphicsEngine:
+    """
+    A `GraphicsEngine` on a headless context, blending like the client
+    """
+    init_headless()
+    ctx = get_context()
+    ctx.enable(mgl.BLEND)
+    ctx.blend_func = (mgl.SRC_ALPHA, mgl.ONE_MINUS_SRC_ALPHA)
+    return GraphicsEngine(ctx, RESOLUTION, './src')
+
+
+def get_layers() -> dict[str, pg.Surface]:
+    """
+    A layer for every layer shader, with flat colours, edges and translucency
+    """
+    width, height = RESOLUTION
+    default = pg.Surface(RESOLUTION)
+    for i, colour in enumerate(((206, 230, 240), (120, 150, 190), (90, 130, 60), (220, 205, 200))):
+        default.fill(colour, (0, i * height // 4, width, height // 4))
+    pg.draw.circle(default, (160, 80, 70), (900, 300), 120)
+    pg.draw.polygon(default, (40, 40, 40), ((200, 600), (400, 350), (600, 600)))
+
+    # blitted like the game's hud, which leaves colours premultiplied
+    hud = pg.Surface(RESOLUTION, pg.SRCALPHA)
+    for x, alpha in ((20, 200), (width - 250, 120)):
+        box = pg.Surface((230, 60), pg.SRCALPHA)
+        box.fill((255, 255, 255, alpha))
+        box.fill((0, 255, 0, 255), (150, 10, 60, 40))
+        hud.blit(box, (x, 20))
+    circle = pg.Surface((160, 160), pg.SRCALPHA)
+    pg.draw.circle(circle, (255, 0, 0, 90), (80, 80), 80)
+    hud.blit(circle, (560, 280))
+
+    overlay = pg.Surface(RESOLUTION)
+    for i in range(8):
+        pg.draw.rect(overlay, (255, 255, 255), (10 + i * 14, height - 30, 10, 16))
+    pg.draw.line(overlay, (255, 255, 0), (600, 100), (700, 140), 3)
+
+    glow = pg.Surface(RESOLUTION)
+    pg.draw.line(glow, (255, 255, 255), (300, 200), (980, 420), 6)
+    for x in range(500, 800, 60):
+        pg.draw.circle(glow, (255, 200, 120), (x, 300), 4)
+    return dict(default=default, hud=hud, overlay=overlay, gaussian_blur=glow)
+
+
+def get_pool() -> ParticlePool:
+    """
+    Booms, sparks and bolts at fixed points in their lifetime
+    """
+    pool = ParticlePool(capacity=64)
+    for i in range(16):
+        x, y = 160 + i * 60, 200 + (i % 4) * 100
+        pool.spawn((BOOM, SPARK, BOLT)[i % 3], (x, y), 0, (i * 40) % 360 if i % 3 == 0 else i * 0.4, 0.02 + i * 0.01)
+    return pool
+
+
+def get_sprites() -> list[tuple[pg.Surface, tuple[int, int], bool, tuple | None]]:
+    """
+    Sprites with a colorkey, with per-pixel alpha, flipped and tinted, as source, position, flip and tint
+    """
+    keyed = pg.Surface((64, 96))
+    keyed.fill((0, 0, 0))
+    pg.draw.ellipse(keyed, (140, 110, 80), (8, 20, 48, 60))
+    pg.draw.rect(keyed, (30, 30, 30), (40, 0, 12, 30))
+    keyed.set_colorkey((0, 0, 0))
+    translucent = pg.Surface((80, 40), pg.SRCALPHA)
+    pg.draw.rect(translucent, (60, 160, 255, 160), (0, 0, 80, 40), border_radius=8)
+    return [
+        (keyed, (100, 480), False, None),
+        (keyed, (1100, 480), True, None),
+        (keyed, (600, 300), False, (255, 120, 120, 200)),
+        (translucent, (580, 360), False, None),
+    ]
+
+
+def get_scenes(graphics_engine: GraphicsEngine) -> dict:
+    """
+    A function per scene which draws a frame onto the screen of `graphics_engine`, by the scene names of `COVERAGE`
+    """
+    layers = get_layers()
+    pools = [get_pool()]
+    sprites = get_sprites()
+    ctx = graphics_engine.ctx
+
+    def clear():
+        graphics_engine.screen.use()
+        ctx.clear(0.08, 0.1, 0.2)
+
+    def draw_layer(shader: str):
+        clear()
+        if shader != 'default':
+            graphics_engine.render(layers['default'])
+        graphics_engine.render(layers[shader], shader=shader)
+
+    def draw_particles():
+        clear()
+        graphics_engine.render_particles(pools, shader='overlay')
+
+    def draw_sprites():
+        clear()
+        for source, pos, flip, tint in sprites:
+            graphics_engine.sprite_batch.draw(source, pos, flip, tint)
+        graphics_engine.render_sprites()
+
+    def draw_compositor():
+        clear()
+        graphics_engine.set_composition(_Settings.COMPOSITION)
+        graphics_engine.sprite_batch.blit(layers['default'], (0, 0))
+        for source, pos, flip, tint in sprites:
+            graphics_engine.sprite_batch.draw(source, pos, flip, tint)
+        graphics_engine.render_sprites()
+        for shader in ('hud', 'gaussian_blur', 'overlay'):
+            graphics_engine.render(layers[shader], shader=shader)
+        graphics_engine.composite()
+        graphics_engine.set_composition(None)
+
+    return dict(
+        default=lambda: draw_layer('default'),
+        hud=lambda: draw_layer('hud'),
+        overlay=lambda: draw_layer('overlay'),
+        gaussian_blur=lambda: draw_layer('gaussian_blur'),
+        particles=draw_particles,
+        sprites=draw_sprites,
+        compositor=draw_compositor,
+    )
+
+
+def get_uncovered(path: str = './src/pymgl/shaders') -> list[str]:
+    """
+    Shader files no scene draws with
+    """
+    covered = {shader for shaders in COVERAGE.values() for shader in shaders}
+    return sorted(shader for shader in os.listdir(path) if shader.split('.')[-1] in ('vert', 'frag') and shader not in covered)
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+"""
+GPU time of the gaussian blur per variant, on a standalone (software, llvmpipe when there is no gpu) GL context,
+as the wall time until the GL work is done. The original full resolution blur is compared against the downsampled, separable
+blur at full, half and quarter resolution for 20, 10 and 6 taps, the taps of each quality level. Scenes are a
+spark burst in the middle of the screen, a fight's worth of effects, and particles all over the screen.
+
+    python -m benchmarks.bench_blur
+"""
+import moderngl as mgl
+import numpy as np
+import pygame as pg
+import argparse
+import time
+import glm
+
+from src.sim import init_headless
+from src.pymgl import GraphicsEngine
+from src.fight.vfx import ParticlePool, Sparks, Bolt, Boom
+
+from .bench_gpu_particles import RESOLUTION, get_context, get_pool
+
+
+def get_scenes() -> dict[str, ParticlePool]:
+    np.random.seed(0)
+    burst = ParticlePool()
+    Sparks(burst).create_vfx((640, 360), 0.5)
+    fight = ParticlePool()
+    Sparks(fight).create_vfx((640, 360), 0.5)
+    Bolt(fight).create_vfx((640, 200), 1.0)
+    Boom(fight).create_vfx(np.array([[300, 300.]] * 3), np.full(3, 30.))
+    for pool in (burst, fight):
+        pool.animate(0.05)
+    return dict(burst=burst, fight=fight, screen=get_pool(1000))
+
+
+def get_legacy_program(ctx: mgl.Context, graphics_engine: GraphicsEngine) -> tuple[mgl.Program, mgl.VertexArray]:
+    with open('./src/pymgl/shaders/default.vert') as file:
+        vertex_shader = file.read()
+    with open('./benchmarks/_legacy_gaussian_blur.frag') as file:
+        frag_shader = file.read()
+    program = ctx.program(vertex_shader=vertex_shader, fragment_shader=frag_shader)
+    program['m_model'].write(glm.mat4())
+    program['tex'] = 0
+    return program, graphics_engine._get_vao(program)
+
+
+def gpu_time(ctx: mgl.Context, render, frames: int) -> float:
+    """
+    Average time of `render` until the GL work is done in seconds, after a warmup. llvmpipe defers rasterizing
+    until the framebuffer changes or work is waited on, so its timer queries miss the last pass
+    """
+    render()
+    ctx.finish()
+    start = time.perf_counter()
+    for _ in range(frames):
+        render()
+        ctx.finish()
+    return (time.perf_counter() - start) / frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--frames', type=int, default=10)
+    parser.add_argument('--taps', type=int, nargs='*', default=[20, 10, 6])
+    parser.add_argument('--scales', type=float, nargs='*', default=[1, 1 / 2, 1 / 4])
+    args = parser.parse_args()
+
+    init_headless()
+    ctx = get_context()
+    print(f'{ctx.info["GL_RENDERER"]}')
+    ctx.enable(mgl.BLEND)
+    ctx.blend_func = (mgl.SRC_ALPHA, mgl.ONE_MINUS_SRC_ALPHA)
+    graphics_engine = GraphicsEngine(ctx, RESOLUTION, './src')
+    legacy_program, legacy_vao = get_legacy_program(ctx, graphics_engine)
+    layer = pg.Surface(RESOLUTION)
+
+    for name, pool in get_scenes().items():
+        # the particles as a layer, uploaded once
+        layer.fill((0, 0, 0))
+        pool.render(layer)
+        graphics_engine._update_texture(name, layer)
+        texture = graphics_engine.layers[name]
+        content = graphics_engine._content_rect(layer)
+        print(f'{name}: {pool.num_alive} particles in {content.w}x{content.h}')
+
+        def render_legacy():
+            # the original blur, scissored to what it reaches as before
+            graphics_engine.screen.use()
+            ctx.scissor = graphics_engine._get_scissor(content.inflate(80, 80).clip(layer.get_rect()), 1)
+            texture.use()
+            legacy_vao.render()
+            ctx.scissor = None
+
+        print(f'  {"original":>18}: {gpu_time(ctx, render_legacy, args.frames) * 1e3:8.2f} ms gpu')
+        for taps in args.taps:
+            for scale in args.scales:
+                graphics_engine.set_blur(taps, scale)
+                elapsed = gpu_time(ctx, lambda: graphics_engine._render_blur(texture, content, name), args.frames)
+                print(f'  {f"{taps} taps at 1/{round(1 / scale)}":>18}: {elapsed * 1e3:8.2f} ms gpu')
+
+
+if __name__ == '__main__':
+    main()
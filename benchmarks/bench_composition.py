@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+"""
+Frame composition time of drawing each layer onto the screen with its own shader against compositing every layer
+in one pass with `GraphicsEngine.set_composition`, on a standalone (software, llvmpipe when there is no gpu) GL context.
+A fight frame draws the background and geese, from the sprite atlas or blitted onto the default layer, gpa boxes on the
+hud, a fight's worth of glowing effects and fps text on the overlay. A menu frame uploads a full default layer and a
+cursor on the overlay. Reports the main thread's CPU time per frame and the wall time per frame including the GL work.
+
+    python -m benchmarks.bench_composition
+"""
+import moderngl as mgl
+import pygame as pg
+import argparse
+
+from src.sim import init_headless, HeadlessAssets
+from src.pymgl import GraphicsEngine
+from src.pyfont import Font
+from src.util import load_backgrounds
+from src.client import _Settings
+
+from .bench_gpu_particles import RESOLUTION, get_context, bench
+from .bench_blur import get_scenes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--frames', type=int, default=20)
+    args = parser.parse_args()
+
+    init_headless()
+    ctx = get_context()
+    print(f'{ctx.info["GL_RENDERER"]}')
+    ctx.enable(mgl.BLEND)
+    ctx.blend_func = (mgl.SRC_ALPHA, mgl.ONE_MINUS_SRC_ALPHA)
+    graphics_engine = GraphicsEngine(ctx, RESOLUTION, './src')
+    sprite_batch = graphics_engine.sprite_batch
+    font = Font('./src/pyfont/font.png')
+    displays = dict(
+        default=pg.Surface(RESOLUTION),
+        hud=pg.Surface(RESOLUTION, pg.SRCALPHA),
+        overlay=pg.Surface(RESOLUTION)
+    )
+
+    assets = HeadlessAssets()
+    background = load_backgrounds('./assets/backgrounds', RESOLUTION)[0]['uwmain']
+    geese = [(assets.character_assets[major]['idle'][side][0], pos) for major, side, pos in (('amath', 'right', (60, 480)), ('psych', 'left', (1120, 480)))]
+    sprite_batch.preload([background] + [frame for frame, _ in geese])
+    pools = [get_scenes()['fight']]
+    cursor = pg.Surface((16, 16))
+    cursor.fill((255, 255, 255))
+
+    def render_fight(gpu_sprites: bool):
+        for display in displays.values():
+            display.fill((0, 0, 0, 0))
+        sprites = sprite_batch if gpu_sprites else displays['default']
+        sprites.blit(background, (0, 0))
+        for frame, pos in geese:
+            sprites.blit(frame, pos)
+        for x in (20, RESOLUTION[0] - 250):
+            pg.draw.rect(displays['hud'], (255, 255, 255, 200), (x, 20, 230, 60))
+            font.render(displays['hud'], 'gpa 4.0', (x + 20, 30), (0, 0, 0), 40, style='topleft')
+        font.render(displays['overlay'], 'fps 60', (10, 690), (255, 255, 255), 20, style='topleft')
+        if gpu_sprites:
+            graphics_engine.render_sprites()
+        else:
+            graphics_engine.render(displays['default'])
+        graphics_engine.render(displays['hud'], shader='hud')
+        graphics_engine.render_particles(pools)
+        graphics_engine.render(displays['overlay'], shader='overlay')
+        graphics_engine.composite()
+
+    def render_menu():
+        displays['default'].blit(background, (0, 0))
+        displays['overlay'].fill((0, 0, 0))
+        displays['overlay'].blit(cursor, (640, 360))
+        graphics_engine.render(displays['default'])
+        graphics_engine.render(displays['overlay'], shader='overlay')
+        graphics_engine.composite()
+
+    for name, render in (
+        ('fight', lambda: render_fight(True)),
+        ('fight, cpu sprites', lambda: render_fight(False)),
+        ('menu', render_menu)
+    ):
+        for mode, composition in (('layer passes', None), ('single pass', _Settings.COMPOSITION)):
+            graphics_engine.set_composition(composition)
+            cpu, wall = bench(ctx, render, args.frames)
+            print(f'{name:>18} {mode:>12}: {cpu * 1e3:8.2f} ms cpu/frame {wall * 1e3:8.2f} ms wall/frame')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+#!/usr/bin/env python
+"""
+Steps per second of the headless `VecEnv` with random actions, for 1, 64 and 1024 matches.
+
+    python -m benchmarks.bench_env
+"""
+import numpy as np
+import argparse
+import time
+
+from src.sim import init_headless, HeadlessAssets, VecEnv
+
+
+def bench(assets: HeadlessAssets, num_envs: int, steps: int, seed: int = 0) -> float:
+    env = VecEnv(num_envs, assets)
+    env.reset(seed=seed)
+    rng = np.random.default_rng(seed)
+    actions = rng.random((steps, num_envs, 2, 7)) < 0.1
+
+    start = time.perf_counter()
+    for step in range(steps):
+        env.step(actions[step])
+    return num_envs * steps / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--envs', type=int, nargs='*', default=[1, 64, 1024])
+    parser.add_argument('--steps', type=int, default=20000, help='total env steps per run')
+    args = parser.parse_args()
+
+    init_headless()
+    assets = HeadlessAssets()
+    for num_envs in args.envs:
+        steps_per_second = bench(assets, num_envs, max(args.steps // num_envs, 20))
+        print(f'N={num_envs:>5}: {steps_per_second:10.0f} steps/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+"""
+Particles drawn with pygame and uploaded as a layer against `GraphicsEngine.render_particles`, on a standalone
+(software, llvmpipe when there is no gpu) GL context. Reports the main thread's CPU time per frame and the wall
+time per frame including the GL work, for 100, 1000 and 10000 particles. llvmpipe rasterizes on its own threads
+so that the main thread's time is what the game would spend with a real gpu (plus llvmpipe's vertex processing).
+
+    python -m benchmarks.bench_gpu_particles
+"""
+import moderngl as mgl
+import numpy as np
+import pygame as pg
+import argparse
+import time
+import os
+
+from src.sim import init_headless
+from src.pymgl import GraphicsEngine, get_headless_context
+from src.fight.vfx import _Settings, ParticlePool, BOOM, SPARK, BOLT
+
+
+RESOLUTION = (1280, 720)
+
+
+def get_context() -> mgl.Context:
+    os.environ.setdefault('LP_NUM_THREADS', '2')
+    return get_headless_context()
+
+
+def get_pool(num_particles: int, seed: int = 0) -> ParticlePool:
+    """
+    A pool of live booms, sparks and bolts at random points in their lifetime
+    """
+    rng = np.random.default_rng(seed)
+    pool = ParticlePool(capacity=num_particles)
+    for kind, count, angle_range in ((BOOM, num_particles // 3, 360), (SPARK, num_particles // 3, 2 * np.pi), (BOLT, num_particles - 2 * (num_particles // 3), 2 * np.pi)):
+        for lifetime in rng.random(count) * _Settings.EFFECT_LIFETIME:
+            pool.spawn(kind, rng.random(2) * RESOLUTION, 0, rng.random() * angle_range, lifetime)
+    return pool
+
+
+def bench(ctx: mgl.Context, render, frames: int) -> tuple[float, float]:
+    render()
+    ctx.finish()
+    cpu, wall = time.thread_time(), time.perf_counter()
+    for _ in range(frames):
+        render()
+    ctx.finish()
+    return (time.thread_time() - cpu) / frames, (time.perf_counter() - wall) / frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('-n', '--particles', type=int, nargs='*', default=[100, 1000, 10000])
+    parser.add_argument('--frames', type=int, default=20)
+    parser.add_argument('--shader', default='overlay', help='layer shader applied to the particles, the game uses gaussian_blur')
+    args = parser.parse_args()
+
+    init_headless()
+    ctx = get_context()
+    print(f'{ctx.info["GL_RENDERER"]}')
+    graphics_engine = GraphicsEngine(ctx, RESOLUTION, './src')
+    layer = pg.Surface(RESOLUTION)
+
+    def render_cpu(pool: ParticlePool):
+        layer.fill((0, 0, 0))
+        pool.render(layer)
+        graphics_engine.render(layer, shader=args.shader)
+
+    for num_particles in args.particles:
+        pool = get_pool(num_particles)
+        for name, render in (
+            ('cpu', lambda: render_cpu(pool)),
+            ('gpu', lambda: graphics_engine.render_particles([pool], shader=args.shader)),
+        ):
+            cpu, wall = bench(ctx, render, args.frames)
+            print(f'{num_particles:>6} {name}: {cpu * 1e3:8.2f} ms cpu/frame {wall * 1e3:8.2f} ms wall/frame')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+"""
+Fight sprites drawn at full resolution against drawn at their native size and scaled up 2x on the GPU with
+`GraphicsEngine.set_pixel_scale`, on a standalone (software, llvmpipe when there is no gpu) GL context. Sprites are
+blitted onto a layer which is uploaded every frame, a 640x360 `pixel_layer` at half resolution, or drawn from the atlas
+by `SpriteBatch`. Each frame draws the background and then 10 (a fight), 100 and 1000 goose, accessory and attack
+frames. Reports the atlas memory, the time spent blitting per frame, the main thread's CPU time per frame, the wall
+time per frame including the GL work, and the bytes uploaded per frame.
+
+    python -m benchmarks.bench_half_res
+"""
+import numpy as np
+import pygame as pg
+import argparse
+import time
+
+from src.sim import init_headless, HeadlessAssets
+from src.pymgl import GraphicsEngine
+from src.util import load_backgrounds
+
+from .bench_gpu_particles import RESOLUTION, get_context, bench
+from .bench_sprites import get_frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('-n', '--sprites', type=int, nargs='*', default=[10, 100, 1000])
+    parser.add_argument('--frames', type=int, default=20)
+    parser.add_argument('--majors', nargs='*', default=['amath', 'psych'])
+    args = parser.parse_args()
+
+    init_headless()
+    ctx = get_context()
+    print(f'{ctx.info["GL_RENDERER"]}')
+    graphics_engine = GraphicsEngine(ctx, RESOLUTION, './src')
+    sprite_batch = graphics_engine.sprite_batch
+    layer = pg.Surface(RESOLUTION)
+
+    assets = HeadlessAssets()
+    background = load_backgrounds('./assets/backgrounds', RESOLUTION)[0]['uwmain']
+    frames = [frame for major in args.majors for frame in get_frames(assets, major)]
+    blit_time = 0
+
+    def render_cpu(sprites: list[tuple[pg.Surface, tuple]]):
+        nonlocal blit_time
+        target = graphics_engine.pixel_layer or layer
+        start = time.perf_counter()
+        target.blit(background, (0, 0))
+        for frame, pos in sprites:
+            target.blit(frame, pos)
+        blit_time += time.perf_counter() - start
+        graphics_engine.render(layer if target is layer else target.surface)
+
+    def render_gpu(sprites: list[tuple[pg.Surface, tuple]]):
+        nonlocal blit_time
+        start = time.perf_counter()
+        sprite_batch.blit(background, (0, 0))
+        for frame, pos in sprites:
+            sprite_batch.blit(frame, pos)
+        blit_time += time.perf_counter() - start
+        graphics_engine.render_sprites()
+
+    rng = np.random.default_rng(0)
+    sprites = {
+        num_sprites: [
+            (frames[i], tuple(pos))
+            for i, pos in zip(rng.integers(len(frames), size=num_sprites), (rng.random((num_sprites, 2)) * RESOLUTION).astype(int).tolist())
+        ]
+        for num_sprites in args.sprites
+    }
+    for resolution, scale in (('full', 1), ('half', 2)):
+        graphics_engine.set_pixel_scale(scale)
+        sprite_batch.preload([background] + frames)
+        if graphics_engine.pixel_layer is not None:
+            graphics_engine.pixel_layer.preload([background] + frames)
+        # the atlas is uploaded once, apart from the frames
+        atlas_bytes = sprite_batch.render()
+        print(f'{resolution} resolution: {len(frames) + 1} sprites on {len(sprite_batch.pages)} atlas page(s), {atlas_bytes // 1024} KiB of texels')
+
+        for num_sprites in args.sprites:
+            for name, render in (
+                ('cpu', lambda: render_cpu(sprites[num_sprites])),
+                ('gpu', lambda: render_gpu(sprites[num_sprites])),
+            ):
+                bytes_uploaded = graphics_engine.bytes_uploaded
+                blit_time = 0
+                cpu, wall = bench(ctx, render, args.frames)
+                bytes_uploaded = (graphics_engine.bytes_uploaded - bytes_uploaded) // (args.frames + 1)
+                blit = blit_time / (args.frames + 1)
+                print(f'{num_sprites:>6} {name} {resolution}: {blit * 1e3:8.2f} ms blit/frame {cpu * 1e3:8.2f} ms cpu/frame {wall * 1e3:8.2f} ms wall/frame {bytes_uploaded // 1024:>6} KiB/frame')
+    graphics_engine.destroy()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+"""
+Spawn and animate cost of the shared `ParticlePool` against the old per-effect classes, at a steady 10k live particles,
+and the cost per particle of rendering sparks, bolts and booms.
+
+    python -m benchmarks.bench_particles
+"""
+import numpy as np
+import argparse
+import tracemalloc
+import time
+
+import pygame as pg
+
+from src.fight.vfx import _Settings, ParticlePool, Boom, Sparks, Bolt, BOOM, SPARK, BOLT, ring_cache
+from . import _legacy_vfx as legacy
+
+
+DT = 1 / 60
+
+
+def spawn_schedule(num_particles: int, frames: int, seed: int = 0) -> list[tuple[np.ndarray, float]]:
+    """
+    Hit positions and angles per frame so that roughly `num_particles` are alive at once,
+    every hit spawns 3 booms, 5 sparks and a bolt
+    """
+    hits_per_frame = max(num_particles * DT / _Settings.EFFECT_LIFETIME / 9, 1)
+    rng = np.random.default_rng(seed)
+    counts = rng.poisson(hits_per_frame, frames)
+    return [(rng.random((count, 2)) * [1280, 720], rng.random(count) * 2 * np.pi) for count in counts]
+
+
+def pool_effects(num_particles: int):
+    pool = ParticlePool(capacity=2 * num_particles)
+    return (Boom(pool), Sparks(pool), Bolt(pool)), pool.animate, lambda: pool.num_alive
+
+
+def legacy_effects(num_particles: int):
+    effects = legacy.Boom(), legacy.Sparks(), legacy.Bolt()
+    def animate(dt):
+        for effect in effects:
+            effect.animate(dt)
+    return effects, animate, lambda: sum(effect.lifetime.size for effect in effects)
+
+
+def run(effects: tuple, animate, schedule: list):
+    boom, sparks, bolt = effects
+    for positions, angles in schedule:
+        for pos, angle in zip(positions, angles):
+            boom.create_vfx(np.stack([pos, pos, pos]), np.full(3, angle))
+            sparks.create_vfx(pos, angle)
+            bolt.create_vfx(pos, angle)
+        animate(DT)
+
+
+def bench(make_effects, num_particles: int, schedule: list, warmup: int = 30):
+    """
+    Seconds per frame, live particles at the end and the peak bytes allocated per frame over what was held before it
+    """
+    effects, animate, num_alive = make_effects(num_particles)
+    run(effects, animate, schedule[:warmup])
+
+    start = time.perf_counter()
+    run(effects, animate, schedule[warmup:])
+    frame_time = (time.perf_counter() - start) / (len(schedule) - warmup)
+
+    peak = 0
+    tracemalloc.start()
+    for frame in schedule[:warmup]:
+        held = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        run(effects, animate, [frame])
+        peak = max(peak, tracemalloc.get_traced_memory()[1] - held)
+    tracemalloc.stop()
+    return frame_time, num_alive(), peak
+
+
+def bench_render(num_particles: int, lifetime: float, kinds: tuple[int, ...], repeats: int = 3, seed: int = 0) -> dict[str, float]:
+    """
+    Seconds per rendered particle, split evenly between `kinds`, a quarter of them spawned off screen,
+    all with `lifetime` left so they are drawn at the same size
+    """
+    rng = np.random.default_rng(seed)
+    num_particles -= num_particles % len(kinds)
+    count = num_particles // len(kinds)
+    positions = rng.random((count, 2)) * [1600, 900] - [160, 90]
+    # booms only come out of dashes
+    dash_angles = rng.choice([-45., 0., 45.], count)
+    angles = rng.random(count) * 2 * np.pi
+
+    pool = ParticlePool(capacity=num_particles)
+    effects = []
+    for kind in kinds:
+        effect = {BOOM: legacy.Boom, SPARK: legacy.Sparks, BOLT: legacy.Bolt}[kind]()
+        effect.lifetime = np.full(count, lifetime)
+        effect.pos = positions
+        effect.angle = dash_angles if kind == BOOM else angles
+        pool.spawn(kind, positions, 0, effect.angle, lifetime)
+        effects.append(effect)
+
+    surface = pg.Surface((1280, 720))
+    times = {}
+    for name, render in (
+        ('legacy', lambda: [effect.render(surface) for effect in effects]),
+        ('pool', lambda: pool.render(surface)),
+    ):
+        start = time.perf_counter()
+        for _ in range(repeats):
+            render()
+        times[name] = (time.perf_counter() - start) / repeats / num_particles
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('-n', '--particles', type=int, default=10000)
+    parser.add_argument('--frames', type=int, default=300)
+    args = parser.parse_args()
+
+    schedule = spawn_schedule(args.particles, args.frames)
+    for name, make_effects in (('legacy', legacy_effects), ('pool', pool_effects)):
+        frame_time, alive, peak = bench(make_effects, args.particles, schedule)
+        print(f'{name:>6}: {frame_time * 1e3:7.3f} ms/frame, {alive} alive, {peak / 1024:7.1f} KiB allocated per frame')
+
+    # fresh particles are drawn at full size, where filling the polygons dominates, booms are largest when fading
+    for label, kinds in (('sparks and bolts', (SPARK, BOLT)), ('booms', (BOOM,))):
+        for age, fraction in (('fresh', 1), ('fading', 1 / 10)):
+            print(f'render, {age} {label}')
+            for name, particle_time in bench_render(args.particles, fraction * _Settings.EFFECT_LIFETIME, kinds).items():
+                print(f'{name:>6}: {particle_time * 1e6:7.2f} us/particle')
+    print(f'ring cache hit rate {ring_cache.hit_rate:.1%} ({ring_cache.hits} hits, {ring_cache.misses} misses)')
+
+
+if __name__ == '__main__':
+    main()
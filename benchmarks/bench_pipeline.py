@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+"""
+A fight updated, rasterized and presented one frame after the other against pipelined with `FramePipeline`, the next
+frame updated and rasterized on a worker thread while the last one is uploaded and presented, on a standalone
+(software, llvmpipe when there is no gpu) GL context. Each frame steps a `Match` between two button mashing geese,
+blits the background, the geese and their particles onto a layer and a glow layer as with `--cpu-sprites` and
+`--cpu-particles`, then uploads both and draws them, waiting for the GL work to finish. Reports the frames per second,
+the latency from reading input to the frame being drawn, the time to upload and draw a frame, the main thread's wait
+on the worker per frame and the cpu use of the process. The worker only overlaps the main thread on more than one core.
+
+    python -m benchmarks.bench_pipeline
+"""
+import numpy as np
+import pygame as pg
+import argparse
+import time
+import os
+
+from src.sim import HeadlessAssets, Match
+from src.fight import RandomController
+from src.util import FramePipeline, load_backgrounds
+
+from ._scenes import get_engine
+from .bench_gpu_particles import RESOLUTION
+
+
+FPS = 60
+
+
+def get_layers() -> dict[str, pg.Surface]:
+    return dict(default=pg.Surface(RESOLUTION), gaussian_blur=pg.Surface(RESOLUTION))
+
+
+def run(graphics_engine, match: Match, background: pg.Surface, pipelined: bool, frames: int) -> dict[str, float]:
+    """
+    Run `frames` frames of `match`, pipelined or not
+    """
+    controllers = (RandomController(0), RandomController(1))
+    match.reset(('amath', 'psych'), seed=0)
+    pipeline = FramePipeline() if pipelined else None
+    layers, back_layers = get_layers(), get_layers()
+
+    def simulate(polled: float) -> dict:
+        nonlocal layers, back_layers
+        if match.done:
+            match.reset(('amath', 'psych'))
+        controllers[0].act(match.geese[0], match.geese[1], 1 / FPS)
+        controllers[1].act(match.geese[1], match.geese[0], 1 / FPS)
+        match.step(1 / FPS)
+
+        layers['default'].blit(background, (0, 0))
+        layers['gaussian_blur'].fill((0, 0, 0))
+        for goose in match.geese:
+            goose.render(layers['default'], layers['gaussian_blur'])
+        frame = dict(layers=layers, polled=polled)
+        if pipelined:
+            layers, back_layers = back_layers, layers
+        return frame
+
+    def present(frame: dict):
+        for shader, layer in frame['layers'].items():
+            graphics_engine.render(layer, shader=shader)
+        graphics_engine.ctx.finish()
+
+    latencies, presents = [], []
+    start, cpu = time.perf_counter(), time.process_time()
+    for _ in range(frames):
+        frame = pipeline.result() if pipelined and pipeline.busy else simulate(time.perf_counter())
+        if pipelined:
+            pipeline.submit(simulate, time.perf_counter())
+        present_start = time.perf_counter()
+        present(frame)
+        presents.append(time.perf_counter() - present_start)
+        latencies.append(time.perf_counter() - frame['polled'])
+    wall = time.perf_counter() - start
+    stats = dict(
+        fps=frames / wall,
+        latency=np.mean(latencies),
+        present=np.mean(presents),
+        wait=pipeline.wait if pipelined else 0,
+        cpu=(time.process_time() - cpu) / wall,
+    )
+    if pipelined:
+        pipeline.close()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--frames', type=int, default=300)
+    args = parser.parse_args()
+
+    graphics_engine = get_engine()
+    print(f'{graphics_engine.ctx.info["GL_RENDERER"]} on {os.cpu_count()} core(s)')
+    match = Match(HeadlessAssets())
+    background = load_backgrounds('./assets/backgrounds', RESOLUTION)[0]['uwmain']
+    for name, pipelined in (('serial', False), ('pipelined', True)):
+        stats = run(graphics_engine, match, background, pipelined, args.frames)
+        print(
+            f'{name:>9}: {stats["fps"]:6.1f} fps {stats["latency"] * 1e3:6.1f} ms latency {stats["present"] * 1e3:6.2f} ms presenting'
+            f' {stats["wait"] * 1e3:6.2f} ms waiting on the worker {stats["cpu"] * 100:6.1f}% cpu'
+        )
+    graphics_engine.destroy()
+
+
+if __name__ == '__main__':
+    main()
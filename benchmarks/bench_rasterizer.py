@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+"""
+Rasterization time of a fight frame's layers drawn one after another straight onto their surfaces, as the client
+used to, against recorded into `DrawList`s and drawn by a `LayerRasterizer` on 1, 2 and 4 threads. Each frame steps
+a `Match` between two button mashing geese, then clears the default, glow, hud and overlay layers and draws the geese
+onto the default layer as with `--cpu-sprites`, a fight's worth of effects onto the glow layer as with
+`--cpu-particles`, gpa boxes and text onto the hud and fps text and the cursor onto the overlay. Reports the wall time
+per frame spent rasterizing and the cpu use of the process while rasterizing. Threads only draw layers at the same
+time on more than one core.
+
+    python -m benchmarks.bench_rasterizer
+"""
+import pygame as pg
+import argparse
+import time
+import os
+
+from src.sim import init_headless, HeadlessAssets, Match
+from src.fight import RandomController
+from src.pyfont import Font
+from src.util import DrawList, LayerRasterizer
+
+from .bench_gpu_particles import RESOLUTION
+from .bench_blur import get_scenes
+
+
+FPS = 60
+
+
+def get_layers() -> dict[str, pg.Surface]:
+    return dict(
+        default=pg.Surface(RESOLUTION, pg.SRCALPHA),
+        hud=pg.Surface(RESOLUTION, pg.SRCALPHA),
+        gaussian_blur=pg.Surface(RESOLUTION),
+        overlay=pg.Surface(RESOLUTION)
+    )
+
+
+def draw(layers: dict, match: Match, pool, font: Font, cursor: pg.Surface):
+    """
+    Draw a fight frame onto `layers`, `DrawList`s or surfaces which make `draw` calls straight away
+    """
+    for layer in layers.values():
+        layer.fill((0, 0, 0, 0))
+    for goose in match.geese:
+        goose.render(layers['default'])
+    layers['gaussian_blur'].draw(pool.render)
+    hud, overlay = layers['hud'], layers['overlay']
+    for x, goose in zip((20, RESOLUTION[0] - 250), match.geese):
+        hud.draw(pg.draw.rect, (255, 255, 255, 200), (x, 20, 230, 60))
+        hud.draw(font.render, f'gpa {round(goose.gpa, 2)}', (x + 20, 30), (0, 0, 0), 30, style='topleft')
+    overlay.draw(font.render, '60 high 1024kb 0.5ms jitter 50% cpu 17ms latency', (10, 10), (255, 255, 255), 20, style='topleft')
+    overlay.blit(cursor, (640, 360))
+
+
+class _Direct:
+    def __init__(self, surface: pg.Surface):
+        # a surface which makes `draw` calls straight away, to draw without recording
+        self.surface = surface
+
+    def __getattr__(self, name):
+        return getattr(self.surface, name)
+
+    def draw(self, job, *args, **kwargs):
+        job(self.surface, *args, **kwargs)
+
+
+def run(match: Match, pool, font: Font, cursor: pg.Surface, threads: int | None, frames: int) -> dict[str, float]:
+    """
+    Rasterize `frames` frames of `match` on `threads` threads, or straight onto the surfaces when None
+    """
+    controllers = (RandomController(0), RandomController(1))
+    match.reset(('amath', 'psych'), seed=0)
+    layers = get_layers()
+    rasterizer = LayerRasterizer(threads) if threads is not None else None
+    draw_lists = {shader: DrawList() for shader in layers}
+    direct = {shader: _Direct(layer) for shader, layer in layers.items()}
+
+    wall = cpu = 0
+    for _ in range(frames):
+        if match.done:
+            match.reset(('amath', 'psych'))
+        controllers[0].act(match.geese[0], match.geese[1], 1 / FPS)
+        controllers[1].act(match.geese[1], match.geese[0], 1 / FPS)
+        match.step(1 / FPS)
+
+        start, cpu_start = time.perf_counter(), time.process_time()
+        if rasterizer is None:
+            draw(direct, match, pool, font, cursor)
+        else:
+            draw(draw_lists, match, pool, font, cursor)
+            rasterizer.run(layers, draw_lists)
+        wall += time.perf_counter() - start
+        cpu += time.process_time() - cpu_start
+    if rasterizer is not None:
+        rasterizer.close()
+    return dict(ms=wall / frames * 1e3, cpu=cpu / wall)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--frames', type=int, default=300)
+    args = parser.parse_args()
+
+    init_headless()
+    print(f'{os.cpu_count()} core(s)')
+    match = Match(HeadlessAssets())
+    pool = get_scenes()['fight']
+    font = Font('./src/pyfont/font.png')
+    cursor = pg.Surface((16, 16))
+    cursor.fill((255, 255, 255))
+    for name, threads in (('direct', None), ('1 thread', 1), ('2 threads', 2), ('4 threads', 4)):
+        stats = run(match, pool, font, cursor, threads, args.frames)
+        print(f'{name:>9}: {stats["ms"]:6.2f} ms/frame rasterizing {stats["cpu"] * 100:6.1f}% cpu')
+
+
+if __name__ == '__main__':
+    main()
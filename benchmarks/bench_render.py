@@ -0,0 +1,31 @@
+#!/usr/bin/env python
+"""
+Render time of every shader in `src/pymgl/shaders`, on a standalone (software, llvmpipe when there is no gpu) GL
+context so it runs without a display. Each scene of `_scenes`, the same frames the golden images are made of, is drawn
+repeatedly. Reports the main thread's CPU time per frame and the wall time per frame including the GL work.
+
+    python -m benchmarks.bench_render
+"""
+import argparse
+
+from ._scenes import COVERAGE, get_engine, get_scenes
+from .bench_gpu_particles import bench
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--scenes', nargs='*', default=None, help='scenes to run, all by default')
+    parser.add_argument('--frames', type=int, default=20)
+    args = parser.parse_args()
+
+    graphics_engine = get_engine()
+    print(f'{graphics_engine.ctx.info["GL_RENDERER"]}')
+    scenes = get_scenes(graphics_engine)
+    for name in args.scenes or scenes:
+        cpu, wall = bench(graphics_engine.ctx, scenes[name], args.frames)
+        print(f'{name:>14}: {cpu * 1e3:8.2f} ms cpu/frame {wall * 1e3:8.2f} ms wall/frame   {", ".join(COVERAGE[name])}')
+    graphics_engine.destroy()
+
+
+if __name__ == '__main__':
+    main()
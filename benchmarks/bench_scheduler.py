@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+"""
+Pacing of the main loop by `clock.tick()` without a limit, as the client used to, by `clock.tick` with a limit and by
+`FrameScheduler`, on a standalone (software, llvmpipe when there is no gpu) GL context. A menu frame is the `default`
+scene of `_scenes`, a static full screen layer, which the scheduler also draws idle as a menu with nothing animating
+would be, capped at `--fps`. A fight frame is the `compositor` scene, capped at `--fight-fps`, below what llvmpipe
+draws uncapped so the pacing shows rather than the cost of the frame. Each loop runs for `--seconds`. Reports the
+frames per second, the jitter (the standard deviation of the time between frames) and the worst time between frames,
+the cpu use of the process, which includes the driver's threads, and that of the main thread alone.
+
+    python -m benchmarks.bench_scheduler
+"""
+import numpy as np
+import pygame as pg
+import argparse
+import time
+
+from src.util import FrameScheduler
+
+from ._scenes import get_engine, get_scenes
+
+
+def run(graphics_engine, scene, pacing: str, fps: float, seconds: float) -> dict[str, float]:
+    """
+    Draw `scene` in a loop paced by `pacing` at `fps` for `seconds`
+    """
+    clock = pg.time.Clock()
+    scheduler = FrameScheduler(render_rate=fps)
+    starts = []
+    start, cpu, thread = time.perf_counter(), time.process_time(), time.thread_time()
+    while time.perf_counter() - start < seconds:
+        if pacing == 'uncapped':
+            clock.tick()
+        elif pacing == 'tick':
+            clock.tick(fps)
+        else:
+            scheduler.wait(idle=pacing == 'scheduler idle')
+        starts.append(time.perf_counter())
+        pg.event.get()
+        scene()
+        # the swap waits for the gpu to be done with the frame
+        graphics_engine.ctx.finish()
+        scheduler.swap()
+    wall = time.perf_counter() - start
+    intervals = np.diff(starts)
+    return dict(
+        fps=len(starts) / wall,
+        jitter=np.std(intervals),
+        worst=np.max(intervals),
+        cpu=(time.process_time() - cpu) / wall,
+        thread=(time.thread_time() - thread) / wall,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--seconds', type=float, default=3)
+    parser.add_argument('--fps', type=float, default=60)
+    parser.add_argument('--fight-fps', type=float, default=15)
+    args = parser.parse_args()
+
+    graphics_engine = get_engine()
+    print(f'{graphics_engine.ctx.info["GL_RENDERER"]}')
+    scenes = get_scenes(graphics_engine)
+    for frame, scene, fps, pacings in (
+        ('menu', scenes['default'], args.fps, ('uncapped', 'tick', 'scheduler', 'scheduler idle')),
+        ('fight', scenes['compositor'], args.fight_fps, ('uncapped', 'tick', 'scheduler')),
+    ):
+        for pacing in pacings:
+            stats = run(graphics_engine, scene, pacing, fps, args.seconds)
+            print(
+                f'{frame:>5} {pacing:>14}: {stats["fps"]:7.1f} fps {stats["jitter"] * 1e3:6.2f} ms jitter {stats["worst"] * 1e3:7.2f} ms worst'
+                f' {stats["cpu"] * 100:6.1f}% cpu {stats["thread"] * 100:6.1f}% main thread'
+            )
+    graphics_engine.destroy()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+"""
+Load test of the `SpectatorServer` over local sockets: replays a recorded fight at 60 fps to 1, 16 and 128
+spectators (in a separate process) and reports the broadcaster's CPU cost per frame and its bandwidth.
+
+    python -m benchmarks.bench_spectators
+"""
+import multiprocessing as mp
+import argparse
+import asyncio
+import time
+
+from src.sim import init_headless, HeadlessAssets, Match
+from src.fight import ScriptedController
+from src.net import SpectatorServer, Broadcaster
+from src.net.protocol import LENGTH
+
+
+FPS = 60
+
+
+class _Recorder:
+    def __init__(self):
+        self.messages = []
+
+    def publish(self, message: bytes, match: bool = False):
+        self.messages.append((message, match))
+
+
+def record(frames: int) -> list[tuple[bytes, bool]]:
+    """
+    Record the broadcast of a scripted headless fight
+    """
+    init_headless()
+    match = Match(HeadlessAssets())
+    recorder = _Recorder()
+    broadcaster = Broadcaster(recorder)
+    controllers = (ScriptedController(0), ScriptedController(1))
+    match.reset(('amath', 'psych'), seed=0)
+    broadcaster.on_match_start((match.geese[0].major_id, match.geese[1].major_id), 0)
+    for _ in range(frames):
+        if match.done:
+            match.reset(('amath', 'psych'))
+            broadcaster.on_match_start((match.geese[0].major_id, match.geese[1].major_id), 0)
+        controllers[0].act(match.geese[0], match.geese[1], 1 / FPS)
+        controllers[1].act(match.geese[1], match.geese[0], 1 / FPS)
+        broadcaster.on_frame(match.geese[0], match.geese[1], 1 / FPS)
+        match.step(1 / FPS)
+    return recorder.messages
+
+
+def _spectate(port: int, num_spectators: int, result):
+    async def watch():
+        received = 0
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        while True:
+            data = await reader.read(1 << 16)
+            if not data:
+                break
+            received += len(data)
+        writer.close()
+        return received
+
+    async def watch_all():
+        return await asyncio.gather(*[watch() for _ in range(num_spectators)])
+
+    result.send(sum(asyncio.run(watch_all())))
+
+
+def bench(messages: list[tuple[bytes, bool]], num_spectators: int) -> dict:
+    server = SpectatorServer('127.0.0.1', 0)
+    server.start()
+    receiver, sender = mp.Pipe(duplex=False)
+    spectators = mp.Process(target=_spectate, args=(server.port, num_spectators, sender))
+    spectators.start()
+    while server.num_spectators < num_spectators:
+        time.sleep(0.01)
+
+    # broadcast at 60 fps, measuring the server thread's cpu time and the time spent publishing
+    server_clock = time.pthread_getcpuclockid(server.thread.ident)
+    server_start = time.clock_gettime(server_clock)
+    publish_time = 0
+    start = time.perf_counter()
+    for i, (message, match) in enumerate(messages):
+        t = time.perf_counter()
+        server.publish(message, match)
+        publish_time += time.perf_counter() - t
+        time.sleep(max(start + (i + 1) / FPS - time.perf_counter(), 0))
+    # wait for the last frame to go out
+    time.sleep(0.1)
+    server_time = time.clock_gettime(server_clock) - server_start
+    bytes_sent = server.bytes_sent
+
+    server.stop()
+    received = receiver.recv()
+    spectators.join()
+
+    seconds = len(messages) / FPS
+    return dict(
+        cpu_us_per_frame=(server_time + publish_time) / len(messages) * 1e6,
+        publish_us_per_frame=publish_time / len(messages) * 1e6,
+        cpu_percent=100 * (server_time + publish_time) / seconds,
+        bytes_per_second=bytes_sent / seconds,
+        bytes_per_spectator_per_second=bytes_sent / seconds / num_spectators,
+        delivered=received / max(bytes_sent, 1),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--spectators', type=int, nargs='*', default=[1, 16, 128])
+    parser.add_argument('--seconds', type=float, default=5)
+    args = parser.parse_args()
+
+    messages = record(int(args.seconds * FPS))
+    for num_spectators in args.spectators:
+        stats = bench(messages, num_spectators)
+        print(
+            f'{num_spectators:>4} spectators: '
+            f'{stats["cpu_us_per_frame"]:7.1f}us cpu/frame ({stats["publish_us_per_frame"]:.1f}us on the game thread, {stats["cpu_percent"]:.2f}% of a core), '
+            f'{stats["bytes_per_second"] / 1000:8.1f} kB/s total, {stats["bytes_per_spectator_per_second"]:.0f} B/s per spectator, '
+            f'{100 * stats["delivered"]:.0f}% delivered'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+"""
+Fight sprites blitted onto a layer which is uploaded every frame against the same sprites drawn from the atlas by
+`SpriteBatch`, on a standalone (software, llvmpipe when there is no gpu) GL context. Each frame draws the background
+and then 10 (a fight), 100 and 1000 goose, accessory and attack frames. Reports the main thread's CPU time per frame,
+the wall time per frame including the GL work, and the bytes uploaded per frame.
+
+    python -m benchmarks.bench_sprites
+"""
+import numpy as np
+import pygame as pg
+import argparse
+
+from src.sim import init_headless, HeadlessAssets
+from src.pymgl import GraphicsEngine
+from src.util import load_backgrounds
+
+from .bench_gpu_particles import RESOLUTION, get_context, bench
+
+
+def get_frames(assets: HeadlessAssets, major: str) -> list[pg.Surface]:
+    """
+    Every goose, accessory and attack frame of a major
+    """
+    frames = []
+    for animations in (assets.character_assets[major], assets.attack_assets.get(major, {})):
+        for sides in animations.values():
+            frames += sides['right'] + sides['left']
+    return frames + list(assets.accessory_assets.get(major, {}).values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('-n', '--sprites', type=int, nargs='*', default=[10, 100, 1000])
+    parser.add_argument('--frames', type=int, default=20)
+    parser.add_argument('--majors', nargs='*', default=['amath', 'psych'])
+    args = parser.parse_args()
+
+    init_headless()
+    ctx = get_context()
+    print(f'{ctx.info["GL_RENDERER"]}')
+    graphics_engine = GraphicsEngine(ctx, RESOLUTION, './src')
+    sprite_batch = graphics_engine.sprite_batch
+    layer = pg.Surface(RESOLUTION)
+
+    assets = HeadlessAssets()
+    background = load_backgrounds('./assets/backgrounds', RESOLUTION)[0]['uwmain']
+    frames = [frame for major in args.majors for frame in get_frames(assets, major)]
+    sprite_batch.preload([background] + frames)
+    # the atlas is uploaded once, apart from the frames
+    atlas_bytes = sprite_batch.render()
+    print(f'{len(frames) + 1} sprites on {len(sprite_batch.pages)} atlas page(s), {atlas_bytes // 1024} KiB uploaded once')
+
+    def render_cpu(sprites: list[tuple[pg.Surface, tuple]]):
+        layer.blit(background, (0, 0))
+        for frame, pos in sprites:
+            layer.blit(frame, pos)
+        graphics_engine.render(layer)
+
+    def render_gpu(sprites: list[tuple[pg.Surface, tuple]]):
+        sprite_batch.blit(background, (0, 0))
+        for frame, pos in sprites:
+            sprite_batch.blit(frame, pos)
+        graphics_engine.render_sprites()
+
+    rng = np.random.default_rng(0)
+    for num_sprites in args.sprites:
+        sprites = [
+            (frames[i], tuple(pos))
+            for i, pos in zip(rng.integers(len(frames), size=num_sprites), (rng.random((num_sprites, 2)) * RESOLUTION).astype(int).tolist())
+        ]
+        for name, render in (
+            ('cpu', lambda: render_cpu(sprites)),
+            ('gpu', lambda: render_gpu(sprites)),
+        ):
+            bytes_uploaded = graphics_engine.bytes_uploaded
+            cpu, wall = bench(ctx, render, args.frames)
+            bytes_uploaded = (graphics_engine.bytes_uploaded - bytes_uploaded) // (args.frames + 1)
+            print(f'{num_sprites:>6} {name}: {cpu * 1e3:8.2f} ms cpu/frame {wall * 1e3:8.2f} ms wall/frame {bytes_uploaded // 1024:>6} KiB/frame')
+
+
+if __name__ == '__main__':
+    main()
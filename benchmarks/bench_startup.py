@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+"""
+Startup of a `GraphicsEngine` with shaders compiled on the first frame drawn with them against compiled ahead of it by
+`warmup` over loading frames, on a standalone (software, llvmpipe when there is no gpu) GL context with Mesa's shader
+cache off, so every run compiles as on a first start. Reports the time to create the context and the engine, then the
+time of the first frame of every scene of `_scenes`, without and with the warmup, and how many loading frames of
+`--budget` the warmup took. Drivers compile most of a program when it is first drawn with, which is the time taken
+off the first frames.
+
+    python -m benchmarks.bench_startup
+"""
+import moderngl as mgl
+import argparse
+import time
+import os
+
+from src.sim import init_headless
+from src.pymgl import GraphicsEngine
+from src.util import QualityGovernor
+from src.client import _Settings
+
+from ._scenes import get_scenes
+from .bench_gpu_particles import RESOLUTION, get_context
+
+
+def get_engine() -> tuple[GraphicsEngine, float, float]:
+    """
+    A `GraphicsEngine` on a new headless context, blending like the client, with the seconds taken to create the
+    context and the engine
+    """
+    start = time.perf_counter()
+    ctx = get_context()
+    ctx.enable(mgl.BLEND)
+    ctx.blend_func = (mgl.SRC_ALPHA, mgl.ONE_MINUS_SRC_ALPHA)
+    context = time.perf_counter() - start
+    graphics_engine = GraphicsEngine(ctx, RESOLUTION, './src')
+    return graphics_engine, context, time.perf_counter() - start - context
+
+
+def queue_scenes(graphics_engine: GraphicsEngine):
+    """
+    Queue every shader the scenes of `_scenes` draw with
+    """
+    for shader in ('default', 'hud', 'overlay', 'blur_composite', 'sprites', 'particles'):
+        graphics_engine.queue_warmup(shader)
+    quality = QualityGovernor().settings
+    graphics_engine.queue_blur_warmup(quality['blur_taps'], quality['blur_scale'])
+    graphics_engine.set_composition(_Settings.COMPOSITION)
+    graphics_engine.queue_composite_warmup(['hud', 'gaussian_blur', 'overlay'])
+    graphics_engine.set_composition(None)
+
+
+def first_frames(graphics_engine: GraphicsEngine) -> dict[str, float]:
+    """
+    The seconds taken by the first frame of every scene
+    """
+    times = {}
+    for name, scene in get_scenes(graphics_engine).items():
+        start = time.perf_counter()
+        scene()
+        graphics_engine.ctx.finish()
+        times[name] = time.perf_counter() - start
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--budget', type=float, default=1000 * _Settings.WARMUP_BUDGET, help='ms of warmup per loading frame')
+    args = parser.parse_args()
+
+    os.environ['MESA_SHADER_CACHE_DISABLE'] = 'true'
+    init_headless()
+    # the first context also starts the driver's compiler
+    graphics_engine, context, engine = get_engine()
+    print(f'{graphics_engine.ctx.info["GL_RENDERER"]}')
+    graphics_engine.queue_warmup('default')
+    graphics_engine.warmup(0)
+    graphics_engine.destroy()
+
+    results = {}
+    for name, warmup in (('compiled in the first frames', False), ('warmed up', True)):
+        graphics_engine, context, engine = get_engine()
+        print(f'{name}: context {context * 1e3:.1f} ms, engine {engine * 1e3:.1f} ms, of which linking {graphics_engine.compile_time * 1e3:.1f} ms')
+        if warmup:
+            queue_scenes(graphics_engine)
+            frames, longest = 0, 0
+            while graphics_engine.warmup_queue:
+                start = time.perf_counter()
+                graphics_engine.warmup(args.budget / 1000)
+                longest = max(longest, time.perf_counter() - start)
+                frames += 1
+            print(f'    warmup {graphics_engine.warmup_time * 1e3:.1f} ms over {frames} loading frames, the longest {longest * 1e3:.1f} ms')
+        results[name] = first_frames(graphics_engine)
+        graphics_engine.destroy()
+        graphics_engine.ctx.release()
+
+    cold, warm = results.values()
+    print('first frame of each scene')
+    for scene in cold:
+        print(f'{scene:>14}: {cold[scene] * 1e3:8.1f} ms compiled in the frame {warm[scene] * 1e3:8.1f} ms warmed up')
+    print(f'{"total":>14}: {sum(cold.values()) * 1e3:8.1f} ms compiled in the frame {sum(warm.values()) * 1e3:8.1f} ms warmed up')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+"""
+Upload stall of layer textures written straight from pygame surfaces against uploads through two alternating pixel
+buffers per layer with `GraphicsEngine.set_pixel_buffers`, on a standalone (software, llvmpipe when there is no gpu)
+GL context. Each frame changes and draws a full default layer (3.6 MB at 1280x720), a hud with gpa boxes, or both.
+Reports the main thread's time spent in uploads per frame, its CPU time per frame and the wall time per frame
+including the GL work.
+
+    python -m benchmarks.bench_uploads
+"""
+import pygame as pg
+import argparse
+
+from src.sim import init_headless
+from src.pymgl import GraphicsEngine
+
+from .bench_gpu_particles import RESOLUTION, get_context, bench
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--frames', type=int, default=60)
+    args = parser.parse_args()
+
+    init_headless()
+    ctx = get_context()
+    print(f'{ctx.info["GL_RENDERER"]}')
+    graphics_engine = GraphicsEngine(ctx, RESOLUTION, './src')
+    default = pg.Surface(RESOLUTION)
+    hud = pg.Surface(RESOLUTION, pg.SRCALPHA)
+    frame = 0
+
+    def render(layers: tuple[str, ...]):
+        nonlocal frame
+        frame += 1
+        if 'default' in layers:
+            default.fill((frame % 256, 80, 120))
+            graphics_engine.render(default)
+        if 'hud' in layers:
+            hud.fill((0, 0, 0, 0))
+            for x in (20, RESOLUTION[0] - 250):
+                pg.draw.rect(hud, (255, 255, 255, frame % 256), (x, 20, 230, 60))
+            graphics_engine.render(hud, shader='hud')
+
+    for layers in (('default',), ('hud',), ('default', 'hud')):
+        for name, enabled in (('direct', False), ('pixel buffers', True)):
+            graphics_engine.set_pixel_buffers(enabled)
+            upload_time = graphics_engine.upload_time
+            cpu, wall = bench(ctx, lambda: render(layers), args.frames)
+            stall = (graphics_engine.upload_time - upload_time) / (args.frames + 1)
+            print(f'{"+".join(layers):>12} {name:>13}: {stall * 1e3:8.2f} ms upload/frame {cpu * 1e3:8.2f} ms cpu/frame {wall * 1e3:8.2f} ms wall/frame')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+"""
+Golden-image comparisons for every shader in `src/pymgl/shaders`, on a standalone (software, llvmpipe when there is
+no gpu) GL context so they run without a display. Each scene of `_scenes` is drawn, read back and compared against
+`benchmarks/golden/<scene>.png`. A pixel differs when any channel is off by more than `--tolerance`, and a scene fails
+when more than `--max-mismatch` of its pixels differ, so small differences between drivers pass. Exits with status 1
+when a scene fails, has no golden image, or a shader is drawn by no scene. `--update` rewrites the golden images after
+an intended change to rendering, `--out` keeps the frames and differences of failing scenes.
+
+    python -m benchmarks.golden_images
+    python -m benchmarks.golden_images --update
+"""
+import numpy as np
+import pygame as pg
+import argparse
+import sys
+import os
+
+from ._scenes import get_engine, get_scenes, get_uncovered
+
+
+GOLDEN_PATH = './benchmarks/golden'
+
+
+def compare(frame: pg.Surface, golden: pg.Surface, tolerance: int) -> tuple[int, np.ndarray]:
+    """
+    The largest channel difference between two frames, and the pixels which differ by more than `tolerance`
+    """
+    difference = np.abs(pg.surfarray.array3d(frame).astype(np.int16) - pg.surfarray.array3d(golden)).max(axis=-1)
+    return int(difference.max()), difference > tolerance
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenes', nargs='*', default=None, help='scenes to compare, all by default')
+    parser.add_argument('--tolerance', type=int, default=2, help='largest channel difference of matching pixels')
+    parser.add_argument('--max-mismatch', type=float, default=1e-3, help='fraction of pixels which may differ')
+    parser.add_argument('--update', action='store_true', help='write the frames as the golden images')
+    parser.add_argument('--out', default=None, help='directory for the frames and differences of failing scenes')
+    args = parser.parse_args()
+
+    graphics_engine = get_engine()
+    print(f'{graphics_engine.ctx.info["GL_RENDERER"]}')
+    scenes = get_scenes(graphics_engine)
+    failed = False
+
+    uncovered = get_uncovered()
+    if uncovered:
+        print(f'not drawn by any scene: {", ".join(uncovered)}')
+        failed = True
+
+    os.makedirs(GOLDEN_PATH, exist_ok=True)
+    for name in args.scenes or scenes:
+        scenes[name]()
+        frame = graphics_engine.read_frame()
+        path = f'{GOLDEN_PATH}/{name}.png'
+        if args.update:
+            pg.image.save(frame, path)
+            print(f'{name:>14}: updated')
+            continue
+        if not os.path.exists(path):
+            print(f'{name:>14}: no golden image, run with --update')
+            failed = True
+            continue
+
+        largest, mismatch = compare(frame, pg.image.load(path), args.tolerance)
+        passed = mismatch.mean() <= args.max_mismatch
+        print(f'{name:>14}: {"ok" if passed else "FAILED"} {mismatch.sum():>7} pixels differ, largest difference {largest}')
+        if not passed:
+            failed = True
+            if args.out is not None:
+                os.makedirs(args.out, exist_ok=True)
+                pg.image.save(frame, f'{args.out}/{name}.png')
+                pg.image.save(pg.surfarray.make_surface(mismatch.astype(np.uint8) * 255), f'{args.out}/{name}_diff.png')
+
+    graphics_engine.destroy()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
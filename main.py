@@ -1,7 +1,37 @@
 #!/usr/bin/env python
+import argparse
+
 from src.client import Client
 
 
 if __name__ == '__main__':
-    client = Client()
-    client.run()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='The UW Experience')
+    parser.add_argument('--spectator-port', type=int, default=None, help='stream fights to spectators on this port')
+    parser.add_argument('--cpu-particles', action='store_true', help='draw particle effects with pygame instead of the gpu')
+    parser.add_argument('--cpu-sprites', action='store_true', help='blit fight sprites with pygame instead of drawing them on the gpu')
+    parser.add_argument('--layer-passes', action='store_true', help='draw each layer onto the screen instead of compositing them in one pass')
+    parser.add_argument('--pixel-buffers', action='store_true', help='upload layers through alternating pixel buffers, faster on drivers which copy from them asynchronously')
+    parser.add_argument('--half-res', action='store_true', help='draw fight sprites at their native size and scale them up 2x on the gpu')
+    parser.add_argument('--fps', type=float, default=60, help='the most frames rendered per second, 0 does not cap them')
+    parser.add_argument('--update-rate', type=float, default=None, help='update at this fixed rate instead of once per frame')
+    parser.add_argument('--idle-fps', type=float, default=10, help='frames per second in menus with nothing animating')
+    parser.add_argument('--vsync', action='store_true', help='wait for the display refresh, starting frames just in time for it')
+    parser.add_argument('--pipelined', action='store_true', help='update and rasterize the next frame on a worker thread while this one is presented, one frame later')
+    parser.add_argument('--raster-threads', type=int, default=1, help='draw the layers of a frame at the same time on this many threads')
+    args = parser.parse_args()
+
+    client = Client(
+        spectator_port=args.spectator_port,
+        gpu_particles=not args.cpu_particles,
+        gpu_sprites=not args.cpu_sprites,
+        single_pass=not args.layer_passes,
+        pixel_buffers=args.pixel_buffers,
+        half_res=args.half_res,
+        render_rate=args.fps or None,
+        update_rate=args.update_rate,
+        idle_rate=args.idle_fps,
+        vsync=args.vsync,
+        pipelined=args.pipelined,
+        raster_threads=args.raster_threads
+    )
+    client.run()
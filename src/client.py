@@ -1,12 +1,19 @@
 import numpy as np
 import pygame as pg
 import moderngl as mgl
-import json
+import time
 
 from .pymgl import GraphicsEngine
 from .pyfont import Font
+from .net import SpectatorServer, Broadcaster
 
 from .util import (
+    get_registry,
+    QualityGovernor,
+    FrameScheduler,
+    FramePipeline,
+    LayerRasterizer,
+    DrawList,
     load_keybinds, 
     load_backgrounds,
     load_character_assets, 
@@ -19,22 +26,66 @@ from .menus import *
 
 class _Settings:
     RESOLUTION = (1280,720)
+    FRAME_BUDGET = 1 / 60
+    # seconds per loading frame spent compiling shaders ahead of their first use
+    WARMUP_BUDGET = 1 / 60
     MENU_MAP = dict(start=0, main=1, select=2, fight=3)
+    # layers from the bottom up and how each is composited, in one pass
+    COMPOSITION = [
+        ('background', 'opaque'), ('default', 'opaque'), ('foreground', 'premultiplied'),
+        ('hud', 'premultiplied'), ('banner', 'premultiplied'), ('gaussian_blur', 'glow'), ('overlay', 'colorkey')
+    ]
+    # layers of the stage, which the fight's camera moves
+    CAMERA_LAYERS = ('background', 'default', 'foreground', 'gaussian_blur')
+    # layers with content in the menus and in fights, with and without glow and the loser's banner
+    WARMUP_COMPOSITES = [
+        ('default', 'overlay'), ('default', 'banner', 'overlay'),
+        ('hud', 'overlay'), ('hud', 'gaussian_blur', 'overlay'),
+        ('hud', 'banner', 'overlay'), ('hud', 'banner', 'gaussian_blur', 'overlay'),
+        ('background', 'foreground', 'hud', 'overlay'), ('background', 'foreground', 'hud', 'gaussian_blur', 'overlay'),
+        ('background', 'foreground', 'hud', 'banner', 'overlay'), ('background', 'foreground', 'hud', 'banner', 'gaussian_blur', 'overlay'),
+    ]
 
 
 class Client:
-    def __init__(self):
-        self._pg_init()
+    def __init__(
+        self,
+        spectator_port: int | None = None,
+        gpu_particles: bool = True,
+        gpu_sprites: bool = True,
+        single_pass: bool = True,
+        pixel_buffers: bool = False,
+        half_res: bool = False,
+        render_rate: float | None = 60,
+        update_rate: float | None = None,
+        idle_rate: float = 10,
+        vsync: bool = False,
+        pipelined: bool = False,
+        raster_threads: int = 1
+    ):
+        self._pg_init(vsync)
+        self._setup_scheduler(render_rate, update_rate, idle_rate, vsync)
+        self._setup_pipeline(pipelined)
+        self._setup_rasterizer(raster_threads)
+        self._setup_composition(single_pass)
+        self.graphics_engine.set_pixel_buffers(pixel_buffers)
+        self._setup_particles(gpu_particles)
+        self._setup_sprites(gpu_sprites)
+        self._setup_pixel_art(half_res)
+        self._setup_background()
+        self._setup_quality()
+        self._setup_warmup()
         self.assets = self.Assets('./assets/', self.resolution)
         self._setup_menus()
+        self._setup_spectators(spectator_port)
     
-    def _pg_init(self):
+    def _pg_init(self, vsync: bool):
         # init
         pg.init()
 
         # get window and ctx
         self.resolution = _Settings.RESOLUTION
-        pg.display.set_mode(self.resolution, pg.OPENGL | pg.DOUBLEBUF)
+        pg.display.set_mode(self.resolution, pg.OPENGL | pg.DOUBLEBUF, vsync=int(vsync))
         self.ctx = mgl.create_context()
         self.ctx.enable(mgl.BLEND)
         self.ctx.blend_func = (
@@ -46,18 +97,99 @@ class Client:
         self.graphics_engine = GraphicsEngine(self.ctx, self.resolution, './src')
         self.font = Font('./src/pyfont/font.png')
         self.displays = dict(
-            default=pg.Surface(self.resolution),
+            default=pg.Surface(self.resolution, pg.SRCALPHA),
+            hud=pg.Surface(self.resolution, pg.SRCALPHA),
             gaussian_blur=pg.Surface(self.resolution),
             overlay=pg.Surface(self.resolution)
         )
+        # uniforms of each layer's draw this frame, e.g. a fade or a wipe, set by the menus
+        self.uniforms : dict[str, dict] = {}
+        # a layer which the menus keep rather than redraw every frame, drawn over the hud this frame
+        self.banner = None
+        # the m_model which moves the layers of the stage this frame, set by the fight's camera
+        self.camera = None
+        # bytes uploaded to layer textures last frame
+        self.frame_bytes_uploaded = 0
 
-        # clock
+        # clock, which measures the frame rate
         self.clock = pg.time.Clock()
         self.dt = 0
         
         # events
         self.events = []
 
+    def _setup_scheduler(self, render_rate: float | None, update_rate: float | None, idle_rate: float, vsync: bool):
+        # cap the frame rate, update at a fixed rate or once per frame, and idle in menus with nothing animating
+        self.scheduler = FrameScheduler(render_rate, update_rate, idle_rate, vsync, pg.display.get_current_refresh_rate() or 60)
+        self.idle = False
+
+    def _setup_pipeline(self, pipelined: bool):
+        # update and rasterize the next frame on a worker thread while this one is uploaded and presented, onto a second set of displays
+        self.pipeline = None
+        self.back_displays = None
+        if pipelined:
+            self.pipeline = FramePipeline()
+            self.back_displays = {shader: display.copy() for shader, display in self.displays.items()}
+
+    def _setup_rasterizer(self, raster_threads: int):
+        # the menus record their draw calls for each layer, which are drawn onto the displays at the end of the frame,
+        # independent layers at the same time on more than one thread. the foreground is the half resolution pixel layer
+        self.rasterizer = LayerRasterizer(raster_threads)
+        self.layers = {shader: DrawList() for shader in (*self.displays, 'foreground')}
+
+    def _setup_composition(self, single_pass: bool):
+        # composite every layer in one draw instead of drawing each layer onto the screen
+        if single_pass:
+            self.graphics_engine.set_composition(_Settings.COMPOSITION)
+
+    def _setup_particles(self, gpu_particles: bool):
+        # particle pools drawn by the graphics engine this frame instead of the gaussian blur layer
+        self.gpu_particles = gpu_particles
+        self.particle_pools = None
+
+    def _setup_sprites(self, gpu_sprites: bool):
+        # sprite batch drawn by the graphics engine this frame instead of the default layer
+        self.gpu_sprites = gpu_sprites
+        self.sprite_batch = None
+
+    def _setup_pixel_art(self, half_res: bool):
+        # fight sprites drawn at their native size and scaled up 2x on the gpu, the pixel layer drawn this frame instead of the default layer
+        self.graphics_engine.set_pixel_scale(2 if half_res else 1)
+        self.pixel_layer = None
+
+    def _setup_background(self):
+        # background drawn by the graphics engine this frame under the default layer, which then only has sprites
+        self.draw_background = False
+
+    def _setup_quality(self):
+        # trade particles and glow for frame rate under load
+        self.quality = QualityGovernor(budget=_Settings.FRAME_BUDGET)
+        self._apply_quality()
+
+    def _setup_warmup(self):
+        # shaders the menus and fights draw with, compiled during the loading screen instead of on their first frame
+        self.loading = True
+        graphics_engine = self.graphics_engine
+        for shader in ('default', 'overlay', 'hud', 'blur_composite'):
+            graphics_engine.queue_warmup(shader)
+        if graphics_engine.composition is not None:
+            for layers in _Settings.WARMUP_COMPOSITES:
+                graphics_engine.queue_composite_warmup(layers)
+                # and as fights draw them, with the stage moved by the camera
+                graphics_engine.queue_composite_warmup(layers, moved=_Settings.CAMERA_LAYERS)
+        if self.gpu_sprites:
+            graphics_engine.queue_warmup('sprites')
+        if self.gpu_particles:
+            graphics_engine.queue_warmup('particles')
+        # every quality level, so stepping down mid fight does not stall a frame
+        for quality in self.quality.levels:
+            if quality['glow']:
+                graphics_engine.queue_blur_warmup(quality['blur_taps'], quality['blur_scale'])
+
+    def _apply_quality(self):
+        quality = self.quality.settings
+        self.graphics_engine.set_blur(quality['blur_taps'], quality['blur_scale'])
+
     def _setup_menus(self):
         # menus
         self.menus : list[Menu] = [
@@ -68,6 +200,15 @@ class Client:
         ]
         self.current_menu = 0
     
+    def _setup_spectators(self, spectator_port: int | None):
+        # stream fights to spectators
+        self.spectator_server = None
+        self.broadcaster = None
+        if spectator_port is not None:
+            self.spectator_server = SpectatorServer(port=spectator_port)
+            self.spectator_server.start()
+            self.broadcaster = Broadcaster(self.spectator_server)
+
     def get_fight_data(self):
         select_menu = self.menus[_Settings.MENU_MAP['select']]
         return dict(
@@ -86,35 +227,42 @@ class Client:
             if event.type == pg.KEYDOWN and event.key == pg.K_ESCAPE:
                 return dict(exit=True)
         
-        # not done loading assets
-        if not self.assets.finished_loading:
-            self.assets.load_assets()
+        # not done loading assets or compiling shaders
+        if self.loading:
+            if not self.assets.finished_loading:
+                self.assets.load_assets()
+            warm = self.graphics_engine.warmup(_Settings.WARMUP_BUDGET)
+            self.loading = not (self.assets.finished_loading and warm)
             self.menus[self.current_menu].transition_time = 0
         
         # menu update
         return self.menus[self.current_menu].update(self)
 
-    def render(self):
-        self.ctx.clear(0.08, 0.1, 0.2)
-
+    def rasterize(self):
         # render to pg surface
-        [display.fill((0, 0, 0)) for display in self.displays.values()]
+        self.particle_pools = None
+        self.sprite_batch = None
+        self.pixel_layer = None
+        self.draw_background = False
+        self.uniforms = {}
+        self.banner = None
+        self.camera = None
         self.menus[self.current_menu].render(self)
 
-        # not done loading assets
-        if not self.assets.finished_loading:
+        # not done loading assets or compiling shaders
+        if self.loading:
             font_size = 25
             num_dots = (self.assets.progress // 5) % 3 + 1
-            self.font.render(
-                self.displays['overlay'],
+            self.layers['overlay'].draw(
+                self.font.render,
                 "loading",
                 np.array(self.resolution) / 2 + np.array([-font_size * 1.5, 0]),
                 (255, 255, 255),
                 font_size,
                 style='center'
             )
-            self.font.render(
-                self.displays['overlay'],
+            self.layers['overlay'].draw(
+                self.font.render,
                 "." * num_dots,
                 np.array(self.resolution) / 2 + np.array([font_size * 2, -self.font.char_height(font_size) / 2]),
                 (255, 255, 255),
@@ -123,34 +271,149 @@ class Client:
             )
         
         # render cursor
-        self.displays['overlay'].blit(self.assets.cursor, pg.mouse.get_pos())
+        self.layers['overlay'].blit(self.assets.cursor, pg.mouse.get_pos())
+
+        # clear the displays this frame uploads under what was drawn onto them, the sprite batch, the pixel layer and the
+        # gpu particles stand in for the others
+        unused = set()
+        if self.sprite_batch is not None or self.pixel_layer is not None:
+            unused.add('default')
+        if self.particle_pools is not None:
+            unused.add('gaussian_blur')
+        [self.layers[shader].clear((0, 0, 0, 0)) for shader in self.displays if shader not in unused]
+
+        # draw the recorded calls onto the displays
+        targets = dict(self.displays)
+        if self.pixel_layer is not None:
+            targets['foreground'] = self.pixel_layer
+        self.rasterizer.run(targets, self.layers)
+
+    def _get_frame(self) -> dict:
+        # what was rasterized this frame, handed over whole when pipelined so the next frame draws onto the other displays
+        pipelined = self.pipeline is not None
+        frame = dict(
+            displays=self.displays,
+            uniforms=self.uniforms,
+            banner=self.banner,
+            camera=self.camera,
+            draw_background=self.draw_background,
+            particle_pools=self.particle_pools,
+            sprites=None,
+            foreground=None
+        )
+        if pipelined:
+            self.displays, self.back_displays = self.back_displays, self.displays
+            if self.particle_pools is not None:
+                frame['particle_pools'] = [pool.snapshot() for pool in self.particle_pools]
+        if self.sprite_batch is not None:
+            frame['sprites'] = self.sprite_batch.take()
+        if self.pixel_layer is not None:
+            frame['foreground'] = self.pixel_layer.swap() if pipelined else self.pixel_layer.surface
+        return frame
+
+    def present(self, frame: dict):
+        self.ctx.clear(0.08, 0.1, 0.2)
 
         # render using graphics engine to screen
-        [self.graphics_engine.render(
-            display, 
-            shader=shader
-        ) for shader, display in self.displays.items()]
-    
+        quality = self.quality.settings
+        bytes_uploaded = self.graphics_engine.bytes_uploaded
+        self.graphics_engine.set_camera(frame['camera'], _Settings.CAMERA_LAYERS)
+        if frame['draw_background']:
+            self.graphics_engine.render_background()
+        for shader, display in frame['displays'].items():
+            uniforms = frame['uniforms'].get(shader)
+            if shader == 'gaussian_blur':
+                if not quality['glow']:
+                    continue
+                if frame['particle_pools'] is not None:
+                    self.graphics_engine.render_particles(frame['particle_pools'], shader=shader)
+                else:
+                    self.graphics_engine.render(display, shader=shader, uniforms=uniforms)
+            elif shader == 'default' and frame['sprites'] is not None:
+                self.graphics_engine.render_sprites(frame['sprites'])
+            elif shader == 'default' and frame['draw_background']:
+                # sprites over the background keep their alpha, only the part with sprites is uploaded
+                sprites = display if frame['foreground'] is None else frame['foreground']
+                self.graphics_engine.render(sprites, shader='hud', layer='foreground', uniforms=uniforms)
+            else:
+                self.graphics_engine.render(display, shader=shader, uniforms=uniforms)
+            if shader == 'hud' and frame['banner'] is not None:
+                self.graphics_engine.render_static(frame['banner'], shader='hud', layer='banner', uniforms=frame['uniforms'].get('banner'))
+        self.graphics_engine.composite()
+        self.frame_bytes_uploaded = self.graphics_engine.bytes_uploaded - bytes_uploaded
+
+    def render(self):
+        self.rasterize()
+        self.present(self._get_frame())
+
+    def _poll(self) -> tuple[list, list[float], float]:
+        # input and the updates due, input waits on the queue for the next update
+        updates = self.scheduler.get_updates()
+        events = pg.event.get() if updates else []
+        return events, updates, time.perf_counter()
+
+    def _simulate(self, events: list, updates: list[float], polled: float) -> dict:
+        # update and rasterize a frame, on the worker thread when pipelined
+        self.events = events
+        for i, dt in enumerate(updates):
+            self.dt = dt
+            exit_status = self.update()
+            # events are handled by the first update of the frame
+            self.events = []
+            if exit_status:
+                # menus are loaded on the main thread, which the gl context belongs to
+                return dict(exit_status=exit_status, updates=updates[i + 1:], polled=polled)
+        self.rasterize()
+        frame = self._get_frame()
+        frame['idle'] = self.menus[self.current_menu].is_idle()
+        frame['polled'] = polled
+        return frame
+
     def run(self):
         # on load
         self.menus[self.current_menu].on_load(self)
         while True:
-            # update
-            self.dt = self.clock.get_time() / 1000
+            # wait for the next frame, or for input when nothing animates
+            self.scheduler.wait(self.idle)
             self.clock.tick()
-            self.events = pg.event.get()
-            exit_status = self.update()
-            if exit_status:
+            frame_start = time.perf_counter()
+
+            # update, or take the frame updated on the worker thread while the last one was presented
+            if self.pipeline is not None and self.pipeline.busy:
+                frame = self.pipeline.result()
+            else:
+                frame = self._simulate(*self._poll())
+            while 'exit_status' in frame:
+                exit_status = frame['exit_status']
                 if exit_status['exit']:
+                    if self.pipeline is not None:
+                        self.pipeline.close()
+                    self.rasterizer.close()
+                    if self.spectator_server is not None:
+                        self.spectator_server.stop()
                     pg.quit()
                     return
                 else: # menu transitions
+                    self.menus[self.current_menu].on_unload(self)
                     self.current_menu = _Settings.MENU_MAP[exit_status['goto']]
                     self.menus[self.current_menu].on_load(self)
-            
+                    frame = self._simulate([], frame['updates'], frame['polled'])
+
+            # idle until the next input when the menu has nothing to animate
+            self.idle = not self.loading and frame['idle']
+
+            # update and rasterize the next frame on the worker thread while this one is presented, not while loading
+            # as loading compiles shaders, nor when idle as the next frame waits on input
+            if self.pipeline is not None and not self.loading and not self.idle:
+                self.pipeline.submit(self._simulate, *self._poll())
+
             # render
-            self.render()
-            pg.display.flip()
+            self.present(frame)
+
+            # time spent on the frame, leaving out waiting on vsync and loading assets
+            if not self.loading and self.quality.update(time.perf_counter() - frame_start):
+                self._apply_quality()
+            self.scheduler.swap(frame['polled'])
 
     class Assets:
         def __init__(self, path: str, resolution: tuple):
@@ -159,21 +422,13 @@ class Client:
             # progress
             self.finished_loading = False
             self.progress = 0
-            self.geese_meta_data = {}
-            with open(f'{path}/geese/geese.json') as f:
-                self.geese_meta_data = json.load(f) 
-            self.accessory_meta_data = {}
-            with open(f'{path}/accessories/accessories.json') as f:
-                self.accessory_meta_data = json.load(f)
-            self.attack_meta_data = {}
-            with open(f'{path}/attacks/attacks.json') as f:
-                self.attack_meta_data = json.load(f)
-            self.attack_damages = {}
-            with open(f'{path}/attacks/damages.json') as f:
-                self.attack_damages = json.load(f)
-            self.attack_knockbacks = {}
-            with open(f'{path}/attacks/knockbacks.json') as f:
-                self.attack_knockbacks = json.load(f)
+            self.registry = get_registry(path)
+            self.geese_meta_data = self.registry.geese_meta_data
+            self.accessory_meta_data = self.registry.accessory_meta_data
+            self.attack_meta_data = self.registry.attack_meta_data
+            # [major id, attack id] lookup tables
+            self.attack_damages = self.registry.damage
+            self.attack_knockbacks = self.registry.knockback
 
             # cursor and logo
             pg.mouse.set_visible(False)
@@ -1 +1,5 @@
-from .goose import Goose
\ No newline at end of file
+from .goose import Goose
+from .vfx import ParticlePool, ring_cache
+from .rules import step_fight, get_loser
+from .controller import Controller, RandomController, ScriptedController
+from .cpu import CPUController
@@ -0,0 +1,95 @@
+import numpy as np
+
+from .goose import Goose, _Settings
+
+
+class Controller:
+    def __init__(self, seed: int | None = None):
+        """
+        A `Controller` drives a `Goose` by writing to its `action_inputs` and `direction_inputs`,
+        in place of keyboard events. Subclasses implement `act`, which is called once per frame
+        before the goose is updated.
+        """
+        self.rng = np.random.default_rng(seed)
+
+    def act(self, goose: Goose, rival: Goose, dt: float):
+        raise NotImplementedError
+
+    @staticmethod
+    def press(goose: Goose, action: str):
+        """
+        Press an action button, ignored while stunned (same as keyboard input)
+        """
+        if goose.stunned_time <= 0:
+            goose.action_inputs[action] = 1
+
+    @staticmethod
+    def hold(goose: Goose, horizontal: str | None = None, vertical: str | None = None):
+        """
+        Hold at most one horizontal and one vertical direction, releasing the others
+        """
+        for direction in goose.direction_inputs:
+            goose.direction_inputs[direction] = int(direction == horizontal or direction == vertical)
+
+
+class RandomController(Controller):
+    DECISION_TIME = 0.1
+
+    def __init__(self, seed: int | None = None):
+        """
+        Mashes buttons: holds a random direction and presses a random action every `DECISION_TIME` seconds
+        """
+        super().__init__(seed)
+        self.decision_time = 0
+
+    def act(self, goose: Goose, rival: Goose, dt: float):
+        self.decision_time -= dt
+        if self.decision_time > 0:
+            return
+        self.decision_time = RandomController.DECISION_TIME
+
+        self.hold(
+            goose,
+            horizontal=self.rng.choice(['left', 'right', None]),
+            vertical=self.rng.choice(['up', 'down', None], p=[0.2, 0.2, 0.6]),
+        )
+        action = self.rng.choice(['light_attack', 'jump', 'dash', None], p=[0.4, 0.1, 0.1, 0.4])
+        if action is not None:
+            self.press(goose, action)
+
+
+class ScriptedController(Controller):
+    ATTACK_RANGE = 120
+    DASH_RANGE = 500
+
+    def __init__(self, seed: int | None = None, aggression: float = 0.8):
+        """
+        Walks towards the rival and attacks once in range, picking the attack direction from
+        where the rival is. `aggression` is the chance of attacking on any frame in range.
+        """
+        super().__init__(seed)
+        self.aggression = aggression
+
+    def act(self, goose: Goose, rival: Goose, dt: float):
+        dx, dy = rival.pos - goose.pos
+        horizontal = 'right' if dx > 0 else 'left'
+
+        if abs(dx) > ScriptedController.ATTACK_RANGE:
+            # close the distance
+            self.hold(goose, horizontal=horizontal)
+            if abs(dx) > ScriptedController.DASH_RANGE and self.rng.random() < dt:
+                self.press(goose, 'dash')
+            return
+
+        # in range, attack towards the rival
+        if dy < -ScriptedController.ATTACK_RANGE / 2:
+            vertical = 'up'
+            if goose.pos[1] >= _Settings.GROUND_LEVEL and self.rng.random() < 0.5:
+                self.press(goose, 'jump')
+        elif dy > ScriptedController.ATTACK_RANGE / 2:
+            vertical = 'down'
+        else:
+            vertical = None
+        self.hold(goose, horizontal=horizontal if vertical is None else None, vertical=vertical)
+        if self.rng.random() < self.aggression:
+            self.press(goose, 'light_attack')
@@ -0,0 +1,274 @@
+import pygame as pg
+import numpy as np
+import math
+import time
+
+from .goose import Goose, _Settings as _GooseSettings
+from .controller import Controller
+from ..util.registry import (
+    get_registry,
+    ANCHOR_TOP,
+    ANCHOR_SIDE,
+    ANCHOR_CENTER,
+    ATTACK_DIRECTIONS,
+)
+
+
+_registry = get_registry()
+
+
+class _Settings:
+    # time between look ahead frames
+    LOOK_AHEAD_DT = 1 / 30
+    # look ahead horizons in frames, searched shallowest first
+    HORIZONS = [2, 4, 8, 16]
+    HIT_REWARD = 1
+    DISTANCE_PENALTY = 1
+    PREFERRED_RANGE = 80
+
+    # (horizontal, vertical, action), horizontal is relative to the rival
+    PLANS = [
+        ('toward', None, None),
+        ('away', None, None),
+        (None, None, None),
+        ('toward', None, 'light_attack'),
+        (None, 'up', 'light_attack'),
+        (None, 'down', 'light_attack'),
+        ('toward', None, 'jump'),
+        ('away', None, 'jump'),
+        ('toward', None, 'dash'),
+        ('away', None, 'dash'),
+        ('toward', 'up', 'dash'),
+    ]
+
+
+class _Body:
+    __slots__ = ('x', 'y', 'vx', 'vy', 'facing', 'dash_time', 'dash_y', 'w', 'h')
+
+    def __init__(self, goose: Goose):
+        """
+        A cheap copy of the movement state of a `Goose`, enough to predict where it will be
+        """
+        self.x, self.y = float(goose.pos[0]), float(goose.pos[1])
+        self.vx, self.vy = float(goose.vel[0]), float(goose.vel[1])
+        self.facing = _GooseSettings.ORIENTATION[goose.facing]
+        self.dash_time = goose.dash_time
+        self.dash_y = goose.dash_y
+        self.w, self.h = goose.drawbox.size
+
+    def step(self, horizontal: int, dt: float, width: float, can_move: bool = True):
+        """
+        Mirror of the movement part of `Goose.update`, `horizontal` is -1 (left), 0 or 1 (right)
+        """
+        if self.dash_time > 0:
+            self.dash_time = max(self.dash_time - dt, 0)
+            t = min(self.dash_time / _GooseSettings.DASH_TIME, 1)
+            speed = _GooseSettings.DASH_SPEED * (1 + t) / 2
+            norm = math.hypot(self.facing, self.dash_y)
+            self.vx = speed * self.facing / norm
+            self.vy = speed * self.dash_y / norm
+        elif can_move and horizontal:
+            self.facing = horizontal
+            self.vx = min(max(self.vx + horizontal * _GooseSettings.ACCELERATION * dt, -_GooseSettings.SPEED), _GooseSettings.SPEED)
+        else:
+            sign = math.copysign(1, self.vx)
+            self.vx -= sign * _GooseSettings.ACCELERATION * dt
+            if sign * self.vx <= 0:
+                self.vx = 0
+
+        self.x = min(max(self.x + self.vx * dt, 0), width)
+        self.y += self.vy * dt
+        if self.y >= _GooseSettings.GROUND_LEVEL:
+            self.y = _GooseSettings.GROUND_LEVEL
+            self.vy = 0
+        else:
+            self.vy += _GooseSettings.GRAVITY * dt
+
+    def rect(self) -> pg.Rect:
+        rect = pg.Rect(0, 0, self.w, self.h)
+        rect.centerx = self.x
+        rect.bottom = self.y
+        return rect
+
+
+def _anchor_attack(attack_rect: pg.Rect, goose_rect: pg.Rect, attack_id: int, facing: int):
+    """
+    Position an attack hitbox relative to its goose, same rules as `Attack.animate`
+    """
+    anchor = _registry.attack_anchor[attack_id]
+    if anchor == ANCHOR_TOP:
+        attack_rect.center = (goose_rect.centerx, goose_rect.top)
+    elif anchor == ANCHOR_SIDE:
+        attack_rect.center = (goose_rect.left if facing < 0 else goose_rect.right, goose_rect.centery)
+    elif anchor == ANCHOR_CENTER:
+        attack_rect.center = goose_rect.center
+    else:
+        attack_rect.center = (goose_rect.centerx, goose_rect.bottom)
+
+
+class CPUController(Controller):
+    def __init__(self, seed: int | None = None, budget_us: float = 1000, attack_assets: dict | None = None, width: float = 1280):
+        """
+        A CPU opponent which searches over short plans (hold a direction, optionally press an action)
+        by looking ahead with cheap copies of both geese. The search deepens its look ahead until its
+        time budget runs out and then commits to the best plan of the deepest finished horizon.
+
+        * `budget_us`: the thinking time per frame, in microseconds
+
+        * `attack_assets`: used to size attack hitboxes, the goose's own size is used when `None`
+
+        * `width`: the width of the stage
+        """
+        super().__init__(seed)
+        self.budget_us = budget_us
+        self.attack_assets = attack_assets if attack_assets is not None else {}
+        self.width = width
+
+        self.reset_stats()
+        self.depth = 0
+        # running estimate of the cost of one look ahead frame, so that evaluations are not started past the deadline
+        self.frame_ns = 10000
+
+    def reset_stats(self):
+        self.decisions = 0
+        self.total_ns = 0
+        self.worst_ns = 0
+
+    def _attack_size(self, goose: Goose, attack_id: int) -> tuple[int, int]:
+        frames = self.attack_assets.get(goose.major, {}).get(_registry.attack_types[attack_id], {}).get(goose.facing)
+        if frames:
+            return frames[0].get_size()
+        return goose.drawbox.size
+
+    def _attack_time(self, goose: Goose, attack_id: int) -> float:
+        return _registry.attack_frames[goose.major_id, attack_id] / _GooseSettings.FPS
+
+    def _threat(self, rival: Goose) -> tuple[pg.Rect, float] | None:
+        """
+        The rival's attack hitbox relative to the rival, and how long it stays dangerous
+        """
+        attack = rival.attack
+        if not attack.active or not attack.dangerous or attack.drawbox is None:
+            return None
+        time_left = self._attack_time(rival, attack.attack_id) - attack.frame_index / _GooseSettings.FPS
+        return attack.drawbox.move(-rival.drawbox.centerx, -rival.drawbox.bottom), time_left
+
+    def _evaluate(self, goose: Goose, rival: Goose, plan: tuple, horizon: int, threat) -> float:
+        horizontal, vertical, action = plan
+        toward = 1 if rival.pos[0] >= goose.pos[0] else -1
+        direction = dict(toward=toward, away=-toward).get(horizontal, 0)
+        me = _Body(goose)
+        other = _Body(rival)
+        other_direction = rival.direction_inputs['right'] - rival.direction_inputs['left']
+
+        # start the plan
+        attack_id, attack_time, attack_rect = -1, 0, None
+        if action == 'jump':
+            me.vy = _GooseSettings.JUMP_SPEED
+        elif action == 'dash':
+            me.facing = direction or me.facing
+            me.dash_time = _GooseSettings.DASH_TIME
+            me.dash_y = int(vertical == 'down') - int(vertical == 'up')
+        elif action == 'light_attack':
+            if direction:
+                me.facing = direction
+            attack_direction = 'n' if vertical == 'up' else 'd' if vertical == 'down' else 's' if direction else 'n'
+            attack_id = _registry.get_attack(ATTACK_DIRECTIONS.index(attack_direction), me.y < _GooseSettings.GROUND_LEVEL)
+            attack_time = self._attack_time(goose, attack_id)
+            attack_rect = pg.Rect((0, 0), self._attack_size(goose, attack_id))
+
+        score = 0
+        hit, was_hit = False, False
+        for frame in range(horizon):
+            t = frame * _Settings.LOOK_AHEAD_DT
+            attacking = attack_id >= 0 and t < attack_time
+            me.step(direction, _Settings.LOOK_AHEAD_DT, self.width, can_move=not attacking or _registry.attack_is_air[attack_id])
+            other.step(other_direction, _Settings.LOOK_AHEAD_DT, self.width)
+            my_rect = me.rect()
+            other_rect = other.rect()
+
+            # landing our attack, the rival is invincible while dashing
+            if attacking and not hit and other.dash_time <= 0:
+                _anchor_attack(attack_rect, my_rect, attack_id, me.facing)
+                if attack_rect.colliderect(other_rect):
+                    hit = True
+                    score += _Settings.HIT_REWARD / (1 + t)
+
+            # getting hit by the rival's attack
+            if threat is not None and not was_hit and t < threat[1] and me.dash_time <= 0:
+                if threat[0].move(other_rect.centerx, other_rect.bottom).colliderect(my_rect):
+                    was_hit = True
+                    score -= _Settings.HIT_REWARD / (1 + t)
+
+        # stay close to the rival
+        score -= _Settings.DISTANCE_PENALTY * abs(abs(other.x - me.x) - _Settings.PREFERRED_RANGE) / self.width
+        return score
+
+    def _is_available(self, goose: Goose, plan: tuple) -> bool:
+        action = plan[2]
+        if action is None:
+            return True
+        if goose.stunned_time > 0:
+            return False
+        if action == 'light_attack':
+            return not goose.attack.active and goose.attack.cooldown <= 0
+        if action == 'dash':
+            return not goose.attack.active and goose.dash_time <= 0
+        if action == 'jump':
+            return not goose.attack.active and goose.pos[1] >= _GooseSettings.GROUND_LEVEL
+        return True
+
+    def search(self, goose: Goose, rival: Goose) -> tuple:
+        """
+        Anytime search over `PLANS`, returns the best plan found before the budget ran out
+        """
+        deadline = time.perf_counter_ns() + int(self.budget_us * 1000)
+        plans = [plan for plan in _Settings.PLANS if self._is_available(goose, plan)]
+        threat = self._threat(rival)
+
+        best_plan = plans[0]
+        self.depth = 0
+        for horizon in _Settings.HORIZONS:
+            horizon_best, horizon_score = None, -np.inf
+            for plan in plans:
+                now = time.perf_counter_ns()
+                if now + self.frame_ns * horizon >= deadline:
+                    # out of time, use the deepest finished horizon (or whatever was found so far)
+                    if self.depth == 0 and horizon_best is not None:
+                        best_plan = horizon_best
+                    return best_plan
+                # break ties randomly
+                score = self._evaluate(goose, rival, plan, horizon, threat) + 1e-6 * self.rng.random()
+                self.frame_ns = 0.9 * self.frame_ns + 0.1 * (time.perf_counter_ns() - now) / horizon
+                if score > horizon_score:
+                    horizon_best, horizon_score = plan, score
+            best_plan = horizon_best
+            self.depth = horizon
+        return best_plan
+
+    def act(self, goose: Goose, rival: Goose, dt: float):
+        if goose.drawbox is None or rival.drawbox is None:
+            return
+        start = time.perf_counter_ns()
+
+        horizontal, vertical, action = self.search(goose, rival)
+        toward = 'right' if rival.pos[0] >= goose.pos[0] else 'left'
+        away = 'left' if toward == 'right' else 'right'
+        self.hold(goose, horizontal=dict(toward=toward, away=away).get(horizontal), vertical=vertical)
+        if action is not None:
+            self.press(goose, action)
+
+        cost = time.perf_counter_ns() - start
+        self.decisions += 1
+        self.total_ns += cost
+        self.worst_ns = max(self.worst_ns, cost)
+
+    def stats(self) -> dict[str, float]:
+        """
+        The average and worst case decision cost in microseconds, and the last horizon searched
+        """
+        return dict(
+            average_us=self.total_ns / max(self.decisions, 1) / 1000,
+            worst_us=self.worst_ns / 1000,
+            depth=self.depth,
+        )
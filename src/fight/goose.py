@@ -1,9 +1,28 @@
 import pygame as pg
 import numpy as np
-import json
 
-from .vfx import Boom, Sparks, Bolt, DustCloud
+from .vfx import ParticlePool, Boom, Sparks, Bolt, DustCloud
 from ..util.math_util import lerp
+from ..util.registry import (
+    get_registry,
+    ANCHOR_TOP,
+    ANCHOR_SIDE,
+    ANCHOR_CENTER,
+    ATTACK_DIRECTIONS,
+)
+
+
+_registry = get_registry()
+
+# animation ids used by the simulation
+_IDLE = _registry.animation_ids['idle']
+_MOVE = _registry.animation_ids['move']
+_DASH = _registry.animation_ids['dash']
+_JUMP = _registry.animation_ids['jump']
+_FALL = _registry.animation_ids['fall']
+
+# attack direction indices
+_N, _S, _D = (ATTACK_DIRECTIONS.index(direction) for direction in ('n', 's', 'd'))
 
 
 class _Settings:
@@ -24,14 +43,6 @@ class _Settings:
 
     HIT_DELAY = 0.1
 
-    DAMAGE = {}
-    with open('./assets/attacks/damages.json', 'r') as f:
-        DAMAGE = json.load(f)
-
-    KNOCKBACK = {}
-    with open('./assets/attacks/knockbacks.json', 'r') as f:
-        KNOCKBACK = json.load(f)
-
 
 class Attack:
     def __init__(self):
@@ -49,21 +60,21 @@ class Attack:
     def _setup_animation(self): 
         # render data
         self.orientation = 0
-        self.attack_type = None
+        self.attack_id = -1
         self.sprite = None
         self.drawbox = None
 
         # animation
         self.frame_index = 0
     
-    def create_new_attack(self, orientation: str, attack_type: str):
+    def create_new_attack(self, orientation: str, attack_id: int):
         # set to active and dangerous
         self.active = True
         self.dangerous = True
 
         # update data
         self.orientation = orientation
-        self.attack_type = attack_type
+        self.attack_id = attack_id
 
         # reset animatino
         self.frame_index = 0
@@ -73,10 +84,7 @@ class Attack:
             # animate
             self.frame_index += dt * _Settings.FPS
             attack_animations = attack_assets.get(goose.major, None)
-            if attack_animations is None:
-                animation_length = 5
-            else:
-                animation_length = len(attack_animations[self.attack_type][goose.facing])
+            animation_length = _registry.attack_frames[goose.major_id, self.attack_id]
 
             # once animation is done, the attack ends
             if self.frame_index >= animation_length:
@@ -87,16 +95,17 @@ class Attack:
             # get the sprite
             if self.active:
                 if attack_animations is not None:
-                    self.sprite = attack_animations[self.attack_type][goose.facing][int(self.frame_index)]
+                    self.sprite = attack_animations[_registry.attack_types[self.attack_id]][goose.facing][int(self.frame_index)]
                 
                     # get drawbox
                     self.drawbox = self.sprite.get_rect()
-                    if self.attack_type[0] == 'n':
+                    anchor = _registry.attack_anchor[self.attack_id]
+                    if anchor == ANCHOR_TOP:
                         self.drawbox.center = (
                             goose.drawbox.centerx,
                             goose.drawbox.top
                         )
-                    elif self.attack_type[0] == 's':
+                    elif anchor == ANCHOR_SIDE:
                         if goose.facing == 'left':
                             self.drawbox.center = (
                                 goose.drawbox.left,
@@ -107,14 +116,13 @@ class Attack:
                                 goose.drawbox.right,
                                 goose.drawbox.centery
                             )
+                    elif anchor == ANCHOR_CENTER:
+                        self.drawbox.center = goose.drawbox.center
                     else:
-                        if 'light' in self.attack_type:
-                            self.drawbox.center = goose.drawbox.center
-                        else:
-                            self.drawbox.center = (
-                                goose.drawbox.centerx,
-                                goose.drawbox.bottom
-                            )
+                        self.drawbox.center = (
+                            goose.drawbox.centerx,
+                            goose.drawbox.bottom
+                        )
                 else:
                     self.sprite = None
             else:
@@ -155,9 +163,9 @@ class Hit:
             self.hit_delay -= dt
         
             if self.hit_delay <= 0:
-                kb = _Settings.KNOCKBACK[self.hit_data['fighter_type']][self.hit_data['attack_type']]
+                kb = _registry.knockback[self.hit_data['fighter_id'], self.hit_data['attack_id']]
                 self.fighter.knockback(2 * self.hit_data['orientation'] * kb, - kb)
-                self.fighter.gpa -= _Settings.DAMAGE[self.hit_data['fighter_type']][self.hit_data['attack_type']]
+                self.fighter.gpa -= _registry.damage[self.hit_data['fighter_id'], self.hit_data['attack_id']]
                 hit_origin : np.ndarray = self.hit_data['hit_origin']
 
                 self.was_hit = False
@@ -214,11 +222,14 @@ class Accessory:
 
 class Goose:
     def __init__(self, goose_data: dict):
+        # one particle pool for all of the goose's effects, reused across resets
+        self.vfx = ParticlePool()
         self.reset_state(goose_data)
 
     def _setup_state(self, goose_data: dict):
         # get the goose major
         self.major = goose_data['major']
+        self.major_id = _registry.major_ids.get(self.major, -1)
 
         # goose movement
         self.pos = np.array([goose_data['x'], 500])
@@ -240,7 +251,7 @@ class Goose:
         self.drawbox = None
 
         # get the animation state
-        self.action = 'idle'
+        self.action = _IDLE
         self.facing = goose_data['facing']
         self.frame_index = 0
 
@@ -248,9 +259,10 @@ class Goose:
         self.accessory = Accessory(self)
 
         # particle effects
-        self.dash_vfx = Boom()
-        self.hit_vfx = Sparks()
-        self.impact_vfx = Bolt()
+        self.vfx.clear()
+        self.dash_vfx = Boom(self.vfx)
+        self.hit_vfx = Sparks(self.vfx)
+        self.impact_vfx = Bolt(self.vfx)
 
         # self.jump_particles = DustCloud()
         # self.dash_particles = {
@@ -288,7 +300,7 @@ class Goose:
         self._setup_animation(goose_data)
         self.reset_input()
 
-    def _change_animation(self, action: str, reset: bool = False):
+    def _change_animation(self, action: int, reset: bool = False):
         # change the animation state
         if self.action != action or reset:
             self.frame_index = 0
@@ -303,32 +315,32 @@ class Goose:
     ):
         # update animation state
         if self.attack.active:
-            self._change_animation(self.attack.attack_type)
+            self._change_animation(_registry.attack_animation[self.attack.attack_id])
         elif self.dash_time > 0:
-            self._change_animation('dash')
+            self._change_animation(_DASH)
         elif self.pos[1] < _Settings.GROUND_LEVEL:
             if self.vel[1] < 0:
-                self._change_animation('jump')
+                self._change_animation(_JUMP)
             else:
-                self._change_animation('fall')
+                self._change_animation(_FALL)
         elif self.vel[0]:
-            self._change_animation('move')
+            self._change_animation(_MOVE)
         else:
-            self._change_animation('idle')
+            self._change_animation(_IDLE)
         
         # update animation
         self.frame_index += dt * _Settings.FPS
-        animation_length = len(character_assets[self.major][self.action][self.facing])
+        animation_length = _registry.animation_frames[self.major_id, self.action]
         # end of animation frames
         if self.frame_index >= animation_length:
             self.frame_index = 0
-            if self.action in ['jump', 'fall']:
+            if self.action == _JUMP or self.action == _FALL:
                 self.frame_index = animation_length - 1
-            if self.action == self.attack.attack_type:
+            if self.attack.attack_id >= 0 and self.action == _registry.attack_animation[self.attack.attack_id]:
                 self.frame_index = animation_length - 1
 
         # get sprite
-        self.sprite = character_assets[self.major][self.action][self.facing][int(self.frame_index)]
+        self.sprite = character_assets[self.major][_registry.animations[self.action]][self.facing][int(self.frame_index)]
         self.drawbox = self.sprite.get_rect()
         self.drawbox.centerx = self.pos[0]
         self.drawbox.bottom = self.pos[1]
@@ -340,9 +352,7 @@ class Goose:
         self.attack.animate(self, dt, attack_assets)
         
         # animate effects
-        self.dash_vfx.animate(dt)
-        self.hit_vfx.animate(dt)
-        self.impact_vfx.animate(dt)
+        self.vfx.animate(dt)
 
     def input(self, events: list[pg.Event], keybinds: dict[int, str]):
         for event in events:
@@ -369,26 +379,19 @@ class Goose:
         # handle attack inputs
         if not self.attack.active and self.attack.cooldown <= 0:
             if self.action_inputs['light_attack'] == 1:
-                if self.pos[1] < _Settings.GROUND_LEVEL:
-                    attack_type = 'air'
-                else:
-                    attack_type = 'light'
+                in_air = self.pos[1] < _Settings.GROUND_LEVEL
                 self.action_inputs['light_attack'] = 0
-            # elif self.action_inputs['special_attack'] == 1 and self.pos[1] >= _Settings.GROUND_LEVEL:
-            #     attack_type = 'special'
-            #     self.action_inputs['special_attack'] = 0
-            else:
-                attack_type = None
-            if attack_type is not None:
                 if self.direction_inputs['up'] == 1:
-                    attack_direction = 'n'
+                    attack_direction = _N
                 elif self.direction_inputs['down'] == 1:
-                    attack_direction = 'd'
+                    attack_direction = _D
                 elif self.direction_inputs['left'] == 1 or self.direction_inputs['right'] == 1:
-                    attack_direction = 's'
+                    attack_direction = _S
                 else:
-                    attack_direction = 'n'
-                self.attack.create_new_attack(self.facing, f'{attack_direction}_{attack_type}')
+                    attack_direction = _N
+                self.attack.create_new_attack(self.facing, _registry.get_attack(attack_direction, in_air))
+            # elif self.action_inputs['special_attack'] == 1 and self.pos[1] >= _Settings.GROUND_LEVEL:
+            #     self.action_inputs['special_attack'] = 0
 
         # handle movement inputs
         if self.action_inputs['dash'] == 1:
@@ -418,7 +421,7 @@ class Goose:
         can_change_direction = True
         if self.attack.active:
             self.dash_time = 0
-            can_move = 'air' in self.attack.attack_type # prevent movement while attacking
+            can_move = _registry.attack_is_air[self.attack.attack_id] # prevent movement while attacking
             can_change_direction = False
         
         if self.dash_time > 0: # goose is dashing
@@ -470,7 +473,7 @@ class Goose:
         # self.knockback = self.knockback - signs * _Settings.ACCELERATION * dt
         # self.knockback[signs * self.knockback <= 0] = 0
 
-    def check_collide(self, rival_goose, attack_damages: dict, attack_knockbacks):
+    def check_collide(self, rival_goose, attack_damages: np.ndarray, attack_knockbacks: np.ndarray):
         if self.dash_time > 0: # invincibility
             return False
         if not rival_goose.attack.active or not rival_goose.attack.dangerous: # no attack 
@@ -487,8 +490,9 @@ class Goose:
         # calculate collision
         collision = goose_mask.overlap(attack_mask, np.array(rival_goose.attack.drawbox.topleft) - np.array(self.drawbox.topleft))
         if collision is not None:
-            self.gpa -= attack_damages[rival_goose.major] # decrease gpa
-            self.stunned_time = attack_knockbacks[rival_goose.major]
+            attack_key = rival_goose.major_id, rival_goose.attack.attack_id
+            self.gpa -= attack_damages[attack_key] # decrease gpa
+            self.stunned_time = attack_knockbacks[attack_key]
             rival_goose.attack.dangerous = False # prevent future collisions
             angle = np.arctan2(
                 rival_goose.drawbox.centerx - self.drawbox.centerx,
@@ -507,7 +511,7 @@ class Goose:
             return True
         return False
 
-    def render(self, default: pg.Surface, gaussian_blur: pg.Surface):
+    def render(self, default: pg.Surface, gaussian_blur: pg.Surface | None = None):
         # no sprite
         if self.sprite is None:
             return
@@ -521,7 +525,6 @@ class Goose:
         # render attack
         self.attack.render(default)
 
-        # render effects
-        self.dash_vfx.render(gaussian_blur)
-        self.hit_vfx.render(gaussian_blur)
-        self.impact_vfx.render(gaussian_blur)
+        # render effects, unless they are drawn on the gpu
+        if gaussian_blur is not None:
+            self.vfx.render(gaussian_blur)
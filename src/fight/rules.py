@@ -0,0 +1,45 @@
+from .goose import Goose
+
+
+def step_fight(goose1: Goose, goose2: Goose, dt: float, width: float, assets) -> tuple[bool, bool]:
+    """
+    Advance a fight between two geese by `dt` seconds. This is the fight logic shared by the
+    `FightMenu` and the headless simulations. Returns whether each goose was hit this step.
+
+    * `assets`: any object exposing `character_assets`, `accessory_assets`, `attack_assets`,
+    `attack_damages` and `attack_knockbacks`, e.g. `Client.Assets`
+    """
+    # move
+    goose1.update(dt, width)
+    goose2.update(dt, width)
+
+    # check collisions
+    hit1 = goose1.check_collide(goose2, assets.attack_damages, assets.attack_knockbacks)
+    hit2 = goose2.check_collide(goose1, assets.attack_damages, assets.attack_knockbacks)
+
+    # animate geese
+    goose1.animate(
+        dt,
+        assets.character_assets,
+        assets.accessory_assets,
+        assets.attack_assets,
+    )
+    goose2.animate(
+        dt,
+        assets.character_assets,
+        assets.accessory_assets,
+        assets.attack_assets,
+    )
+
+    return hit1, hit2
+
+
+def get_loser(goose1: Goose, goose2: Goose) -> int | None:
+    """
+    Get the index (0 or 1) of the goose whose gpa has dropped to 0, or `None` if both are still enrolled.
+    """
+    if goose1.gpa <= 0:
+        return 0
+    if goose2.gpa <= 0:
+        return 1
+    return None
@@ -1,200 +1,331 @@
 import pygame as pg
 import numpy as np
+import copy
 
 from ..util import lerp
 
 
 class _Settings:
     EFFECT_LIFETIME = 1 / 5
+    POOL_CAPACITY = 1024
 
+    SPARK_SPEED = 1000
+    BOLT_SPEED = 100
 
-class Boom:
-    def __init__(self):
-        # data arrays
-        self.lifetime = np.zeros(0)
-        self.pos = np.zeros((0,2))
-        self.angle = np.zeros(0)
-    
-    def create_vfx(self, pos: np.ndarray, angle: np.ndarray):
-        # new data arrays
-        new_lifetime = np.full(pos.shape[0], _Settings.EFFECT_LIFETIME)
-
-        # append
-        if self.pos.size == 0:
-            self.lifetime = new_lifetime
-            self.pos = pos
-            self.angle = angle
+    # boom rings
+    RING_RADIUS = 150
+    RING_WIDTH = 10
+    RING_STEPS = 32
+    # dashes are horizontal or diagonal and rings look the same half a turn around
+    RING_ANGLE_STEP = 45
+
+    # furthest from its position each particle type is drawn: rings, spark and bolt diamonds, dust at its longest lifetime
+    PARTICLE_REACH = (RING_RADIUS, 100, 500, 100 * 2 * EFFECT_LIFETIME)
+
+
+# particle types
+BOOM = 0
+SPARK = 1
+BOLT = 2
+DUST = 3
+PARTICLE_TYPES = ('boom', 'spark', 'bolt', 'dust')
+
+
+class ParticlePool:
+    def __init__(self, capacity: int = _Settings.POOL_CAPACITY):
+        """
+        The `ParticlePool` holds the particles of every effect type in fixed capacity, contiguous arrays
+        with a type tag per particle. New particles are written into a ring buffer, so spawning and expiring
+        never allocate: a particle is alive while its lifetime is positive, and its slot is reused once the
+        ring comes back around (the oldest particles are overwritten when the pool is full).
+        """
+        self.capacity = capacity
+        # what lifetimes are measured against when effects scale over their lifetime
+        self.effect_lifetime = _Settings.EFFECT_LIFETIME
+        self.pos = np.zeros((capacity, 2))
+        self.vel = np.zeros((capacity, 2))
+        self.angle = np.zeros(capacity)
+        self.lifetime = np.zeros(capacity)
+        self.kind = np.zeros(capacity, dtype=np.int8)
+
+        # most particles of each type a single effect may spawn
+        self.caps = np.full(len(PARTICLE_TYPES), capacity)
+
+        # scratch buffers
+        self._step = np.zeros((capacity, 2))
+        self._alive = np.zeros(capacity, dtype=bool)
+
+        self.clear()
+
+    def clear(self):
+        self.lifetime.fill(0)
+        self.head = 0
+        # the longest remaining lifetime, nothing needs animating once it runs out
+        self.time_left = 0
+
+    def snapshot(self) -> 'ParticlePool':
+        """
+        A copy of the particles as they are now, to draw e.g. on another thread while this pool keeps animating
+        """
+        pool = copy.copy(self)
+        pool.pos, pool.angle, pool.lifetime, pool.kind = self.pos.copy(), self.angle.copy(), self.lifetime.copy(), self.kind.copy()
+        pool._alive = np.zeros_like(self._alive)
+        return pool
+
+    def set_caps(self, caps: dict[str, int]):
+        """
+        Limit how many particles a single effect spawns, by particle type name
+        """
+        for name, cap in caps.items():
+            self.caps[PARTICLE_TYPES.index(name)] = cap
+
+    def _write(self, dst: slice, kind: int, pos, vel, angle, lifetime: float):
+        self.pos[dst] = pos
+        self.vel[dst] = vel
+        self.angle[dst] = angle
+        self.lifetime[dst] = lifetime
+        self.kind[dst] = kind
+
+    def spawn(self, kind: int, pos, vel, angle, lifetime: float):
+        """
+        Spawn `len(angle)` particles of type `kind`, `pos` and `vel` broadcast against `(len(angle), 2)`
+        """
+        angle = np.atleast_1d(angle)
+        n = angle.shape[0]
+        if n > self.caps[kind]:
+            # keep the middle of the effect
+            cap = self.caps[kind]
+            if cap == 0:
+                return
+            keep = slice((n - cap) // 2, (n - cap) // 2 + cap)
+            pos = np.broadcast_to(pos, (n, 2))[keep]
+            vel = np.broadcast_to(vel, (n, 2))[keep]
+            angle = angle[keep]
+            n = cap
+        head = self.head
+        if head + n <= self.capacity:
+            self._write(slice(head, head + n), kind, pos, vel, angle, lifetime)
+            self.head = (head + n) % self.capacity
         else:
-            self.lifetime = np.hstack([self.lifetime, new_lifetime])
-            self.pos = np.vstack([self.pos, pos])
-            self.angle = np.hstack([self.angle, angle])
-    
+            # wrap around, keeping the newest particles if there are more than fit
+            pos = np.broadcast_to(pos, (n, 2))
+            vel = np.broadcast_to(vel, (n, 2))
+            while n > 0:
+                m = min(n, self.capacity - self.head)
+                self._write(slice(self.head, self.head + m), kind, pos[-n:][:m], vel[-n:][:m], angle[-n:][:m], lifetime)
+                self.head = (self.head + m) % self.capacity
+                n -= m
+        self.time_left = max(self.time_left, lifetime)
+
     def animate(self, dt: float):
-        if self.lifetime.size == 0:
+        if self.time_left <= 0:
             return
+        self.time_left -= dt
+
+        # move and age every slot in place, dead particles are ignored
+        np.multiply(self.vel, dt, out=self._step)
+        np.add(self.pos, self._step, out=self.pos)
+        np.subtract(self.lifetime, dt, out=self.lifetime)
+
+    def alive(self, kind: int | None = None) -> np.ndarray:
+        """
+        Indices of the live particles, of type `kind` if given
+        """
+        np.greater(self.lifetime, 0, out=self._alive)
+        if kind is not None:
+            np.logical_and(self._alive, self.kind == kind, out=self._alive)
+        return np.flatnonzero(self._alive)
+
+    @property
+    def num_alive(self) -> int:
+        if self.time_left <= 0:
+            return 0
+        return int(np.count_nonzero(self.lifetime > 0))
+
+    def bounds(self) -> pg.Rect | None:
+        """
+        The rect the live particles are drawn in, None if there are none
+        """
+        if self.time_left <= 0:
+            return None
+        indices = self.alive()
+        if indices.size == 0:
+            return None
+        reach = np.take(_Settings.PARTICLE_REACH, self.kind[indices])[:, None]
+        topleft = np.floor((self.pos[indices] - reach).min(axis=0))
+        bottomright = np.ceil((self.pos[indices] + reach).max(axis=0))
+        return pg.Rect(*topleft, *(bottomright - topleft))
 
-        # destroy vfx 
-        self.lifetime = self.lifetime - dt
-        alive = self.lifetime > 0
-        self.lifetime = self.lifetime[alive]
-        self.pos = self.pos[alive]
-        self.angle = self.angle[alive]
-        
     def render(self, gaussian_blur: pg.Surface):
-        if self.lifetime.size == 0:
+        if self.time_left <= 0:
             return
-
-        for lifetime, pos, angle in zip(self.lifetime, self.pos, self.angle):
-            r = lerp(150, 0, lifetime / _Settings.EFFECT_LIFETIME)
-            boom = pg.Surface((r, 2 * r))
-            boom.set_colorkey((0, 0, 0))
-            pg.draw.ellipse(boom, (255, 255, 255), pg.Rect(r / 4, r / 2, r / 2, r), 10)
-            boom = pg.transform.rotate(boom, -angle)
-            rect = boom.get_rect()
-            rect.center = pos
-            gaussian_blur.blit(boom, rect)
+        _render_booms(gaussian_blur, self, self.alive(BOOM))
+        _render_sparks(gaussian_blur, self, self.alive(SPARK))
+        _render_bolts(gaussian_blur, self, self.alive(BOLT))
+        _render_dust(gaussian_blur, self, self.alive(DUST))
 
 
-class Sparks:
+class RingCache:
     def __init__(self):
-        # data arrays
-        self.lifetime = np.array([])
-        self.pos = np.array([])
-        self.angle = np.array([])
+        """
+        The `RingCache` holds pre-rendered, rotated boom rings. Radii are quantized to `RING_STEPS` sizes over
+        an effect's lifetime and angles to multiples of `RING_ANGLE_STEP`, which covers every dash angle exactly
+        """
+        self.sprites: dict[tuple[int, int], pg.Surface] = {}
+        self.reset_stats()
 
-    def create_vfx(self, pos: tuple, angle: float, num_particles: int = 2):
-        # create new data arrays
-        num_sparks = 2 * num_particles + 1
-        new_lifetime = np.full(num_sparks, _Settings.EFFECT_LIFETIME)
-        new_pos = np.full((num_sparks,2), pos)
-        new_angle = np.pi / 3 * (np.random.rand(num_sparks) * 2 - 1) + angle
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0
 
-        # append
-        if self.lifetime.size == 0:
-            self.lifetime = new_lifetime
-            self.pos = new_pos
-            self.angle = new_angle
+    @staticmethod
+    def _render(step: int, angle: int) -> pg.Surface:
+        r = _Settings.RING_RADIUS * step / _Settings.RING_STEPS
+        ring = pg.Surface((r, 2 * r))
+        ring.set_colorkey((0, 0, 0))
+        pg.draw.ellipse(ring, (255, 255, 255), pg.Rect(r / 4, r / 2, r / 2, r), _Settings.RING_WIDTH)
+        ring = pg.transform.rotate(ring, -angle)
+        # rings are mostly empty, run length encoding skips it when blitting
+        ring.set_colorkey((0, 0, 0), pg.RLEACCEL)
+        return ring
+
+    def get(self, t: float, angle: float) -> pg.Surface:
+        """
+        The ring for a boom with fraction `t` of its lifetime left, at `angle` degrees
+        """
+        step = round((1 - t) * _Settings.RING_STEPS)
+        angle = (round(angle / _Settings.RING_ANGLE_STEP) * _Settings.RING_ANGLE_STEP + 90) % 180 - 90
+        key = (step, angle)
+        ring = self.sprites.get(key)
+        if ring is None:
+            self.misses += 1
+            ring = self.sprites[key] = self._render(step, angle)
         else:
-            self.lifetime = np.hstack([self.lifetime, new_lifetime])
-            self.pos = np.vstack([self.pos, new_pos])
-            self.angle = np.hstack([self.angle, new_angle])
+            self.hits += 1
+        return ring
 
-    def animate(self, dt: float):
-        if self.lifetime.size == 0:
-            return
-        # move the sparks
-        vel = 1000 * np.column_stack([np.sin(self.angle), np.cos(self.angle)])
-        self.pos = self.pos + vel * dt
-
-        # delete sparks that have exceeded their lifetime
-        self.lifetime = self.lifetime - dt
-        alive = self.lifetime > 0
-        self.lifetime = self.lifetime[alive]
-        self.pos = self.pos[alive]
-        self.angle = self.angle[alive]
+    def warmup(self):
+        """
+        Pre-render every ring
+        """
+        for step in range(_Settings.RING_STEPS + 1):
+            for angle in range(-90, 90, _Settings.RING_ANGLE_STEP):
+                if (step, angle) not in self.sprites:
+                    self.sprites[step, angle] = self._render(step, angle)
+
+
+ring_cache = RingCache()
+
+
+def _render_booms(gaussian_blur: pg.Surface, pool: ParticlePool, indices: np.ndarray):
+    if indices.size == 0:
+        return
+    t = np.clip(pool.lifetime[indices] / _Settings.EFFECT_LIFETIME, 0, 1)
+    blits = []
+    for t, (x, y), angle in zip(t.tolist(), pool.pos[indices].tolist(), pool.angle[indices].tolist()):
+        ring = ring_cache.get(t, angle)
+        w, h = ring.get_size()
+        blits.append((ring, (x - w // 2, y - h // 2)))
+    gaussian_blur.blits(blits, doreturn=False)
+
+
+def _render_diamonds(surface: pg.Surface, pool: ParticlePool, indices: np.ndarray, length: np.ndarray, width: np.ndarray):
+    """
+    Draw a diamond per particle, `length` along its angle and `width` across it, skipping those that are off screen
+    """
+    pos = pool.pos[indices]
+    w, h = surface.get_size()
+    reach = np.maximum(length, width)
+    visible = (
+        (pos[:, 0] + reach > 0) & (pos[:, 0] - reach < w) &
+        (pos[:, 1] + reach > 0) & (pos[:, 1] - reach < h)
+    )
+    if not visible.any():
+        return
+    pos, length, width, angle = pos[visible], length[visible], width[visible], pool.angle[indices][visible]
+
+    # the tip points along the angle, the sides are a quarter turn off it
+    forward = np.column_stack([np.sin(angle), np.cos(angle)])
+    side = np.column_stack([forward[:, 1], -forward[:, 0]])
+    forward *= length[:, None]
+    side *= width[:, None]
+    vertices = np.stack([pos + forward, pos + side, pos - forward, pos - side], axis=1)
+
+    draw_polygon = pg.draw.polygon
+    for diamond in vertices.tolist():
+        draw_polygon(surface, (255, 255, 255), diamond)
+
+
+def _render_sparks(gaussian_blur: pg.Surface, pool: ParticlePool, indices: np.ndarray):
+    if indices.size == 0:
+        return
+    t = pool.lifetime[indices] / _Settings.EFFECT_LIFETIME
+    _render_diamonds(gaussian_blur, pool, indices, 100 * t, 10 * t)
+
+
+def _render_bolts(gaussian_blur: pg.Surface, pool: ParticlePool, indices: np.ndarray):
+    if indices.size == 0:
+        return
+    scale = lerp(1 / 5, 1, pool.lifetime[indices] / _Settings.EFFECT_LIFETIME)
+    _render_diamonds(gaussian_blur, pool, indices, 500 * scale, 20 * scale)
+
+
+def _render_dust(effects_display: pg.Surface, pool: ParticlePool, indices: np.ndarray):
+    [pg.draw.circle(effects_display, (50,50,50), pos, lifetime * 100)
+        for pos, lifetime in zip(pool.pos[indices], pool.lifetime[indices])]
+
+
+class Boom:
+    def __init__(self, pool: ParticlePool):
+        self.pool = pool
     
-    def render(self, gaussian_blur: pg.Surface):
-        for pos, angle, lifetime in zip(self.pos, self.angle, self.lifetime):
-            # render a diamond shaped spark
-            scale = lerp(np.zeros(4), np.array([100, 10, 100, 10]), lifetime / _Settings.EFFECT_LIFETIME)
-            vertices = pos + scale.reshape(-1,1) * np.array([
-                [np.sin(angle), np.cos(angle)],
-                [np.sin(angle + np.pi / 2), np.cos(angle + np.pi / 2)],
-                [np.sin(angle + np.pi), np.cos(angle + np.pi)],
-                [np.sin(angle - np.pi / 2), np.cos(angle - np.pi / 2)]
-            ])
-            pg.draw.polygon(gaussian_blur, (255,255,255), vertices)
+    def create_vfx(self, pos: np.ndarray, angle: np.ndarray):
+        self.pool.spawn(BOOM, pos, 0, angle, _Settings.EFFECT_LIFETIME)
+
+
+class Sparks:
+    def __init__(self, pool: ParticlePool):
+        self.pool = pool
+
+    def create_vfx(self, pos: tuple, angle: float, num_particles: int = 2):
+        num_sparks = 2 * num_particles + 1
+        new_angle = np.pi / 3 * (np.random.rand(num_sparks) * 2 - 1) + angle
+        vel = _Settings.SPARK_SPEED * np.column_stack([np.sin(new_angle), np.cos(new_angle)])
+        self.pool.spawn(SPARK, pos, vel, new_angle, _Settings.EFFECT_LIFETIME)
 
 
 class Bolt:
-    def __init__(self):
-        # data arrays
-        self.lifetime = np.zeros(0)
-        self.pos = np.zeros((0,2))
-        self.angle = np.zeros(0)
+    def __init__(self, pool: ParticlePool):
+        self.pool = pool
     
     def create_vfx(self, pos: np.ndarray, angle: float):
-        # append
-        if self.lifetime.size == 0:
-            self.lifetime = np.full(1, _Settings.EFFECT_LIFETIME)
-            self.pos = np.array([pos])
-            self.angle = np.full(1, angle + np.pi / 6 * (2 * np.random.rand() - 1))
-        else:
-            self.lifetime = np.hstack([self.lifetime, _Settings.EFFECT_LIFETIME])
-            self.pos = np.vstack([self.pos, pos])
-            self.angle = np.hstack([self.angle, angle + np.pi / 6 * (2 * np.random.rand() - 1)])
-
-    def animate(self, dt: float):
-        if self.lifetime.size == 0:
-            return
-        
-        # move bolt
-        vel = 100 * np.column_stack([np.sin(self.angle), np.cos(self.angle)])
-        self.pos = self.pos + vel * dt
-
-        # destroy vfx
-        self.lifetime = self.lifetime - dt
-        alive = self.lifetime > 0
-        self.lifetime = self.lifetime[alive]
-        self.pos = self.pos[alive]
-        self.angle = self.angle[alive]
-    
-    def render(self, gaussian_blur: pg.Surface):
-        for pos, angle, lifetime in zip(self.pos, self.angle, self.lifetime):
-            scale = np.array([500, 20, 500, 20]) * lerp(1 / 5, 1, lifetime / _Settings.EFFECT_LIFETIME)
-            vertices = pos + scale.reshape(-1,1) * np.array([
-                [np.sin(angle), np.cos(angle)],
-                [np.sin(angle + np.pi / 2), np.cos(angle + np.pi / 2)],
-                [np.sin(angle + np.pi), np.cos(angle + np.pi)],
-                [np.sin(angle - np.pi / 2), np.cos(angle - np.pi / 2)]
-            ])
-            pg.draw.polygon(gaussian_blur, (255, 255, 255), vertices)
+        new_angle = angle + np.pi / 6 * (2 * np.random.rand() - 1)
+        vel = _Settings.BOLT_SPEED * np.array([np.sin(new_angle), np.cos(new_angle)])
+        self.pool.spawn(BOLT, pos, vel, new_angle, _Settings.EFFECT_LIFETIME)
 
 
 class DustCloud:
-    def __init__(self):
-        self._setup_state()
-    
-    def _setup_state(self):
-        self.pos = np.array([])
-        self.vel = np.array([])
-        self.lifetime = np.array([])
+    def __init__(self, pool: ParticlePool):
+        self.pool = pool
     
     def create_new_particles(
         self,
         x: float, y: float, ox: float,
         num_clouds: int = 5
     ):
-        new_pos = np.full((num_clouds * 2,2), [x,y])
-        new_vel = np.array([
-            *np.column_stack([
+        new_vel = np.vstack([
+            np.column_stack([
                 400 * (np.random.rand(num_clouds) * 2 - 1),
                 -50 * (np.random.rand(num_clouds))
             ]),
-            *np.column_stack([
+            np.column_stack([
                 250 * np.full(num_clouds, ox / 2) + 50 * (np.random.rand(num_clouds) * 2 - 1),
                 -200 * np.ones(num_clouds)
             ])
         ])
-        new_lifetime = np.full(num_clouds * 2, _Settings.EFFECT_LIFETIME * 2)
-
-        self.pos = np.array([*self.pos, *new_pos])
-        self.vel = np.array([*self.vel, *new_vel])
-        self.lifetime = np.array([*self.lifetime, *new_lifetime])
-    
-    def animate(self, dt: float):
-        self.lifetime = self.lifetime - dt
-        mask = self.lifetime > 0
-
-        self.pos = self.pos[mask]
-        self.vel = self.vel[mask]
-        self.lifetime = self.lifetime[mask]
-
-        self.pos = self.pos + self.vel * dt
-
-    def render(self, effects_display: pg.Surface):
-        [pg.draw.circle(effects_display, (50,50,50), pos, lifetime * 100)
-            for pos, lifetime in zip(self.pos, self.lifetime)]
-        if self.lifetime.size > 0:
-            return True
-        return False
\ No newline at end of file
+        self.pool.spawn(DUST, (x, y), new_vel, np.zeros(num_clouds * 2), _Settings.EFFECT_LIFETIME * 2)
@@ -2,37 +2,22 @@ import pygame as pg
 import numpy as np
 
 from ..util import lerp
+from ..fight import step_fight, get_loser, CPUController, ring_cache
+from ..pymgl import Camera
 
 
 class _Settings:
     TRANSITION_TIME = 0.5
 
-    def transition_out(overlay: pg.Surface, transition_time: float):
-        width, height = overlay.get_size()
-        transition_progress = 1.25 * transition_time / _Settings.TRANSITION_TIME
-        topleft = [0, 0]
-        bottomleft = [0, height]
-        topright = [transition_progress * width , 0]
-        bottomright = [transition_progress * width - 200, height]
-        points = [
-            topleft, bottomleft, bottomright, topright
-        ]
-        overlay.fill((0, 0, 0))
-        pg.draw.polygon(overlay, (10, 10, 10), points)
-
-    def transition_in(overlay: pg.Surface, transition_time: float):
-        width, height = overlay.get_size()
-        transition_progress = 1.25 * transition_time / _Settings.TRANSITION_TIME
-        topleft = [transition_progress * width, 0]
-        bottomleft = [transition_progress * width - 200, height]
-        topright = [width, 0]
-        bottomright = [width, height]
-        points = [
-            topleft, bottomleft, bottomright, topright
-        ]
-        overlay.fill((0, 0, 0))
-        pg.draw.polygon(overlay, (10, 10, 10), points)
-    
+    # uniforms of the overlay which wipe the screen on the gpu, see overlay.frag
+    def transition_out(transition_time: float) -> dict:
+        # covered from the left
+        return dict(progress=1.25 * transition_time / _Settings.TRANSITION_TIME, direction=1)
+
+    def transition_in(transition_time: float) -> dict:
+        # uncovered from the left
+        return dict(progress=1.25 * transition_time / _Settings.TRANSITION_TIME, direction=-1)
+
 
     GOLD = (255, 213, 0)
     BLACK = (10, 10, 10)
@@ -65,10 +50,16 @@ class _Settings:
         'ev3'
     ]
 
+    CPU_BUDGET_US = 1000
+
     BULLET_TIME_FACTOR = 1
     BULLET_TIME = 1
     END_FIGHT_TIME_FACTOR = 10
 
+    # camera shake on a hit, from 0 to 1, and how much further the camera zooms in on the geese in bullet time
+    HIT_SHAKE = 0.6
+    BULLET_TIME_ZOOM = 1.2
+
 
 def _get_splash(
     major: str, facing: str,
@@ -104,6 +95,10 @@ class Menu:
 
     def on_load(self, client):
         self._on_transition()
+
+    def on_unload(self, client):
+        # release what the menu keeps on the gpu, on the main thread when another menu is loaded
+        pass
     
     def update(self, client):
         # transition logic
@@ -116,23 +111,30 @@ class Menu:
                 self.transition_phase = (self.transition_phase + 1) % 4
         
         return dict()
+
+    def is_idle(self) -> bool:
+        # nothing animates, so the menu only changes on input
+        return self.transition_phase == 0
     
-    def _render_overlay(self, display: pg.Surface):
+    def _get_transition(self) -> dict | None:
         if self.transition_phase == 1: # fade out
-            _Settings.transition_out(display, self.transition_time)
+            return _Settings.transition_out(self.transition_time)
         elif self.transition_phase == 2: # "black" screen
-            display.fill(_Settings.BLACK)
+            return _Settings.transition_out(_Settings.TRANSITION_TIME)
         elif self.transition_phase == 3: # fade in
-            _Settings.transition_in(display, self.transition_time)
+            return _Settings.transition_in(self.transition_time)
+        return None
 
     def render(self, client):
-        # render overlay
-        self._render_overlay(client.displays['overlay'])
+        # wipe the screen under the overlay
+        transition = self._get_transition()
+        if transition is not None:
+            client.uniforms['overlay'] = transition
 
         # fps
-        client.font.render(
-            client.displays['overlay'],
-            f'{int(client.clock.get_fps())}',
+        client.layers['overlay'].draw(
+            client.font.render,
+            f'{int(client.clock.get_fps())} {client.quality.name} {client.frame_bytes_uploaded // 1024}kb {client.scheduler.jitter * 1000:.1f}ms jitter {int(client.scheduler.cpu * 100)}% cpu {client.scheduler.latency * 1000:.0f}ms latency',
             (10, 10),
             _Settings.LIGHT,
             20,
@@ -150,17 +152,19 @@ class StartMenu(Menu):
         self.goto = 'main'
 
     def _load_banner_data(self, font):
-        # title will fade in and out
-        self.banner = pg.Surface((self.resolution[0], 50))
-        self.banner.fill(_Settings.GRAY)
+        # title will fade in and out, drawn once onto its own layer which is faded on the gpu
+        banner = pg.Surface((self.resolution[0], 50))
+        banner.fill(_Settings.GRAY)
         font.render(
-            self.banner, 
+            banner, 
             'press anywhere to continue', 
             (self.resolution[0] / 2, 25),
             (255, 255, 255), 
             20, 
             style='center', 
         )
+        self.banner = pg.Surface(self.resolution, pg.SRCALPHA)
+        self.banner.blit(banner, (0, self.resolution[1] - 75))
 
         self.highlight = 1
         self.dim_direction = -1
@@ -189,14 +193,18 @@ class StartMenu(Menu):
 
         return super().update(client)
 
+    def is_idle(self) -> bool:
+        # the banner keeps fading in and out
+        return False
+
     def render(self, client):
-        default = client.displays['default']
+        default = client.layers['default']
         default.fill(_Settings.LIGHT)
 
         # render the logo
         default.blit(client.assets.uw_logo, np.array(self.resolution) / 2 - np.array(client.assets.uw_logo.get_size()) / 2 - np.array([0, 50]))
-        client.font.render(
-            default,
+        default.draw(
+            client.font.render,
             'the',
             (self.resolution[0] / 2, 50),
             [_Settings.BLACK, _Settings.GOLD],
@@ -204,8 +212,8 @@ class StartMenu(Menu):
             style='center',
             highlighting='101'
         )
-        client.font.render(
-            default,
+        default.draw(
+            client.font.render,
             'experience',
             (self.resolution[0] / 2, self.resolution[1] - 150),
             [_Settings.BLACK, _Settings.GOLD],
@@ -215,8 +223,8 @@ class StartMenu(Menu):
         )
         
         # render the banner
-        self.banner.set_alpha(int(self.highlight * 255))
-        default.blit(self.banner, (0, self.resolution[1] - 75))
+        client.banner = self.banner
+        client.uniforms['banner'] = dict(opacity=self.highlight)
 
         super().render(client)
 
@@ -271,18 +279,22 @@ class MainMenu(Menu):
 
         return super().update(client)
 
+    def is_idle(self) -> bool:
+        # the buttons are done fading
+        return super().is_idle() and self.training_opacity in (0, 1) and self.options_opacity in (0, 1)
+
     def render(self, client):
-        default = client.displays['default']
+        default = client.layers['default']
         default.fill(_Settings.LIGHT)
 
         # render buttons
-        pg.draw.rect(
-            default,
+        default.draw(
+            pg.draw.rect,
             lerp(_Settings.GOLD, _Settings.BLACK, self.training_opacity),
             self.training_rect
         )
-        client.font.render(
-            default,
+        default.draw(
+            client.font.render,
             'training mode',
             self.training_rect.center,
             lerp(_Settings.BLACK, _Settings.GOLD, self.training_opacity),
@@ -290,13 +302,13 @@ class MainMenu(Menu):
             style='center'
         )
 
-        pg.draw.rect(
-            default,
+        default.draw(
+            pg.draw.rect,
             lerp(_Settings.GOLD, _Settings.BLACK, self.options_opacity),
             self.options_rect
         )
-        client.font.render(
-            default,
+        default.draw(
+            client.font.render,
             'options',
             self.options_rect.center,
             lerp(_Settings.BLACK, _Settings.GOLD, self.options_opacity),
@@ -410,13 +422,17 @@ class SelectMenu(Menu):
 
         return super().update(client)
 
+    def is_idle(self) -> bool:
+        # the split screen slides in and counts down
+        return super().is_idle() and not self.show_split_screen
+
     def render(self, client):
-        default = client.displays['default']
+        default = client.layers['default']
         default.fill(_Settings.LIGHT)
 
         # title
-        client.font.render(
-            default,
+        default.draw(
+            client.font.render,
             'character select',
             (self.resolution[0] / 2, 50),
             _Settings.BLACK,
@@ -426,9 +442,9 @@ class SelectMenu(Menu):
 
         # render goose boxes and goose names
         for i, (fighter_name, box) in enumerate(zip(_Settings.FIGHTERS, self.boxes)):
-            pg.draw.rect(default, lerp(_Settings.BLACK, _Settings.GOLD, float(i == self.box_hover)), box)
-            client.font.render(
-                default,
+            default.draw(pg.draw.rect, lerp(_Settings.BLACK, _Settings.GOLD, float(i == self.box_hover)), box)
+            default.draw(
+                client.font.render,
                 fighter_name,
                 box.center,
                 lerp(_Settings.GOLD, _Settings.BLACK, float(i == self.box_hover)),
@@ -438,15 +454,15 @@ class SelectMenu(Menu):
 
         # render border around the player who is currently selecting their character
         if self.currently_selecting == 0:
-            pg.draw.rect(
-                default,
+            default.draw(
+                pg.draw.rect,
                 _Settings.GOLD,
                 pg.Rect(50, 50, self.resolution[0] / 4, self.resolution[1] - 100),
                 10
             )
         elif self.currently_selecting == 1:
-            pg.draw.rect(
-                default,
+            default.draw(
+                pg.draw.rect,
                 _Settings.GOLD,
                 pg.Rect(self.resolution[0] * 3 / 4 - 50, 50, self.resolution[0] / 4, self.resolution[1] - 100),
                 10
@@ -495,16 +511,16 @@ class SelectMenu(Menu):
         default.blit(selected_bg, rect)
         # render scroll boxes
         for i, box in enumerate(self.scroll_boxes):
-            pg.draw.rect(default, _Settings.GOLD, box)
+            default.draw(pg.draw.rect, _Settings.GOLD, box)
             angle_offset = (i + 1) * np.pi
             angles = 2 * np.pi / 3 * np.arange(3) + angle_offset
             vertices = np.array(box.center) + box.width / 3 * np.column_stack([np.cos(angles), np.sin(angles)])
-            pg.draw.polygon(default, _Settings.BLACK, vertices)
+            default.draw(pg.draw.polygon, _Settings.BLACK, vertices)
 
         # render split screen
         if self.show_split_screen:
-            pg.draw.polygon(
-                default,
+            default.draw(
+                pg.draw.polygon,
                 _Settings.BLACK,
                 -np.array([self.split_screen_offset, 0]) + np.array([
                     [0, 0],
@@ -512,8 +528,8 @@ class SelectMenu(Menu):
                     [self.resolution[0] * 3 / 4, self.resolution[1] / 2]
                 ])
             )
-            pg.draw.polygon(
-                default,
+            default.draw(
+                pg.draw.polygon,
                 _Settings.BLACK,
                 np.array([self.split_screen_offset, 0]) + np.array([
                     [self.resolution[0], 0],
@@ -539,8 +555,8 @@ class SelectMenu(Menu):
                     default.blit(goose2_accessory, accessory_drawbox)
                 
                 # render text
-                client.font.render(
-                    default,
+                default.draw(
+                    client.font.render,
                     'vs',
                     np.array(self.resolution) / 2,
                     _Settings.LIGHT,
@@ -558,6 +574,16 @@ class FightMenu(Menu):
         from ..fight import Goose
         self.goose1 = Goose(dict(major=None, x=100, facing='right'))
         self.goose2 = Goose(dict(major=None, x=self.resolution[0] - 100, facing='left'))
+
+        # cpu opponent for goose 2
+        self.cpu = CPUController(
+            budget_us=_Settings.CPU_BUDGET_US,
+            attack_assets=client.assets.attack_assets,
+            width=self.resolution[0]
+        )
+
+        # follows the geese and shakes on hits, moving the stage on the gpu
+        self.camera = Camera(self.resolution)
     
     def _reset_data(self, geese_data: list[dict], background: str):
         # countdown
@@ -565,11 +591,15 @@ class FightMenu(Menu):
 
         # loser
         self.loser = None
+        self.lose_banner = None
         self.lose_banner_opacity = 0
         self.lose_banner_delay = 0
 
         # bullet time 
         self.bullet_time = 0
+
+        # camera
+        self.camera.reset()
         
         # bg
         self.background = _Settings.BACKGROUNDS[background]
@@ -577,13 +607,68 @@ class FightMenu(Menu):
         # player entities
         self.goose1.reset_state(geese_data[0])
         self.goose2.reset_state(geese_data[1])
+        self.cpu.reset_stats()
+        ring_cache.reset_stats()
 
     def on_load(self, client):
         super().on_load(client)
 
+        # pre-render the dash rings before the fight starts
+        ring_cache.warmup()
         self._reset_data(**client.get_fight_data())
 
+        # keep the fight's sprites on the gpu, or at least its background
+        if client.gpu_sprites:
+            sprite_batch = client.graphics_engine.sprite_batch
+            sprite_batch.clear_atlas()
+            sprite_batch.preload(self._get_sprites(client.assets))
+        else:
+            background = client.assets.backgrounds[self.background]
+            pixel_layer = client.graphics_engine.pixel_layer
+            if pixel_layer is not None:
+                pixel_layer.clear_cache()
+                pixel_layer.preload(self._get_sprites(client.assets))
+                background = pixel_layer.get_native(background)
+            client.graphics_engine.set_background(background)
+        if client.broadcaster is not None:
+            client.broadcaster.on_match_start(
+                (self.goose1.major_id, self.goose2.major_id),
+                _Settings.BACKGROUNDS.index(self.background)
+            )
+
+    def on_unload(self, client):
+        # the stage is not drawn outside of fights
+        client.graphics_engine.set_background(None)
+
+    def _get_sprites(self, assets):
+        # every frame the background and the two geese can draw
+        yield assets.backgrounds[self.background]
+        for goose in (self.goose1, self.goose2):
+            for animations in (assets.character_assets.get(goose.major, {}), assets.attack_assets.get(goose.major, {})):
+                for frames in animations.values():
+                    yield from frames['right']
+                    yield from frames['left']
+            yield from assets.accessory_assets.get(goose.major, {}).values()
+
+    def _load_lose_banner(self, font):
+        # drawn once onto its own layer which is faded on the gpu
+        banner = pg.Surface((self.resolution[0], 200))
+        banner.fill((0,0,0))
+        font.render(
+            banner,
+            f'{self.loser} expelled',
+            (self.resolution[0] / 2, banner.get_height() / 2),
+            _Settings.GOLD,
+            50,
+            style='center'
+        )
+        self.lose_banner = pg.Surface(self.resolution, pg.SRCALPHA)
+        self.lose_banner.blit(banner, (0, self.resolution[1] / 2 - banner.get_height() / 2))
+
     def update(self, client):
+        # the camera moves in real time, also in bullet time
+        dt = client.dt
+
         if self.loser is not None: # show loser
             self.goose1.reset_input()
             self.goose2.reset_input()
@@ -598,6 +683,7 @@ class FightMenu(Menu):
         else: # input
             self.goose1.input(client.events, client.assets.keybinds[0])
             # self.goose2.input(events, kwargs['assets'].keybinds[1]) 
+            self.cpu.act(self.goose2, self.goose1, client.dt)
 
         # bullet time
         if self.loser is not None and self.transition_phase == 0:
@@ -606,48 +692,71 @@ class FightMenu(Menu):
             self.bullet_time -= client.dt
             client.dt /= _Settings.BULLET_TIME_FACTOR
 
-        # check colisions
-        self.goose1.update(client.dt, self.resolution[0]) 
-        self.goose2.update(client.dt, self.resolution[0])
-        hit1 = self.goose1.check_collide(self.goose2, client.assets.attack_damages, client.assets.attack_knockbacks)
-        hit2 = self.goose2.check_collide(self.goose1, client.assets.attack_damages, client.assets.attack_knockbacks)
+        # stream the inputs going into this frame
+        if client.broadcaster is not None:
+            client.broadcaster.on_frame(self.goose1, self.goose2, client.dt)
+
+        # particle caps for the current quality level
+        self.goose1.vfx.set_caps(client.quality.settings['particle_caps'])
+        self.goose2.vfx.set_caps(client.quality.settings['particle_caps'])
+
+        # check colisions and animate geese
+        hit1, hit2 = step_fight(self.goose1, self.goose2, client.dt, self.resolution[0], client.assets)
 
         # enter bullet time
         if hit1 or hit2:
             self.bullet_time = _Settings.BULLET_TIME
-        
-        # animate geese
-        self.goose1.animate(
-            client.dt,
-            client.assets.character_assets, 
-            client.assets.accessory_assets,
-            client.assets.attack_assets,
-        )
-        self.goose2.animate(
-            client.dt, 
-            client.assets.character_assets,
-            client.assets.accessory_assets,
-            client.assets.attack_assets,
+            self.camera.shake(_Settings.HIT_SHAKE)
+
+        # follow the geese, closer in bullet time
+        slow = self.bullet_time > 0 or self.loser is not None
+        self.camera.track(
+            [self.goose1.drawbox.center, self.goose2.drawbox.center],
+            zoom=_Settings.BULLET_TIME_ZOOM if slow else 1
         )
+        self.camera.update(dt)
         
         # check winner
-        if self.goose1.gpa <= 0 and self.loser is None:
-            self.loser = 'goose 1'
-        if self.goose2.gpa <= 0 and self.loser is None:
-            self.loser = 'goose 2'
+        loser = get_loser(self.goose1, self.goose2)
+        if loser is not None and self.loser is None:
+            self.loser = f'goose {loser + 1}'
 
         return super().update(client)
+
+    def is_idle(self) -> bool:
+        return False
     
     def render(self, client):
-        default = client.displays['default']
-        gaussian_blur = client.displays['gaussian_blur']
-
-        # render bg
-        default.blit(client.assets.backgrounds[self.background], (0, 0))
+        default = client.layers['default']
+        hud = client.layers['hud']
+        gaussian_blur = client.layers['gaussian_blur']
+
+        # hand the particles to the gpu
+        if client.gpu_particles:
+            client.particle_pools = [self.goose1.vfx, self.goose2.vfx]
+            gaussian_blur = None
+
+        # draw the sprites on the gpu, the hud stays on top of them
+        if client.gpu_sprites:
+            client.sprite_batch = default = client.graphics_engine.sprite_batch
+            default.blit(client.assets.backgrounds[self.background], (0, 0))
+        else:
+            # the background is already on the gpu, the sprites go on a transparent layer over it
+            client.draw_background = True
+            # at half the resolution
+            if client.graphics_engine.pixel_layer is not None:
+                client.pixel_layer = client.graphics_engine.pixel_layer
+                default = client.layers['foreground']
+                default.fill((0, 0, 0, 0))
 
         # render geese
-        self.goose1.render(default, gaussian_blur) 
-        self.goose2.render(default, gaussian_blur)
+        self.goose1.render(default) 
+        self.goose2.render(default)
+
+        # render effects, unless they are drawn on the gpu
+        if gaussian_blur is not None:
+            gaussian_blur.draw(self.goose1.vfx.render)
+            gaussian_blur.draw(self.goose2.vfx.render)
 
         # render gpa
         font_size = 30
@@ -655,9 +764,9 @@ class FightMenu(Menu):
         padding = 10
         text = f'gpa {round(self.goose1.gpa, 2)}'
         rect = pg.Rect(margin, margin, 2 * padding + client.font.text_width(text, font_size), 2 * padding + client.font.char_height(font_size))
-        pg.draw.rect(default, _Settings.LIGHT, rect)
-        client.font.render(
-            default, 
+        hud.draw(pg.draw.rect, _Settings.LIGHT, rect)
+        hud.draw(
+            client.font.render,
             text, 
             rect.center,
             [_Settings.BLACK, lerp(np.array([255,0,0]), np.array([0,255,0]), self.goose1.gpa / 4)],
@@ -668,9 +777,9 @@ class FightMenu(Menu):
         text = f'gpa {round(self.goose2.gpa, 2)}'
         rect = pg.Rect(0, margin, 2 * padding + client.font.text_width(text, font_size), 2 * padding + client.font.char_height(font_size))
         rect.right = self.resolution[0] - margin
-        pg.draw.rect(default, _Settings.LIGHT, rect)
-        client.font.render(
-            default,
+        hud.draw(pg.draw.rect, _Settings.LIGHT, rect)
+        hud.draw(
+            client.font.render,
             text,
             rect.center,
             [_Settings.BLACK, lerp(np.array([255,0,0]), np.array([0,255,0]), self.goose2.gpa / 4)],
@@ -681,8 +790,8 @@ class FightMenu(Menu):
         
         # render countdown
         if self.countdown > 0:                
-            client.font.render(
-                default,
+            hud.draw(
+                client.font.render,
                 f'{int(np.ceil(self.countdown))}',
                 np.array(self.resolution) / 2,
                 (255,255,255),
@@ -690,19 +799,35 @@ class FightMenu(Menu):
                 style='center',
             )
 
+        # move the stage with the camera
+        client.camera = self.camera.get_model()
+
         # render winner
         if self.loser is not None:
-            banner = pg.Surface((self.resolution[0], 200))
-            banner.fill((0,0,0))
-            client.font.render(
-                banner,
-                f'{self.loser} expelled',
-                (self.resolution[0] / 2, banner.get_height() / 2),
-                _Settings.GOLD,
-                50,
-                style='center'
-            )
-            banner.set_alpha(self.lose_banner_opacity * 255)
-            default.blit(banner, (0, self.resolution[1] / 2 - banner.get_height() / 2))
+            if self.lose_banner is None:
+                self._load_lose_banner(client.font)
+            client.banner = self.lose_banner
+            client.uniforms['banner'] = dict(opacity=self.lose_banner_opacity)
 
         super().render(client)
+
+        # cpu decision cost
+        cpu_stats = self.cpu.stats()
+        client.layers['overlay'].draw(
+            client.font.render,
+            f'cpu {int(cpu_stats["average_us"])}us worst {int(cpu_stats["worst_us"])}us',
+            (10, 40),
+            _Settings.LIGHT,
+            10,
+            style='topleft'
+        )
+
+        # boom ring cache
+        client.layers['overlay'].draw(
+            client.font.render,
+            f'rings {ring_cache.hits} hit {ring_cache.misses} miss',
+            (10, 55),
+            _Settings.LIGHT,
+            10,
+            style='topleft'
+        )
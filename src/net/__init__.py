@@ -0,0 +1,2 @@
+from .server import SpectatorServer, Broadcaster
+from .spectator import Spectator
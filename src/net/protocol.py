@@ -0,0 +1,84 @@
+import struct
+
+from ..fight import Goose
+
+
+# message types
+MATCH = 0
+FRAME = 1
+
+# frame flags
+FLAG_GPA = 1
+FLAG_SYNC = 2
+
+# the input bitmask, held directions and pressed actions
+INPUTS = ('left', 'right', 'up', 'down', 'jump', 'light_attack', 'special_attack', 'dash')
+
+# every message is prefixed by its length
+LENGTH = struct.Struct('<H')
+MATCH_STRUCT = struct.Struct('<BBBB')
+FRAME_STRUCT = struct.Struct('<BIdBBB')
+GPA_STRUCT = struct.Struct('<ff')
+# x, y, vx, vy, gpa, dash time, dash y, stunned time, knockback angle, facing,
+# attack active, attack dangerous, attack id, attack frame, attack cooldown, action, frame
+STATE_STRUCT = struct.Struct('<fffffffffb??bffBf')
+
+
+def pack_inputs(goose: Goose) -> int:
+    bits = 0
+    for i, name in enumerate(INPUTS):
+        if goose.direction_inputs.get(name, 0) or goose.action_inputs.get(name, 0):
+            bits |= 1 << i
+    return bits
+
+
+def unpack_inputs(goose: Goose, bits: int):
+    for i, name in enumerate(INPUTS):
+        value = (bits >> i) & 1
+        if name in goose.direction_inputs:
+            goose.direction_inputs[name] = value
+        else:
+            goose.action_inputs[name] = value
+
+
+def pack_state(goose: Goose) -> bytes:
+    attack = goose.attack
+    return STATE_STRUCT.pack(
+        goose.pos[0], goose.pos[1], goose.vel[0], goose.vel[1], goose.gpa,
+        goose.dash_time, goose.dash_y, goose.stunned_time, goose.knockback_angle,
+        1 if goose.facing == 'right' else -1,
+        attack.active, attack.dangerous, attack.attack_id, attack.frame_index, attack.cooldown,
+        goose.action, goose.frame_index,
+    )
+
+
+def unpack_state(goose: Goose, data: bytes, offset: int = 0):
+    (
+        x, y, vx, vy, goose.gpa,
+        goose.dash_time, dash_y, goose.stunned_time, goose.knockback_angle,
+        facing,
+        goose.attack.active, goose.attack.dangerous, goose.attack.attack_id, goose.attack.frame_index, goose.attack.cooldown,
+        goose.action, goose.frame_index,
+    ) = STATE_STRUCT.unpack_from(data, offset)
+    goose.pos[:] = (x, y)
+    goose.vel[:] = (vx, vy)
+    goose.dash_y = int(dash_y)
+    goose.facing = 'right' if facing > 0 else 'left'
+
+
+def encode_match(major_ids: tuple[int, int], background: int) -> bytes:
+    return MATCH_STRUCT.pack(MATCH, *major_ids, background)
+
+
+def encode_frame(frame: int, dt: float, goose1: Goose, goose2: Goose, gpa: bool, sync: bool) -> bytes:
+    """
+    Encode the inputs of both geese going into a frame. The state delta carries the gpas when
+    they changed and the full state of both geese when `sync` is set.
+    """
+    flags = (FLAG_GPA if gpa else 0) | (FLAG_SYNC if sync else 0)
+    message = FRAME_STRUCT.pack(FRAME, frame, dt, pack_inputs(goose1), pack_inputs(goose2), flags)
+    if sync:
+        return message + pack_state(goose1) + pack_state(goose2)
+    if gpa:
+        return message + GPA_STRUCT.pack(goose1.gpa, goose2.gpa)
+    return message
@@ -0,0 +1,147 @@
+import collections
+import threading
+import asyncio
+
+from .protocol import LENGTH, encode_match, encode_frame
+from ..fight import Goose
+
+
+class _Settings:
+    # spectators that fall this far behind are dropped
+    MAX_BUFFER = 1 << 16
+    # full state every `SYNC_INTERVAL` frames so that late spectators can join and drift is corrected
+    SYNC_INTERVAL = 60
+    # queued messages are sent out this often, the game thread never wakes the event loop
+    FLUSH_INTERVAL = 1 / 60
+
+
+class SpectatorServer:
+    def __init__(self, host: str = '0.0.0.0', port: int = 7777):
+        """
+        The `SpectatorServer` streams messages to any number of spectators over TCP. It runs an asyncio
+        event loop on a daemon thread so that `publish`, called from `Client.run`, never blocks: messages
+        are queued and the event loop sends them out in batches every `FLUSH_INTERVAL` seconds.
+        """
+        self.host = host
+        self.port = port
+        self.loop : asyncio.AbstractEventLoop = None
+        self.thread : threading.Thread = None
+        self.writers : set[asyncio.StreamWriter] = set()
+        self.queue : collections.deque[bytes] = collections.deque()
+        self.running = False
+        # sent to spectators as they join
+        self.match_message : bytes = None
+
+        # stats
+        self.bytes_sent = 0
+        self.messages_sent = 0
+
+    def start(self):
+        """
+        Start serving on a background thread, returns once the server is listening
+        """
+        started = threading.Event()
+        self.thread = threading.Thread(target=self._run, args=(started,), daemon=True)
+        self.thread.start()
+        started.wait()
+
+    def _run(self, started: threading.Event):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.server = self.loop.run_until_complete(
+            asyncio.start_server(self._on_connect, self.host, self.port)
+        )
+        # the actual port when listening on port 0
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.running = True
+        flush = self.loop.create_task(self._flush())
+        started.set()
+        self.loop.run_forever()
+        self.running = False
+        flush.cancel()
+
+        # clean up
+        self.server.close()
+        for writer in self.writers:
+            writer.close()
+        self.loop.run_until_complete(self.server.wait_closed())
+        self.loop.close()
+
+    async def _on_connect(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        if self.match_message is not None:
+            writer.write(self.match_message)
+        self.writers.add(writer)
+        try:
+            # spectators do not talk back, wait for them to leave
+            while await reader.read(1024):
+                pass
+        except ConnectionError:
+            pass
+        finally:
+            self.writers.discard(writer)
+            writer.close()
+
+    async def _flush(self):
+        while self.running:
+            await asyncio.sleep(_Settings.FLUSH_INTERVAL)
+            if not self.queue:
+                continue
+            messages = []
+            while self.queue:
+                messages.append(self.queue.popleft())
+            self._broadcast(b''.join(messages), len(messages))
+
+    def _broadcast(self, message: bytes, num_messages: int):
+        for writer in list(self.writers):
+            if writer.is_closing() or writer.transport.get_write_buffer_size() > _Settings.MAX_BUFFER:
+                self.writers.discard(writer)
+                writer.close()
+                continue
+            writer.write(message)
+            self.bytes_sent += len(message)
+        self.messages_sent += num_messages
+
+    def publish(self, message: bytes, match: bool = False):
+        """
+        Queue a message for every spectator, thread safe and non-blocking. `match` messages are
+        also sent to spectators joining later.
+        """
+        message = LENGTH.pack(len(message)) + message
+        if match:
+            self.match_message = message
+        self.queue.append(message)
+
+    @property
+    def num_spectators(self) -> int:
+        return len(self.writers)
+
+    def stop(self):
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join()
+            self.loop = None
+
+
+class Broadcaster:
+    def __init__(self, server: SpectatorServer):
+        """
+        Turns the fight in the `FightMenu` into compact per frame input and state delta messages for a `SpectatorServer`
+        """
+        self.server = server
+        self.frame = 0
+        self.gpas = (None, None)
+
+    def on_match_start(self, major_ids: tuple[int, int], background: int):
+        self.frame = 0
+        self.gpas = (None, None)
+        self.server.publish(encode_match(major_ids, background), match=True)
+
+    def on_frame(self, goose1: Goose, goose2: Goose, dt: float):
+        """
+        Call with the inputs going into `step_fight`, before the step
+        """
+        gpas = (goose1.gpa, goose2.gpa)
+        sync = self.frame % _Settings.SYNC_INTERVAL == 0
+        self.server.publish(encode_frame(self.frame, dt, goose1, goose2, gpas != self.gpas, sync))
+        self.gpas = gpas
+        self.frame += 1
@@ -0,0 +1,98 @@
+import argparse
+import asyncio
+
+from .protocol import (
+    LENGTH,
+    MATCH, 
+    MATCH_STRUCT,
+    FRAME,
+    FRAME_STRUCT,
+    FLAG_GPA,
+    FLAG_SYNC,
+    GPA_STRUCT,
+    STATE_STRUCT,
+    unpack_inputs,
+    unpack_state,
+)
+from ..fight import Goose, step_fight
+
+
+class Spectator:
+    def __init__(self, assets, width: float = 1280):
+        """
+        A `Spectator` re-simulates the fight from the input and state deltas of a `Broadcaster`
+
+        * `assets`: a `HeadlessAssets` or `Client.Assets`, sprites are needed for collisions
+        """
+        self.assets = assets
+        self.width = width
+        self.geese = [
+            Goose(dict(major=None, x=100, facing='right')),
+            Goose(dict(major=None, x=width - 100, facing='left')),
+        ]
+        self.background = 0
+        self.frame = -1
+        # frames are only applied after a full state sync
+        self.synced = False
+
+    def on_message(self, message: bytes):
+        if message[0] == MATCH:
+            _, major1, major2, self.background = MATCH_STRUCT.unpack(message)
+            majors = self.assets.registry.majors
+            self.geese[0].reset_state(dict(major=majors[major1], x=100, facing='right'))
+            self.geese[1].reset_state(dict(major=majors[major2], x=self.width - 100, facing='left'))
+            for goose in self.geese:
+                goose.animate(0, self.assets.character_assets, self.assets.accessory_assets, self.assets.attack_assets)
+            self.synced = False
+        elif message[0] == FRAME:
+            _, self.frame, dt, inputs1, inputs2, flags = FRAME_STRUCT.unpack_from(message)
+            offset = FRAME_STRUCT.size
+            if flags & FLAG_SYNC:
+                unpack_state(self.geese[0], message, offset)
+                unpack_state(self.geese[1], message, offset + STATE_STRUCT.size)
+                self.synced = True
+            elif flags & FLAG_GPA and self.synced:
+                self.geese[0].gpa, self.geese[1].gpa = GPA_STRUCT.unpack_from(message, offset)
+            if not self.synced:
+                return
+            unpack_inputs(self.geese[0], inputs1)
+            unpack_inputs(self.geese[1], inputs2)
+            step_fight(self.geese[0], self.geese[1], dt, self.width, self.assets)
+
+    async def watch(self, host: str, port: int, on_frame=None):
+        """
+        Connect to a `SpectatorServer` and re-simulate until it closes, calling `on_frame(spectator)` after every frame
+        """
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            while True:
+                length, = LENGTH.unpack(await reader.readexactly(LENGTH.size))
+                self.on_message(await reader.readexactly(length))
+                if on_frame is not None and self.synced:
+                    on_frame(self)
+        except asyncio.IncompleteReadError:
+            pass
+        finally:
+            writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Watch a fight hosted with `python main.py --spectator-port`')
+    parser.add_argument('host', type=str)
+    parser.add_argument('port', type=int)
+    args = parser.parse_args()
+
+    from ..sim import init_headless, HeadlessAssets
+    init_headless()
+    spectator = Spectator(HeadlessAssets())
+
+    def on_frame(spectator: Spectator):
+        if spectator.frame % 60 == 0:
+            gpa1, gpa2 = spectator.geese[0].gpa, spectator.geese[1].gpa
+            print(f'frame {spectator.frame}: gpa {gpa1:.2f} - {gpa2:.2f}')
+
+    asyncio.run(spectator.watch(args.host, args.port, on_frame))
+
+
+if __name__ == '__main__':
+    main()
@@ -1 +1,5 @@
-from .graphics_engine import GraphicsEngine
\ No newline at end of file
+from .graphics_engine import GraphicsEngine
+from .sprite_batch import SpriteBatch
+from .pixel_layer import PixelLayer
+from .headless import get_headless_context
+from .camera import Camera
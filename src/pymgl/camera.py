@@ -0,0 +1,96 @@
+import numpy as np
+import glm
+
+
+class _Settings:
+    # seconds the camera takes to close half of the distance to where it is headed
+    HALF_LIFE = 0.15
+    # how far the view zooms in at most, and the pixels left around what it tracks
+    MAX_ZOOM = 1.5
+    TRACK_MARGIN = 300
+
+    # pixels and radians the view is moved and turned at most by a shake, and how quickly shakes die down and wobble
+    SHAKE_OFFSET = 16
+    SHAKE_ROLL = 0.02
+    SHAKE_DECAY = 2
+    SHAKE_FREQUENCIES = (37, 29, 23)
+
+
+class Camera:
+    def __init__(self, res: tuple[int, int]):
+        """
+        The `Camera` moves, zooms and turns the view of a stage as large as the screen. It only produces the
+        `m_model` of the layers it moves, which the `GraphicsEngine` draws them with, so following the fighters
+        or shaking never redraws or uploads a layer. The view never leaves the stage: it zooms in as far as it
+        has to for a shake or a turn not to show past the stage's edges
+
+        The `Camera` takes as input:
+
+        * `res`: the screen resolution, the size of the stage
+        """
+        self.res = np.array(res, dtype=float)
+        self.reset()
+
+    def reset(self):
+        """
+        Look at the whole stage, e.g. when a fight starts
+        """
+        self.center = self.res / 2
+        self.zoom = 1
+        self.target_center = self.res / 2
+        self.target_zoom = 1
+        # how strong the shake is, from 0 to 1, and the time it wobbles by
+        self.trauma = 0
+        self.time = 0
+
+    def track(self, points: list, zoom: float = 1):
+        """
+        Head for the middle of `points`, zoomed in as far as they fit with a margin around them, and then by `zoom`
+        """
+        points = np.array(points, dtype=float)
+        low, high = points.min(axis=0), points.max(axis=0)
+        fit = np.min(self.res / (high - low + 2 * _Settings.TRACK_MARGIN))
+        self.target_center = (low + high) / 2
+        self.target_zoom = np.clip(fit * zoom, 1, _Settings.MAX_ZOOM)
+
+    def shake(self, trauma: float):
+        """
+        Add to the shake, which is strongest at a `trauma` of 1 and dies down over time
+        """
+        self.trauma = min(self.trauma + trauma, 1)
+
+    def update(self, dt: float):
+        """
+        Move towards where the camera is headed and let the shake die down
+        """
+        follow = 1 - 0.5 ** (dt / _Settings.HALF_LIFE)
+        self.center = self.center + (self.target_center - self.center) * follow
+        self.zoom += (self.target_zoom - self.zoom) * follow
+        self.trauma = max(self.trauma - _Settings.SHAKE_DECAY * dt, 0)
+        self.time += dt
+
+    def get_model(self) -> glm.mat4:
+        """
+        The `m_model` of the layers the camera moves, which takes the view of the stage to the screen
+        """
+        # a shake grows with the square of the trauma, so small ones barely show
+        shake = self.trauma ** 2
+        x, y, roll = (np.sin(self.time * frequency + i) for i, frequency in enumerate(_Settings.SHAKE_FREQUENCIES))
+        offset = shake * _Settings.SHAKE_OFFSET * np.array([x, y])
+        roll *= shake * _Settings.SHAKE_ROLL
+
+        # zoomed in until the turned view, moved by the shake, fits on the stage, and kept on it
+        width, height = self.res
+        cos, sin = abs(np.cos(roll)), abs(np.sin(roll))
+        room = self.res - 2 * np.abs(offset)
+        zoom = max(self.zoom, (width * cos + height * sin) / room[0], (width * sin + height * cos) / room[1])
+        extent = np.array([width * cos + height * sin, width * sin + height * cos]) / zoom
+        center = np.clip(self.center, extent / 2 + np.abs(offset), self.res - extent / 2 - np.abs(offset)) + offset
+
+        # in pixels, rows run top down, then into clip space which the layers are drawn in
+        view = glm.translate(glm.vec3(width / 2, height / 2, 0))
+        view = glm.rotate(view, float(roll), glm.vec3(0, 0, 1))
+        view = glm.scale(view, glm.vec3(zoom, zoom, 1))
+        view = glm.translate(view, glm.vec3(-center[0], -center[1], 0))
+        to_clip = glm.scale(glm.translate(glm.vec3(-1, 1, 0)), glm.vec3(2 / width, -2 / height, 1))
+        return to_clip * view * glm.inverse(to_clip)
@@ -2,12 +2,49 @@ import moderngl as mgl
 import numpy as np
 import pygame as pg
 import glm
-import os
+import time
+import re
+
+from .sprite_batch import SpriteBatch
+from .pixel_layer import PixelLayer
 
 FOV = 50
 NEAR = 0.1
 FAR = 100
 
+# floats per particle instance: x, y, angle, lifetime, kind
+PARTICLE_STRIDE = 5
+
+# shaders which leave black transparent, so only the part of a layer with content has to be uploaded and drawn
+SPARSE_SHADERS = ('overlay', 'hud')
+
+# uniforms of a layer for one draw, reset to these for the draws they are not given to. `opacity` fades a layer,
+# `progress` and `direction` wipe the screen under the overlay, see overlay.frag
+UNIFORM_DEFAULTS = dict(opacity=1., progress=0., direction=1.)
+
+# spread of the glow in pixels at full resolution, that of the original 20 tap kernel whose taps were 2 pixels apart
+BLUR_SIGMA = 10
+# the blurred coverage is scaled up so thin sparks still glow
+BLUR_GAIN = 8
+
+# how a layer is combined with the layers below it when they are composited in one pass
+COMPOSITE_EFFECTS = ('opaque', 'premultiplied', 'glow', 'colorkey')
+# size in pixels of the tiles of the screen which are composited when nothing below them is opaque
+COMPOSITE_TILE = 80
+
+
+class _ShaderDict(dict):
+    """
+    Programs or vertex arrays by shader name, which compile a shader the first time it is looked up
+    """
+    def __init__(self, load):
+        super().__init__()
+        self.load = load
+
+    def __missing__(self, shader: str):
+        return self.load(shader)
+
+
 class GraphicsEngine:
     def __init__(self, ctx: mgl.Context, res: tuple[int, int], path: str):
         """
@@ -17,7 +54,8 @@ class GraphicsEngine:
 
         The `GraphicsEngine` takes as input:
 
-        * `ctx`: a moderngl context which should be created from pygame during initialization
+        * `ctx`: a moderngl context which should be created from pygame during initialization, or a standalone
+        context from `get_headless_context` which renders into an offscreen framebuffer
 
         * `res`: the screen resolution
         """
@@ -25,54 +63,101 @@ class GraphicsEngine:
         self.res = res
         self.path = path
 
-        # shader programs
-        self.programs : dict[str, mgl.Program] = {}
-        self._load_all_shaders()
+        # the pygame window, or an offscreen framebuffer when there is no window
+        self.screen = self.ctx.screen
+        if self.screen is None:
+            self.screen = self.ctx.simple_framebuffer(self.res)
+            self.screen.use()
+
+        # shader sources, read once
+        self.sources : dict[str, str] = {}
+
+        # shader programs and their vertex array objects, compiled on first use
+        self.programs : dict[str, mgl.Program] = _ShaderDict(lambda shader: self._load_shader(shader)[0])
+        self.vaos : dict[str, mgl.VertexArray] = _ShaderDict(lambda shader: self._load_shader(shader)[1])
 
         # vertex buffer objects
         self.vbo = self._get_vbo()
 
-        # vertex array objects
-        self.vaos : dict[str, mgl.VertexArray] = {}
-        self._get_all_vaos()
+        # compiled variants of shaders, by shader and defines
+        self.variants : dict[tuple, tuple[mgl.Program, mgl.VertexArray]] = {}
 
-        self.texture = None
+        # shaders to compile ahead of their first use, and the seconds spent compiling and warming them up
+        self._setup_warmup()
 
-    def _get_program(self, shader_name: str) -> mgl.Program:
-        """
-        Helper function which will load the fragment shader
-        """
-        with open(f'{self.path}/pymgl/shaders/default.vert') as file:
-            vertex_shader = file.read()
-        with open(f'{self.path}/pymgl/shaders/{shader_name}.frag') as file:
-            frag_shader = file.read()
+        # a persistent texture per layer, and the bytes and seconds spent uploading to them
+        self.layers : dict[str, mgl.Texture] = {}
+        self.bytes_uploaded = 0
+        self.upload_time = 0
 
-        program = self.ctx.program(vertex_shader=vertex_shader, fragment_shader=frag_shader)
-        program['res'].write(glm.vec2(self.res[0], self.res[1]))
-        m_model = glm.mat4()
+        # a background which stays on the gpu, none until `set_background` is called
+        self.background : mgl.Texture | None = None
+
+        # two pixel buffers per layer which uploads alternate between, off until `set_pixel_buffers` is called
+        self.pixel_buffers : dict[str, list[mgl.Buffer]] | None = None
+
+        # instanced particles
+        self._setup_particles()
+
+        # downsampled, separable gaussian blur
+        self._setup_blur()
 
-        # translate
-        pos = (0, 0, 0)
-        m_model = glm.translate(m_model, pos)
+        # layers moved by a camera, none until `set_camera` is called
+        self.models : dict[str, glm.mat4] = {}
 
-        # scale
-        scale = (1, 1, 1)
-        m_model = m_model * glm.scale(scale)
+        # sprites drawn from atlas textures
+        self.sprite_batch = SpriteBatch(self.ctx, self._read_program('sprites', 'sprites'), self.res)
+        self._write_model(self.sprite_batch.program, 'default')
 
-        # write
-        program['m_model'].write(m_model)
+        # pixel art drawn at a fraction of the resolution, off until `set_pixel_scale` is called
+        self.pixel_layer : PixelLayer | None = None
+
+        # every layer composited in one pass
+        self._setup_composition()
+
+    def _read_source(self, file_name: str) -> str:
+        """
+        Helper function to read a shader from the `shaders/` directory, each file is read once
+        """
+        if file_name not in self.sources:
+            with open(f'{self.path}/pymgl/shaders/{file_name}') as file:
+                self.sources[file_name] = file.read()
+        return self.sources[file_name]
+
+    def _read_program(self, vertex_name: str, frag_name: str, defines: dict[str, any] | None = None) -> mgl.Program:
+        """
+        Helper function which will compile a vertex and fragment shader from the `shaders/` directory,
+        replacing the values of the fragment shader's `#define`s with `defines`
+        """
+        defines = defines or {}
+        start = time.perf_counter()
+        vertex_shader = self._read_source(f'{vertex_name}.vert')
+        frag_shader = self._read_source(f'{frag_name}.frag')
+        for name, value in defines.items():
+            frag_shader = re.sub(rf'^#define {name} .*$', f'#define {name} {value}', frag_shader, flags=re.MULTILINE)
+        program = self.ctx.program(vertex_shader=vertex_shader, fragment_shader=frag_shader)
+        self.compile_time += time.perf_counter() - start
+        return program
 
+    def _get_program(self, shader_name: str, defines: dict[str, any] | None = None) -> mgl.Program:
+        """
+        Helper function which will load the fragment shader
+        """
+        program = self._read_program('default', shader_name, defines)
+        # unused uniforms are optimized out by some drivers
+        if 'res' in program:
+            program['res'].write(glm.vec2(self.res[0], self.res[1]))
+        # layers are drawn in place unless a camera moves them, see `set_camera`
+        if 'm_model' in program:
+            program['m_model'].write(glm.mat4())
         return program
 
-    def _load_all_shaders(self):
+    def _load_shader(self, shader: str) -> tuple[mgl.Program, mgl.VertexArray]:
         """
-        Helper function which loads all fragment shaders in the `shaders/` directory
+        Helper function which compiles a layer shader the first time it is used, with the `#define`s of its file
         """
-        shaders = os.listdir(f'{self.path}/pymgl/shaders')
-        for shader in shaders:
-            shader_name = shader.split('.')
-            if shader_name[1] == 'frag':
-                self.programs[shader_name[0]] = self._get_program(shader_name[0])
+        self.use_variant(shader)
+        return dict.__getitem__(self.programs, shader), dict.__getitem__(self.vaos, shader)
 
     @staticmethod
     def _get_data(
@@ -111,68 +196,814 @@ class GraphicsEngine:
         """
         Helper function that will get the vertex array object
         """
+        # shaders which work in texels do not use the texture coordinates, which are optimized out
+        if 'texcoord' not in program:
+            return self.ctx.vertex_array(program, [(self.vbo, '2f 2x4', 'vertcoord')])
         return self.ctx.vertex_array(program, [(self.vbo, '2f 2f', 'vertcoord', 'texcoord')])
 
-    def _get_all_vaos(self):
+    def _setup_warmup(self):
+        """
+        Helper function which sets up the queue of shaders compiled by `warmup` and the framebuffer they are drawn into
+        """
+        self.compile_time = 0
+        self.warmup_time = 0
+        self.warmup_queue : dict[tuple, tuple] = {}
+        self.warm : set[tuple] = set()
+        self.warmup_fbo = self.ctx.framebuffer(color_attachments=[self._get_texture((3, 3))])
+        self.warmup_textures : dict[tuple, mgl.Texture] = {}
+
+    def _setup_particles(self):
+        """
+        Helper function which creates the particle program, the per-instance buffer and the
+        framebuffer particles are drawn into before a layer shader is applied to them
+        """
+        self.particle_program = self._read_program('particles', 'particles')
+        self.particle_program['res'].write(glm.vec2(self.res[0], self.res[1]))
+        self.particle_quad = self.ctx.buffer(self._get_data([(-1, 1), (1, 1), (1, -1), (-1, -1)], [(0, 1, 2), (0, 2, 3)]))
+        self.particle_data = np.zeros((0, PARTICLE_STRIDE), dtype='f4')
+        self.particle_vbo = None
+        self.particle_vao = None
+
+        # particle framebuffers, by size
+        self.particle_fbos : dict[tuple[int, int], mgl.Framebuffer] = {}
+
+    def _setup_blur(self):
+        """
+        Helper function which sets up the ping-pong framebuffers the blur passes run in, by size
+        """
+        self.blur_fbos : dict[tuple[int, int], tuple[mgl.Framebuffer, mgl.Framebuffer]] = {}
+        self.set_blur(taps=20, scale=1 / 2)
+
+    @staticmethod
+    def _get_blur_kernel(taps: int, scale: float) -> tuple[int, np.ndarray]:
+        """
+        Helper function to get the spacing in texels and the weights of the taps of one direction of the gaussian
+        blur, for a kernel of `taps` taps 2 pixels apart at full resolution, run at `scale` of the resolution. Taps
+        are at least a texel apart, the first weight is the centre tap's
+        """
+        spacing = max(round(2 * scale), 1)
+        offsets = np.arange(int(2 * (taps - 1) * scale / spacing) + 1) * spacing
+        weights = np.exp(-offsets ** 2 / (2 * (BLUR_SIGMA * scale) ** 2))
+        return spacing, weights / (weights[0] + 2 * weights[1:].sum())
+
+    def _get_blur_fbos(self, size: tuple[int, int]) -> tuple[mgl.Framebuffer, mgl.Framebuffer]:
+        """
+        Helper function to get the two framebuffers the blur passes alternate between at the given size
+        """
+        if size not in self.blur_fbos:
+            fbos = []
+            for _ in range(2):
+                texture = self._get_texture(size)
+                fbos.append(self.ctx.framebuffer(color_attachments=[texture]))
+            self.blur_fbos[size] = tuple(fbos)
+        return self.blur_fbos[size]
+
+    def _setup_composition(self):
+        """
+        Helper function which sets up single pass composition, off until `set_composition` is called
+        """
+        self.composition : list[tuple[str, str]] | None = None
+        # texture, content and uniforms of the layers drawn this frame
+        self.frame_layers : dict[str, tuple[mgl.Texture, pg.Rect]] = {}
+        self.layer_uniforms : dict[str, dict[str, any]] = {}
+        # the rect of each sparse layer's texture which may hold content
+        self.layer_rects : dict[str, pg.Rect | None] = {}
+        # the surface each layer of `render_static` holds and its content
+        self.static_layers : dict[str, tuple[pg.Surface, pg.Rect | None]] = {}
+
+        # a quad per tile of the screen, as in the vertex buffer, of which the tiles with content are drawn
+        columns, rows = -(-self.res[0] // COMPOSITE_TILE), -(-self.res[1] // COMPOSITE_TILE)
+        corners = np.array([(0, 0), (1, 0), (1, 1), (0, 0), (1, 1), (0, 1)])
+        tiles = np.stack(np.meshgrid(np.arange(columns), np.arange(rows)), axis=-1).reshape(-1, 1, 2)
+        texcoords = np.minimum((tiles + corners) * COMPOSITE_TILE / self.res, 1)
+        self.tile_data = np.concatenate([texcoords * (2, -2) + (-1, 1), texcoords], axis=-1).astype('f4')
+        self.tile_grid = (rows, columns)
+        self.tile_vbo = self.ctx.buffer(reserve=self.tile_data.nbytes, dynamic=True)
+        self.tile_vaos : dict[int, mgl.VertexArray] = {}
+
+    def _get_texture(self, size: tuple[int, int]) -> mgl.Texture:
+        """
+        Helper function to create a layer sized texture
+        """
+        texture = self.ctx.texture(size=size, components=4)
+        texture.repeat_x = False
+        texture.repeat_y = False
+        texture.filter = (mgl.NEAREST, mgl.NEAREST)
+        return texture
+
+    def _get_particle_fbo(self, size: tuple[int, int]) -> mgl.Framebuffer:
+        """
+        Helper function to get the framebuffer particles are drawn into at the given size
+        """
+        if size not in self.particle_fbos:
+            self.particle_fbos[size] = self.ctx.framebuffer(color_attachments=[self._get_texture(size)])
+        return self.particle_fbos[size]
+
+    def _reserve_particles(self, capacity: int):
+        """
+        Helper function which grows the per-instance buffer to hold at least `capacity` particles
+        """
+        if capacity <= self.particle_data.shape[0]:
+            return
+        self.particle_data = np.zeros((capacity, PARTICLE_STRIDE), dtype='f4')
+        if self.particle_vao is not None:
+            self.particle_vao.release()
+            self.particle_vbo.release()
+        self.particle_vbo = self.ctx.buffer(reserve=self.particle_data.nbytes, dynamic=True)
+        self.particle_vao = self.ctx.vertex_array(self.particle_program, [
+            (self.particle_quad, '2f', 'vertcoord'),
+            (self.particle_vbo, '2f 1f 1f 1f/i', 'pos', 'angle', 'lifetime', 'kind'),
+        ])
+
+    def _update_texture(self, layer: str, surf: pg.Surface, rect: pg.Rect | None = None):
+        """
+        Helper function to update the texture of the quad which will be drawn to the pygame display,
+        only the part of the layer inside `rect` is uploaded if given
+        """
+        surf_size = surf.get_size()
+        texture = self.layers.get(layer)
+        if texture is None or texture.size != surf_size:
+            if texture is not None:
+                texture.release()
+            texture = self.layers[layer] = self._get_texture(surf_size)
+            texture.swizzle = 'BGRA'
+            # nothing outside `rect` has been uploaded yet
+            rect = None
+
+        start = time.perf_counter()
+        if rect is None or rect.size == surf_size:
+            self._write_texture(layer, surf.get_view('1'), surf_size[0] * surf_size[1] * 4)
+        else:
+            pixels = np.asarray(surf.get_view('2'))[rect.left:rect.right, rect.top:rect.bottom]
+            self._write_texture(layer, np.ascontiguousarray(pixels.T), rect.w * rect.h * 4, tuple(rect))
+        self.upload_time += time.perf_counter() - start
+        texture.use()
+
+    def _write_texture(self, layer: str, pixels, size: int, viewport: tuple | None = None):
+        """
+        Helper function to write `size` bytes of pixels into the texture of a layer. With pixel buffers the pixels
+        are copied into the buffer the layer did not use last frame, after orphaning it so the driver hands over
+        fresh memory instead of waiting for the GPU to be done with it, and the texture is then updated from the
+        buffer, which the driver can do without the CPU waiting on it
+        """
+        texture = self.layers[layer]
+        self.bytes_uploaded += size
+        if self.pixel_buffers is None:
+            texture.write(pixels, viewport=viewport)
+            return
+
+        if layer not in self.pixel_buffers:
+            self.pixel_buffers[layer] = [self.ctx.buffer(reserve=size, dynamic=True) for _ in range(2)]
+        buffers = self.pixel_buffers[layer]
+        buffer = buffers.pop(0)
+        buffers.append(buffer)
+        buffer.orphan(size)
+        buffer.write(pixels)
+        texture.write(buffer, viewport=viewport)
+
+    def set_pixel_buffers(self, enabled: bool):
+        """
+        Upload layers through two alternating pixel buffers per layer instead of writing straight into textures,
+        so on drivers which copy from pixel buffers asynchronously the main thread does not stall on uploads
+        """
+        if self.pixel_buffers is not None:
+            [buffer.release() for buffers in self.pixel_buffers.values() for buffer in buffers]
+        self.pixel_buffers = {} if enabled else None
+
+    def set_pixel_scale(self, scale: int):
+        """
+        Draw pixel art loaded scaled up by `scale` at its native size, to be scaled back up on the GPU with nearest
+        neighbour sampling. Sprites are kept in the atlas of `sprite_batch` at their native size, and `pixel_layer`
+        is a layer at `1 / scale` of the resolution to blit them onto instead of a full resolution layer. A scale of
+        1 turns it off
+        """
+        self.sprite_batch.set_scale(scale)
+        self.pixel_layer = PixelLayer(self.res, scale) if scale > 1 else None
+
+    @staticmethod
+    def _content_rect(surf: pg.Surface) -> pg.Rect | None:
+        """
+        Helper function to find the bounding rect of the non-black pixels of a layer, None if it is empty
+        """
+        pixels = np.asarray(surf.get_view('2'))
+        rows = np.flatnonzero(pixels.any(axis=0))
+        if rows.size == 0:
+            return None
+        columns = np.flatnonzero(pixels[:, rows[0]:rows[-1] + 1].any(axis=1))
+        return pg.Rect(columns[0], rows[0], columns[-1] - columns[0] + 1, rows[-1] - rows[0] + 1)
+
+    def _get_scissor(self, rect: pg.Rect, scale: float) -> tuple[int, int, int, int]:
+        """
+        Helper function to convert a rect of a layer into a scissor box on the screen, which starts at the bottom
+        """
+        left, right = int(rect.left / scale), int(np.ceil(rect.right / scale))
+        top, bottom = int(rect.top / scale), int(np.ceil(rect.bottom / scale))
+        return (left, self.res[1] - bottom, right - left, bottom - top)
+
+    def _get_screen_rect(self, rect: pg.Rect, surf: pg.Surface) -> pg.Rect:
+        """
+        Helper function to convert a rect of a layer, which may be smaller than the resolution, into a rect of the screen
+        """
+        left, top, width, height = self._get_scissor(rect, surf.get_width() / self.res[0])
+        return pg.Rect(left, self.res[1] - top - height, width, height)
+
+    @staticmethod
+    def _get_box(rect: pg.Rect, scale: float) -> tuple[int, int, int, int]:
+        """
+        Helper function to convert a rect of a layer into a box of texels at `scale` of the resolution, rows keep
+        their order so this is also a scissor box in a framebuffer drawn by the blur passes
+        """
+        left, right = int(rect.left * scale), int(np.ceil(rect.right * scale))
+        top, bottom = int(rect.top * scale), int(np.ceil(rect.bottom * scale))
+        return (left, top, right - left, bottom - top)
+
+    def _blur_pass(self, shader: str, source: mgl.Texture, target: mgl.Framebuffer, box: tuple, **uniforms):
+        """
+        Helper function to run one pass of the blur from a texture into a framebuffer, inside `box`. Taps land on
+        texel centres, and nearest filtering is far cheaper than linear on software renderers
+        """
+        target.use()
+        self.ctx.scissor = box
+        source.filter = (mgl.NEAREST, mgl.NEAREST)
+        source.use()
+        self.write_program_data(shader, dict(tex=0, **uniforms))
+        self.vaos[shader].render()
+        self.ctx.scissor = None
+
+    def _blur(self, source: mgl.Texture, content: pg.Rect) -> mgl.Texture:
+        """
+        Helper function to blur a full resolution texture. What is not black is downsampled into coverage, then
+        blurred horizontally and vertically between two framebuffers. Every pass only covers `content`, the rect
+        with anything in it, and how far the blur reaches. Returns the texture holding the blurred coverage
+        """
+        screen = self.ctx.fbo
+        scale = self.blur_scale
+        size = (int(self.res[0] * scale), int(self.res[1] * scale))
+        down, across = self._get_blur_fbos(size)
+        down.clear()
+        across.clear()
+
+        # the texels the upsampling filter reads around the blur are covered too
+        reach = self.blur_reach + int(np.ceil(1 / scale))
+        self._blur_pass('blur_downsample', source, down, self._get_box(content, scale))
+        self._blur_pass('gaussian_blur', down.color_attachments[0], across, self._get_box(content.inflate(2 * reach, 0), scale), texel=(1 / size[0], 0))
+        self._blur_pass('gaussian_blur', across.color_attachments[0], down, self._get_box(content.inflate(2 * reach, 2 * reach), scale), texel=(0, 1 / size[1]))
+        screen.use()
+
+        # upsampled with linear filtering
+        blurred = down.color_attachments[0]
+        blurred.filter = (mgl.LINEAR, mgl.LINEAR)
+        return blurred
+
+    def _render_blur(self, source: mgl.Texture, content: pg.Rect, layer: str, uniforms: dict[str, any] | None = None):
         """
-        Helper function that will create a vertex array object for every shader program
+        Helper function to blur a full resolution texture onto the pygame display as the opacity of a white glow,
+        or to keep the blurred coverage as the texture of `layer` when layers are composited in one pass
         """
-        for program_name in self.programs:
-            self.vaos[program_name] = self._get_vao(self.programs[program_name])
+        blurred = self._blur(source, content)
+        reach = self.blur_reach + int(np.ceil(1 / self.blur_scale))
+        glow = content.inflate(2 * reach, 2 * reach).clip(pg.Rect((0, 0), self.res))
+        if self.composition is not None:
+            self.frame_layers[layer] = (blurred, glow)
+            self.layer_uniforms[layer] = uniforms or {}
+            return
 
-    def _update_texture(self, surf_size: tuple[int, int], surf: pg.Surface):
+        if layer not in self.models:
+            self.ctx.scissor = self._get_scissor(glow, 1)
+        blurred.use()
+        self.write_layer_data('blur_composite', dict(gain=BLUR_GAIN, **(uniforms or {})))
+        self._write_model(self.programs['blur_composite'], layer)
+        self.vaos['blur_composite'].render()
+        self.ctx.scissor = None
+
+    def set_blur(self, taps: int, scale: float):
+        """
+        Set the quality of the gaussian blur. Takes as input
+
+        * `taps`, how many taps the kernel has on each side of a texel, 2 pixels apart at full resolution
+
+        * `scale`, the resolution the blur runs at relative to the screen, the inverse of a whole number
+        """
+        for shader, defines in self._get_blur_variants(taps, scale):
+            self.use_variant(shader, **defines)
+        self.blur_scale = 1 / round(1 / scale)
+        self.blur_reach = 2 * (max(taps, 1) - 1)
+
+    def _get_blur_variants(self, taps: int, scale: float) -> list[tuple[str, dict]]:
+        """
+        Helper function to get the shaders and defines of the blur passes at a quality
+        """
+        factor = round(1 / scale)
+        spacing, weights = self._get_blur_kernel(max(taps, 1), 1 / factor)
+        # the kernel is compiled in, so the tap loop is unrolled with constant weights
+        return [
+            ('blur_downsample', dict(FACTOR=factor)),
+            ('gaussian_blur', dict(TAPS=len(weights), SPACING=f'{spacing}.', WEIGHTS=', '.join(f'{weight:.6f}' for weight in weights))),
+        ]
+
+    def use_variant(self, shader: str, **defines):
+        """
+        Switch a shader to a variant compiled with different `#define` values, e.g. a smaller kernel.
+        Loop bounds have to be known at compile time to be cheap on some drivers, so this is preferred over
+        uniforms for quality settings. Variants are compiled once and kept, no defines is the original shader
+        """
+        program, vao = self._get_variant(shader, defines)
+        dict.__setitem__(self.programs, shader, program)
+        dict.__setitem__(self.vaos, shader, vao)
+
+    def _get_variant(self, shader: str, defines: dict[str, any]) -> tuple[mgl.Program, mgl.VertexArray]:
+        """
+        Helper function to get a variant of a shader, compiled the first time it is asked for
+        """
+        key = (shader, tuple(sorted(defines.items())))
+        if key not in self.variants:
+            program = self._get_program(shader, defines)
+            self.variants[key] = (program, self._get_vao(program))
+        return self.variants[key]
+
+    def queue_warmup(self, shader: str, **defines):
+        """
+        Queue a variant of a shader to be compiled by `warmup` before it is first used. `sprites` and `particles`
+        queue the programs of the sprite batch and of the particles
+        """
+        # layers are uploaded from pygame as BGRA, particles and the blur are drawn into textures of their own
+        layer, drawn = (mgl.NEAREST, 'BGRA', (3, 3)), (mgl.NEAREST, 'RGBA', (3, 3))
+        offscreen = shader in ('blur_downsample', 'gaussian_blur', 'particles')
+        if shader == 'blur_composite':
+            samplers = [((mgl.LINEAR, 'RGBA', (3, 3)),)]
+        elif shader in ('gaussian_blur', 'particles'):
+            samplers = [(drawn,)]
+        elif shader == 'sprites':
+            # atlas pages are a power of two across
+            samplers = [((mgl.NEAREST, 'RGBA', (1, 1)),)]
+        else:
+            # applied to layers and to particles
+            samplers = [(layer,), (drawn,)]
+        blend_func = (mgl.SRC_ALPHA, mgl.ONE_MINUS_SRC_ALPHA)
+        self._queue_warmup((shader, tuple(sorted(defines.items()))), [(textures, blend_func, offscreen) for textures in samplers])
+
+    def _queue_warmup(self, key: tuple, states: list[tuple]):
+        """
+        Helper function to queue a variant to be drawn by `warmup` in every one of `states`. Drivers compile a program
+        for the state it is drawn in, so a state has the textures bound in order, as a filter, a swizzle and a size
+        each, whose being a power of two matters, the blend function, blending off when it is None, and whether it
+        draws into a texture rather than onto the screen
+        """
+        if key not in self.warm and key not in self.warmup_queue:
+            self.warmup_queue[key] = states
+
+    def queue_blur_warmup(self, taps: int, scale: float):
+        """
+        Queue the blur passes at a quality, with the arguments of `set_blur`, to be compiled by `warmup`
+        """
+        for shader, defines in self._get_blur_variants(taps, scale):
+            self.queue_warmup(shader, **defines)
+
+    def queue_composite_warmup(self, layers: list[str], moved: tuple[str, ...] = ()):
+        """
+        Queue the compositor for a frame with content in `layers`, in any order, of which those in `moved` are moved
+        by a camera, to be compiled by `warmup`. Needs `set_composition`
         """
-        Helper function to update the texture of the quad which will be drawn to the pygame display
+        effects = [effect for layer, effect in self.composition if layer in layers]
+        defines = self._get_composite_defines(effects, [layer in moved for layer, _ in self.composition if layer in layers])
+        # as drawn by `composite`, the glow is upsampled with linear filtering from a framebuffer
+        textures = tuple((mgl.LINEAR, 'RGBA', (3, 3)) if effect == 'glow' else (mgl.NEAREST, 'BGRA', (3, 3)) for effect in effects)
+        blend_func = None if effects[0] == 'opaque' else (mgl.ONE, mgl.SRC_ALPHA)
+        self._queue_warmup(('compositor', tuple(sorted(defines.items()))), [(textures, blend_func, False)])
+
+    def _get_warmup_texture(self, sampler: tuple) -> mgl.Texture:
+        """
+        Helper function to get a texture with the filter, swizzle and size of `sampler` to draw a warmup with
         """
-        if not self.texture:
-            self.texture = self.ctx.texture(size=surf_size, components=4)
-            self.texture.repeat_x = False
-            self.texture.repeat_y = False
-            self.texture.filter = (mgl.NEAREST, mgl.NEAREST)
-            self.texture.swizzle = 'BGRA'
-        self.texture.write(surf.get_view('1'))
-        self.texture.use()
-    
-    # def write_program_data(self, shader: str, render_data: dict[str, any]):
-    #     for key in render_data:
-    #         self.programs[shader][key].write(render_data[key])
+        if sampler not in self.warmup_textures:
+            filter, swizzle, size = sampler
+            texture = self.warmup_textures[sampler] = self._get_texture(size)
+            texture.filter = (filter, filter)
+            texture.swizzle = swizzle
+        return self.warmup_textures[sampler]
 
-    # def write_model_data(self, shader: str, rect: pg.Rect):
-    #     width, height = self.res
-    #     m_model = glm.mat4()
+    def warmup(self, budget: float) -> bool:
+        """
+        Compile the shaders queued by `queue_warmup`, e.g. during a loading screen, until `budget` seconds have been
+        spent. Drivers often only compile a program when it is first drawn with, so each is drawn once into a
+        single pixel, of a texture or of the screen, which is left for the frame to clear. A shader is never split,
+        so at least one is compiled. Returns whether the queue is empty
+        """
+        start = time.perf_counter()
+        framebuffer = self.ctx.fbo or self.screen
+        while self.warmup_queue:
+            key = next(iter(self.warmup_queue))
+            shader, defines = key
+            for textures, blend_func, offscreen in self.warmup_queue.pop(key):
+                (self.warmup_fbo if offscreen else self.screen).use()
+                self.ctx.scissor = (0, 0, 1, 1)
+                for i, sampler in enumerate(textures):
+                    self._get_warmup_texture(sampler).use(location=i)
+                if blend_func is None:
+                    self.ctx.disable(mgl.BLEND)
+                else:
+                    self.ctx.blend_func = blend_func
 
-    #     # translate
-    #     pos = (rect.centerx/width*2-1, -(rect.centery/height*2-1), 0)
-    #     m_model = glm.translate(m_model, pos)
+                if shader == 'sprites':
+                    self.sprite_batch.vao.render(instances=1)
+                elif shader == 'particles':
+                    self._reserve_particles(1)
+                    self.particle_vao.render(instances=1)
+                else:
+                    program, vao = self._get_variant(shader, dict(defines))
+                    if shader == 'compositor':
+                        program['layers'].write(np.arange(len(textures), dtype='i4'))
+                    vao.render()
+                self.ctx.enable(mgl.BLEND)
+                self.ctx.blend_func = (mgl.SRC_ALPHA, mgl.ONE_MINUS_SRC_ALPHA)
+            # waits for the compiling draws
+            self.ctx.finish()
+            self.warm.add(key)
+            if time.perf_counter() - start >= budget:
+                break
+        self.ctx.scissor = None
+        framebuffer.use()
+        self.warmup_time += time.perf_counter() - start
+        return not self.warmup_queue
 
-    #     # scale
-    #     scale = (rect.width/width, rect.height/height, 1)
-    #     m_model = m_model * glm.scale(scale)
+    def set_composition(self, layers: list[tuple[str, str]] | None):
+        """
+        Composite layers in one pass with one shader, instead of drawing each layer onto the pygame display with its
+        own shader. `render` and `render_particles` then only update the textures of layers, sprites are still drawn
+        straight onto the pygame display, and `composite` draws the frame. Takes as input
 
-    #     # write
-    #     self.programs[shader]['m_model'].write(m_model)
+        * `layers`, the name and the effect of each layer from the bottom up, an effect is one of `COMPOSITE_EFFECTS`.
+        `None` draws each layer with its own shader again
+        """
+        self.composition = layers
+        self.frame_layers.clear()
+        self.layer_uniforms.clear()
+        if layers is None:
+            return
+        for layer, effect in layers:
+            if effect not in COMPOSITE_EFFECTS:
+                raise ValueError(f'layer {layer} has effect {effect}, not one of {COMPOSITE_EFFECTS}')
 
-    def render(self, surf: pg.Surface, shader: str='default'):
+    def write_program_data(self, shader: str, render_data: dict[str, any]):
+        """
+        Set uniforms of a shader program, uniforms the shader does not use are skipped
+        """
+        program = self.programs[shader]
+        for key in render_data:
+            if key in program:
+                program[key].value = render_data[key]
+
+    def write_layer_data(self, shader: str, uniforms: dict[str, any] | None = None):
+        """
+        Set the uniforms of a shader program for one draw of a layer, the ones of `UNIFORM_DEFAULTS` which are not
+        given are reset so they do not carry over from the last draw
+        """
+        self.write_program_data(shader, dict(UNIFORM_DEFAULTS, tex=0, **(uniforms or {})))
+
+    def set_camera(self, m_model: glm.mat4 | None, layers: tuple[str, ...] = ()):
+        """
+        Draw `layers` moved by `m_model`, e.g. the `get_model` of a `Camera`, until the next call, and every other
+        layer in place. The matrix takes a layer's quad, which covers clip space, to where it is drawn, so moving,
+        zooming and turning layers costs nothing on the CPU and never uploads them again. `None` puts every layer back.
+        Sprites of `sprite_batch` and particles are moved with the layer they are drawn in place of
+        """
+        self.models = {} if m_model is None else {layer: m_model for layer in layers}
+
+    def _write_model(self, program: mgl.Program, layer: str):
+        """
+        Helper function to set the `m_model` of a program for one draw of a layer
+        """
+        if 'm_model' in program:
+            program['m_model'].write(self.models.get(layer, glm.mat4()))
+
+    def _get_uv_model(self, layer: str) -> glm.mat3:
+        """
+        Helper function to get where a layer moved by its `m_model` is sampled from, in texture coordinates, for each
+        texture coordinate of the screen, for drawing it in one pass with the other layers
+        """
+        m_model = self.models.get(layer)
+        if m_model is None:
+            return glm.mat3()
+        # the part of `m_model` which acts on the layer's plane, and the texture coordinates of clip space
+        affine = glm.mat3(m_model[0].x, m_model[0].y, 0, m_model[1].x, m_model[1].y, 0, m_model[3].x, m_model[3].y, 1)
+        to_clip = glm.mat3(2, 0, 0, 0, -2, 0, -1, 1, 1)
+        return glm.inverse(to_clip) * glm.inverse(affine) * to_clip
+
+    def render(self, surf: pg.Surface, shader: str='default', layer: str = None, uniforms: dict[str, any] | None = None):
         """
         The render method which will be used to apply the fragment shader to the layer and render it onto the 
-        pygame display. Takes as input
+        pygame display. Each layer keeps its own texture. With a shader in `SPARSE_SHADERS` or the gaussian blur,
+        empty layers are skipped and only the part of a layer with content is uploaded and drawn. Layers smaller than
+        the resolution, like the `pixel_layer`, are scaled up to the screen with nearest neighbour sampling, which
+        the gaussian blur does not support. Takes as input
 
         * `surf`, the layer
 
         * `shader`, the name of the shader to apply
+
+        * `layer`, the name of the layer, the shader name by default
+
+        * `uniforms`, uniforms of the shader for this draw only, e.g. an `opacity` to fade the layer without touching
+        its pixels, see `UNIFORM_DEFAULTS`. A layer with a `progress` is wiped, and drawn whole even if it is sparse
         """
-        surf_size = surf.get_size()
-        self._update_texture(surf_size, surf)
-        self.programs[shader]['tex'] = 0
-        # self.write_model_data(shader, rect)
-        # self.write_program_data(shader, render_data)
+        layer = layer or shader
+        uniforms = uniforms or {}
+        self.static_layers.pop(layer, None)
+
+        if shader == 'gaussian_blur':
+            content = self._content_rect(surf)
+            if content is None:
+                return
+            # downsampling reads whole blocks of texels around the content
+            factor = round(1 / self.blur_scale)
+            self._update_texture(layer, surf, content.inflate(2 * factor, 2 * factor).clip(surf.get_rect()))
+            self._render_blur(self.layers[layer], content, layer, uniforms)
+            return
+
+        if self.composition is not None:
+            self._update_layer(surf, shader, layer, uniforms)
+            return
+
+        if shader in SPARSE_SHADERS:
+            content = self._update_sparse_texture(layer, surf)
+            if content is None and 'progress' not in uniforms:
+                return
+            # a wiped layer is drawn whole, and a moved one where the camera puts it
+            self.layers[layer].use()
+            if content is not None and 'progress' not in uniforms and layer not in self.models:
+                self.ctx.scissor = self._get_scissor(content, surf.get_width() / self.res[0])
+        else:
+            self._update_texture(layer, surf)
+
+        self.write_layer_data(shader, uniforms)
+        self._write_model(self.programs[shader], layer)
         vao = self.vaos[shader]
         vao.render()
+        self.ctx.scissor = None
+
+    def _update_sparse_texture(self, layer: str, surf: pg.Surface) -> pg.Rect | None:
+        """
+        Helper function to update the texture of a sparse layer. Only the part with content is uploaded, along with
+        clearing what the layer had last frame, so the texture is the whole layer. Returns the rect with content,
+        None if the layer is empty
+        """
+        content = self._content_rect(surf)
+        dirty = self.layer_rects.get(layer)
+        self.layer_rects[layer] = content
+        if layer not in self.layers:
+            self._update_texture(layer, surf)
+        elif content is not None or dirty is not None:
+            self._update_texture(layer, surf, dirty if content is None else content.union(dirty) if dirty else content)
+        return content
+
+    def _update_layer(self, surf: pg.Surface, shader: str, layer: str, uniforms: dict[str, any]):
+        """
+        Helper function to update the texture of a layer for single pass composition. The whole texture is sampled,
+        so what a sparse layer had last frame is cleared along with uploading what it has now
+        """
+        if shader not in SPARSE_SHADERS:
+            self._update_texture(layer, surf)
+            self.frame_layers[layer] = (self.layers[layer], pg.Rect((0, 0), self.res))
+            self.layer_uniforms[layer] = uniforms
+            return
+
+        content = self._update_sparse_texture(layer, surf)
+        if 'progress' in uniforms:
+            self.frame_layers[layer] = (self.layers[layer], pg.Rect((0, 0), self.res))
+        elif content is not None:
+            self.frame_layers[layer] = (self.layers[layer], self._get_screen_rect(content, surf))
+        self.layer_uniforms[layer] = uniforms
+
+    def render_static(self, surf: pg.Surface, shader: str = 'hud', layer: str = None, uniforms: dict[str, any] | None = None):
+        """
+        Draw a layer which does not change once drawn, e.g. a banner which only fades, with the arguments of `render`
+        and a shader in `SPARSE_SHADERS`. The layer is uploaded the first time `surf` is drawn as it and stays on the
+        GPU, so after that its pixels are neither scanned nor uploaded and fading it only sets its uniforms
+        """
+        layer = layer or shader
+        uniforms = uniforms or {}
+        if self.static_layers.get(layer, (None,))[0] is not surf:
+            self.static_layers[layer] = (surf, self._update_sparse_texture(layer, surf))
+        content = self.static_layers[layer][1]
+        if content is None:
+            return
+
+        if self.composition is not None:
+            self.frame_layers[layer] = (self.layers[layer], self._get_screen_rect(content, surf))
+            self.layer_uniforms[layer] = uniforms
+            return
+
+        self.layers[layer].use()
+        if layer not in self.models:
+            self.ctx.scissor = self._get_scissor(content, surf.get_width() / self.res[0])
+        self.write_layer_data(shader, uniforms)
+        self._write_model(self.programs[shader], layer)
+        self.vaos[shader].render()
+        self.ctx.scissor = None
+
+    def render_particles(self, pools: list, shader: str = 'gaussian_blur'):
+        """
+        Draw every particle of the given particle pools with one instanced draw call, then apply the fragment
+        shader to them and render them onto the pygame display, in place of a layer. Whole pools are uploaded
+        and expired particles are dropped on the GPU, so the CPU cost does not depend on how many are alive.
+        The gaussian blur only covers the bounding box of the live particles. Takes as input
+
+        * `pools`, the `ParticlePool`s to draw
+
+        * `shader`, the name of the shader to apply
+        """
+        # nothing alive, nothing to draw
+        bounds = [pool.bounds() for pool in pools]
+        pools = [pool for pool, rect in zip(pools, bounds) if rect is not None]
+        bounds = [rect for rect in bounds if rect is not None]
+        if not pools:
+            return
+        content = bounds[0].unionall(bounds[1:]).clip(pg.Rect((0, 0), self.res))
+        if content.w == 0 or content.h == 0:
+            return
+
+        screen = self.ctx.fbo
+        fbo = self._get_particle_fbo(self.res)
+        fbo.use()
+        fbo.clear(0, 0, 0, 0)
+
+        self._reserve_particles(sum(pool.capacity for pool in pools))
+        data = self.particle_data
+        start = 0
+        for pool in pools:
+            stop = start + pool.capacity
+            data[start:stop, 0:2] = pool.pos
+            data[start:stop, 2] = pool.angle
+            data[start:stop, 3] = pool.lifetime
+            data[start:stop, 4] = pool.kind
+            start = stop
+        self.particle_vbo.write(data[:start])
+        self.bytes_uploaded += data[:start].nbytes
+        self.particle_program['effect_lifetime'] = pools[0].effect_lifetime
+        self.particle_vao.render(instances=start)
+
+        screen.use()
+        if shader == 'gaussian_blur':
+            self._render_blur(fbo.color_attachments[0], content, shader)
+            return
+
+        fbo.color_attachments[0].use()
+        self.write_layer_data(shader)
+        self._write_model(self.programs[shader], shader)
+        self.vaos[shader].render()
+
+    def set_background(self, surf: pg.Surface | None):
+        """
+        Upload a background which does not change, e.g. the stage of a fight, into a texture which stays on the GPU
+        until the next call, so it is drawn by `render_background` without uploading it every frame. It may be
+        smaller than the resolution and is then scaled up with nearest neighbour sampling. `None` releases it
+        """
+        if self.background is not None:
+            self.background.release()
+            self.background = None
+        if surf is None:
+            return
+        self.background = self._get_texture(surf.get_size())
+        self.background.swizzle = 'BGRA'
+        self.background.write(surf.get_view('1'))
+        self.bytes_uploaded += surf.get_width() * surf.get_height() * 4
+
+    def render_background(self):
+        """
+        Draw the background of `set_background` onto the pygame display, under the layers drawn after it. When layers
+        are composited in one pass, it is the `background` layer
+        """
+        if self.background is None:
+            return
+        if self.composition is not None:
+            self.frame_layers['background'] = (self.background, pg.Rect((0, 0), self.res))
+            self.layer_uniforms['background'] = {}
+            return
+        self.background.use()
+        self.write_layer_data('default')
+        self._write_model(self.programs['default'], 'background')
+        self.vaos['default'].render()
+
+    def render_sprites(self, queued: tuple | None = None, layer: str = 'default'):
+        """
+        Draw the sprites queued in `sprite_batch` this frame, or taken from it as `queued`, onto the pygame display,
+        in place of a layer, named `layer` for `set_camera`. When layers are composited in one pass, the layers above
+        are blended over the sprites
+        """
+        self._write_model(self.sprite_batch.program, layer)
+        self.bytes_uploaded += self.sprite_batch.render(queued)
+
+    @staticmethod
+    def _get_composite_defines(effects: list[str], moved: list[bool] | None = None) -> dict[str, any]:
+        """
+        Helper function to get the defines of the compositor for layers with `effects`, from the bottom up, of which
+        those `moved` by a camera are sampled through the next of its `camera` matrices
+        """
+        moved = moved or [False] * len(effects)
+        cameras = np.cumsum(moved) - 1
+        # left out rather than skipped with a branch, which software renderers run slower than the texture reads,
+        # as is the camera of the layers it does not move
+        samples = [f'(camera[{cameras[i]}] * vec3(uvs, 1.)).xy' if moved[i] else 'uvs' for i in range(len(effects))]
+        composite = ' '.join(f'over(color, transmittance, opacity[{i}] * {effect}(texture(layers[{i}], {samples[i]}), {i}));' for i, effect in enumerate(effects))
+        return dict(NUM_LAYERS=len(effects), NUM_CAMERAS=max(sum(moved), 1), COMPOSITE=composite)
+
+    def _get_tile_vao(self, rects: list[pg.Rect]) -> tuple[mgl.VertexArray, int]:
+        """
+        Helper function to fill the tile buffer with the tiles of the screen which overlap any of `rects`, returns
+        the vertex array of the compositor for it and the number of vertices
+        """
+        covered = np.zeros(self.tile_grid, dtype=bool)
+        for rect in rects:
+            covered[rect.top // COMPOSITE_TILE:-(-rect.bottom // COMPOSITE_TILE), rect.left // COMPOSITE_TILE:-(-rect.right // COMPOSITE_TILE)] = True
+        data = self.tile_data[covered.ravel()]
+        self.tile_vbo.write(data)
+        self.bytes_uploaded += data.nbytes
+
+        program = self.programs['compositor']
+        if program.glo not in self.tile_vaos:
+            self.tile_vaos[program.glo] = self.ctx.vertex_array(program, [(self.tile_vbo, '2f 2f', 'vertcoord', 'texcoord')])
+        return self.tile_vaos[program.glo], data.shape[0] * data.shape[1]
+
+    def composite(self):
+        """
+        Draw the layers updated this frame onto the pygame display in one pass, when `set_composition` is on.
+        Each layer is bound to its own texture unit. Layers which were not drawn this frame, e.g. sprites drawn
+        straight onto the display, are left out of the shader and the frame is blended over what shows through,
+        only in the tiles of the screen with content in any layer
+        """
+        if self.composition is None:
+            return
+        layers = [(layer, effect) for layer, effect in self.composition if layer in self.frame_layers]
+        if not layers:
+            return
+        moved = [layer in self.models for layer, _ in layers]
+        self.use_variant('compositor', **self._get_composite_defines([effect for _, effect in layers], moved))
+        program = self.programs['compositor']
+        program['layers'].write(np.arange(len(layers), dtype='i4'))
+        # the uniforms each layer was drawn with, by layer
+        for name, default in UNIFORM_DEFAULTS.items():
+            if name in program:
+                program[name].write(np.array([self.layer_uniforms.get(layer, {}).get(name, default) for layer, _ in layers], dtype='f4'))
+        self.write_program_data('compositor', dict(gain=BLUR_GAIN))
+        # where each moved layer is sampled from, through its camera
+        if 'camera' in program:
+            program['camera'].write(b''.join(self._get_uv_model(layer).to_bytes() for layer, _ in layers if layer in self.models))
+        for i, (layer, _) in enumerate(layers):
+            self.frame_layers[layer][0].use(location=i)
+
+        # nothing shows through an opaque bottom layer, so there is nothing to blend
+        if layers[0][1] == 'opaque':
+            self.ctx.disable(mgl.BLEND)
+            self.vaos['compositor'].render()
+            self.ctx.enable(mgl.BLEND)
+        else:
+            # a moved layer may show anywhere
+            screen = pg.Rect((0, 0), self.res)
+            vao, vertices = self._get_tile_vao([screen if layer in self.models else self.frame_layers[layer][1] for layer, _ in layers])
+            self.ctx.blend_func = (mgl.ONE, mgl.SRC_ALPHA)
+            vao.render(vertices=vertices)
+            self.ctx.blend_func = (mgl.SRC_ALPHA, mgl.ONE_MINUS_SRC_ALPHA)
+        self.frame_layers.clear()
+        self.layer_uniforms.clear()
+
+    def read_frame(self) -> pg.Surface:
+        """
+        Read back what has been drawn onto the screen, the pygame window or the offscreen framebuffer
+        """
+        frame = pg.image.frombuffer(self.screen.read(components=3), self.screen.size, 'RGB')
+        # framebuffer rows start at the bottom
+        return pg.transform.flip(frame, False, True)
 
     def destroy(self):
         """
         Call this function on program exit to release all memory associated with the `GraphicsEngine`
         """
-        self.texture.release()
+        [texture.release() for texture in self.layers.values()]
+        self.set_background(None)
+        self.set_pixel_buffers(False)
         self.vbo.release()
-        [program.release() for program in self.programs.values()]
\ No newline at end of file
+        [vao.release() for vao in self.tile_vaos.values()]
+        self.tile_vbo.release()
+        for fbo in self.particle_fbos.values():
+            fbo.color_attachments[0].release()
+            fbo.release()
+        for fbos in self.blur_fbos.values():
+            for fbo in fbos:
+                fbo.color_attachments[0].release()
+                fbo.release()
+        self.particle_quad.release()
+        if self.particle_vao is not None:
+            self.particle_vao.release()
+            self.particle_vbo.release()
+        self.particle_program.release()
+        self.sprite_batch.release()
+        self.sprite_batch.program.release()
+        [attachment.release() for attachment in self.warmup_fbo.color_attachments]
+        self.warmup_fbo.release()
+        [texture.release() for texture in self.warmup_textures.values()]
+        for program, vao in self.variants.values():
+            vao.release()
+            program.release()
+        if self.screen is not self.ctx.screen:
+            [attachment.release() for attachment in self.screen.color_attachments]
+            self.screen.release()
\ No newline at end of file
@@ -0,0 +1,22 @@
+import moderngl as mgl
+
+
+# standalone backends tried in order, EGL runs without a display server and falls back to llvmpipe without a gpu
+BACKENDS = ('egl', None)
+
+
+def get_headless_context() -> mgl.Context:
+    """
+    Create a standalone moderngl context which needs no window, for rendering with a `GraphicsEngine` on machines
+    without a display. Tries every backend in `BACKENDS`, `None` being the platform default (an X display on linux),
+    and raises the error of the last one if none work
+    """
+    error = None
+    for backend in BACKENDS:
+        try:
+            if backend is None:
+                return mgl.create_standalone_context(require=330)
+            return mgl.create_standalone_context(require=330, backend=backend)
+        except Exception as exception:
+            error = exception
+    raise error
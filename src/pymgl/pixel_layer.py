@@ -0,0 +1,80 @@
+import pygame as pg
+
+
+class PixelLayer:
+    def __init__(self, res: tuple[int, int], scale: int):
+        """
+        The `PixelLayer` is a layer at a fraction of the screen resolution for pixel art, which the `GraphicsEngine`
+        scales back up with nearest neighbour sampling. Sprites loaded scaled up by `scale` are blitted at their
+        native size, from copies made once per sprite, so every blit and upload moves `scale`² fewer pixels.
+        `blit` takes the same arguments as `pg.Surface.blit` at screen resolution, so anything that renders onto
+        a layer can render onto a `PixelLayer` instead
+
+        The `PixelLayer` takes as input:
+
+        * `res`: the screen resolution
+
+        * `scale`: how many screen pixels across each pixel of the layer covers
+        """
+        self.scale = scale
+        self.surface = pg.Surface((res[0] // scale, res[1] // scale), pg.SRCALPHA)
+        # a second surface to draw on while the first is uploaded
+        self.back = None
+
+        # native size copies of the sprites blitted so far
+        self.natives : dict[int, pg.Surface] = {}
+        self.sources : list[pg.Surface] = []
+
+    def get_native(self, source: pg.Surface) -> pg.Surface:
+        """
+        Get the native size copy of a sprite, made the first time it is needed. Nearest neighbour sampling picks back the
+        original pixels of sprites which were scaled up by `scale` with nearest neighbour sampling
+        """
+        native = self.natives.get(id(source))
+        if native is None:
+            native = pg.transform.scale_by(source, 1 / self.scale)
+            if source.get_colorkey() is not None:
+                native.set_colorkey(source.get_colorkey())
+
+            # keep the surface alive so its id is not reused
+            self.natives[id(source)] = native
+            self.sources.append(source)
+        return native
+
+    def preload(self, sources):
+        """
+        Make the native copies of sprites ahead of blitting them
+        """
+        for source in sources:
+            self.get_native(source)
+
+    def fill(self, color):
+        """
+        Fill the layer with a colour, as `pg.Surface.fill`
+        """
+        self.surface.fill(color)
+
+    def blit(self, source: pg.Surface, dest):
+        """
+        Blit a sprite at screen resolution with the arguments of `pg.Surface.blit`, `dest` is a position or a rect
+        """
+        if isinstance(dest, pg.Rect):
+            dest = dest.topleft
+        self.surface.blit(self.get_native(source), (int(dest[0] // self.scale), int(dest[1] // self.scale)))
+
+    def swap(self) -> pg.Surface:
+        """
+        Hand over the surface drawn on so far and draw on a second one from then on, e.g. to upload the one while
+        the next frame is drawn on the other on another thread
+        """
+        if self.back is None:
+            self.back = self.surface.copy()
+        surface, self.surface, self.back = self.surface, self.back, self.surface
+        return surface
+
+    def clear_cache(self):
+        """
+        Forget the native copies of every sprite, e.g. when the sprites of a new fight are loaded
+        """
+        self.natives.clear()
+        self.sources.clear()
@@ -0,0 +1,14 @@
+#version 330 core
+
+layout (location = 0) out vec4 fragColor;
+
+in vec2 uvs;
+
+uniform sampler2D tex;
+uniform float gain;
+uniform float opacity;
+
+void main() {
+    // the blurred coverage, upsampled by the linear filter, is the opacity of the glow
+    fragColor = vec4(1., 1., 1., min(texture(tex, uvs).r * gain, 1.) * opacity);
+}
@@ -0,0 +1,20 @@
+#version 330 core
+#define FACTOR 2
+
+layout (location = 0) out vec4 fragColor;
+
+uniform sampler2D tex;
+
+void main() {
+    // fraction of the FACTOR x FACTOR block of layer texels which is not black, rows keep their order
+    ivec2 texel = ivec2(gl_FragCoord.xy) * FACTOR;
+    float coverage = 0.;
+    for (int y = 0; y < FACTOR; y++) {
+        for (int x = 0; x < FACTOR; x++) {
+            if (texelFetch(tex, texel + ivec2(x, y), 0).rgb != vec3(0)) {
+                coverage += 1.;
+            }
+        }
+    }
+    fragColor = vec4(coverage / float(FACTOR * FACTOR));
+}
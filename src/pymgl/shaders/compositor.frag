@@ -0,0 +1,62 @@
+#version 330 core
+#define NUM_LAYERS 4
+// layers moved by a camera, sampled through their own matrix
+#define NUM_CAMERAS 1
+// slant of the wipe's edge in pixels and its colour, as in overlay.frag
+#define SLANT 200.
+#define WIPE_COLOR vec3(10. / 255.)
+#define COMPOSITE over(color, transmittance, opacity[0] * opaque(texture(layers[0], uvs), 0)); over(color, transmittance, opacity[1] * premultiplied(texture(layers[1], uvs), 1)); over(color, transmittance, opacity[2] * glow(texture(layers[2], uvs), 2)); over(color, transmittance, opacity[3] * colorkey(texture(layers[3], uvs), 3));
+
+layout (location = 0) out vec4 fragColor;
+
+in vec2 uvs;
+in vec2 screen_res;
+
+uniform sampler2D layers[NUM_LAYERS];
+uniform float gain;
+// the uniforms each layer was drawn with
+uniform float opacity[NUM_LAYERS];
+uniform float progress[NUM_LAYERS];
+uniform float direction[NUM_LAYERS];
+// where each moved layer is sampled from for each texture coordinate of the screen, from the bottom up
+uniform mat3 camera[NUM_CAMERAS];
+
+// every effect lays a premultiplied colour and an opacity over the layers below it
+
+// a layer which covers everything below it
+vec4 opaque(vec4 layer, int i) {
+    return vec4(layer.rgb, 1.);
+}
+
+// a layer pygame blended onto transparency, premultiplied by blits with a surface alpha and not by blits with
+// per-pixel alpha, read like hud.frag which is clamped after undoing the premultiplication
+vec4 premultiplied(vec4 layer, int i) {
+    return vec4(min(layer.rgb / max(layer.a, 1. / 255.), 1.) * layer.a, layer.a);
+}
+
+// blurred coverage lighting up what is below it in white
+vec4 glow(vec4 layer, int i) {
+    return vec4(min(layer.r * gain, 1.));
+}
+
+// a layer where black is transparent, over the wipe of overlay.frag
+vec4 colorkey(vec4 layer, int i) {
+    vec2 pixel = uvs * screen_res;
+    float edge = progress[i] * screen_res.x - SLANT * pixel.y / screen_res.y;
+    vec4 wipe = direction[i] * (edge - pixel.x) >= 0. ? vec4(WIPE_COLOR, 1.) : vec4(0.);
+    return layer.rgb == vec3(0) ? wipe : vec4(layer.rgb, 1.);
+}
+
+void over(inout vec3 color, inout float transmittance, vec4 layer) {
+    color = layer.rgb + color * (1. - layer.a);
+    transmittance *= 1. - layer.a;
+}
+
+void main() {
+    // every layer from the bottom up in one pass, blended over what is already on the screen by how much of it
+    // shows through
+    vec3 color = vec3(0.);
+    float transmittance = 1.;
+    COMPOSITE
+    fragColor = vec4(color, transmittance);
+}
@@ -6,9 +6,10 @@ in vec2 uvs;
 in vec2 screen_res;
 
 uniform sampler2D tex;
+uniform float opacity;
 
 void main() {
     vec2 st = gl_FragCoord.xy/screen_res;
     vec4 color = vec4(texture(tex, uvs).rgb, 1.0);
-    fragColor = vec4(color.rgb, 1.0);
+    fragColor = vec4(color.rgb, opacity);
 }
\ No newline at end of file
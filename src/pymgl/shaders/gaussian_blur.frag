@@ -1,48 +1,24 @@
 #version 330 core
-#define KERNEL_SIZE 20
+#define TAPS 20
+#define SPACING 1.
+#define WEIGHTS 0.0797, 0.0781, 0.0736, 0.0666, 0.0579, 0.0484, 0.0389, 0.0300, 0.0222, 0.0158, 0.0109, 0.0071, 0.0045, 0.0027, 0.0016, 0.0009, 0.0005, 0.0003, 0.0001, 0.0001
 
 layout (location = 0) out vec4 fragColor;
 
-in vec2 uvs;
-in vec2 screen_res;
-
 uniform sampler2D tex;
-uniform float weights[KERNEL_SIZE] = float[] (
-    0.0797,	0.0781,	0.0736,	0.0666,	0.0579,	0.0484,	0.0389,	0.0300,	0.0222,	0.0158,	0.0109,	0.0071,	0.0045,	0.0027,	0.0016,	0.0009,	0.0005,	0.0003,	0.0001,	0.0001
-);
-
-void main() {
-    vec2 st = gl_FragCoord.xy/screen_res;
+// one texel along the direction of the pass
+uniform vec2 texel;
 
-    vec2 tex_offset = 2. / textureSize(tex, 0);
-    vec3 color = vec3(texture(tex, uvs).rgb);
-    float alpha = 0.;
-    if (color != vec3(0)) {
-        alpha += weights[0];
-    }
+// weights of the centre tap and of each pair of taps, SPACING texels apart
+const float weights[TAPS] = float[](WEIGHTS);
 
-    // horizontal
-    for (int i = 1; i < KERNEL_SIZE; i++) {
-        vec3 color = vec3(texture(tex, uvs + vec2(tex_offset.x * i, 0.)).rgb);
-        if (color != vec3(0)) {
-            alpha += weights[i];
-        }
-        color = vec3(texture(tex, uvs - vec2(tex_offset.x * i, 0.)).rgb);
-        if (color != vec3(0)) {
-            alpha += weights[i];
-        }
-    }
-    // vertical
-    for (int i = 1; i < KERNEL_SIZE; i++) {
-        vec3 color = vec3(texture(tex, uvs + vec2(0., tex_offset.y * i)).rgb);
-        if (color != vec3(0)) {
-            alpha += weights[i];
-        }
-        color = vec3(texture(tex, uvs - vec2(0., tex_offset.y * i)).rgb);
-        if (color != vec3(0)) {
-            alpha += weights[i];
-        }
+void main() {
+    // one direction of a separable blur, rows keep their order
+    vec2 uv = gl_FragCoord.xy / vec2(textureSize(tex, 0));
+    float coverage = texture(tex, uv).r * weights[0];
+    for (int i = 1; i < TAPS; i++) {
+        vec2 offset = texel * SPACING * float(i);
+        coverage += (texture(tex, uv + offset).r + texture(tex, uv - offset).r) * weights[i];
     }
-
-    fragColor = vec4(1., 1., 1., alpha);
-}
\ No newline at end of file
+    fragColor = vec4(coverage);
+}
@@ -0,0 +1,14 @@
+#version 330 core
+
+layout (location = 0) out vec4 fragColor;
+
+in vec2 uvs;
+
+uniform sampler2D tex;
+uniform float opacity;
+
+void main() {
+    // pygame blends onto a transparent layer with premultiplied colours
+    vec4 color = texture(tex, uvs);
+    fragColor = vec4(color.rgb / max(color.a, 1. / 255.), color.a * opacity);
+}
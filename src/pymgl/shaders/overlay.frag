@@ -1,4 +1,8 @@
 #version 330 core
+// slant of the wipe's edge in pixels, from the top of the screen to the bottom
+#define SLANT 200.
+// the menus' black
+#define WIPE_COLOR vec3(10. / 255.)
 
 layout (location = 0) out vec4 fragColor;
 
@@ -6,13 +10,22 @@ in vec2 uvs;
 in vec2 screen_res;
 
 uniform sampler2D tex;
+uniform float opacity;
+// the wipe's edge, which crosses the screen as `progress` goes from 0 to 1.25, covers what is left of it or with
+// a negative `direction` what is right of it
+uniform float progress;
+uniform float direction;
 
 void main() {
-    vec2 st = gl_FragCoord.xy/screen_res;
+    vec2 pixel = uvs * screen_res;
+    float edge = progress * screen_res.x - SLANT * pixel.y / screen_res.y;
     vec3 color = vec3(texture(tex, uvs).rgb);
-    if (color == vec3(0)) {
-        fragColor = vec4(color.rgb, 0.0);
+    if (color != vec3(0)) {
+        fragColor = vec4(color.rgb, opacity);
+    } else if (direction * (edge - pixel.x) >= 0.) {
+        // the wipe shows through where the layer is black
+        fragColor = vec4(WIPE_COLOR, opacity);
     } else {
-        fragColor = vec4(color.rgb, 1.0);
+        fragColor = vec4(color.rgb, 0.0);
     }
-}
\ No newline at end of file
+}
@@ -0,0 +1,34 @@
+#version 330 core
+#define BOOM 0
+#define SPARK 1
+#define BOLT 2
+#define DUST 3
+#define RING_WIDTH 10.
+
+layout (location = 0) out vec4 fragColor;
+
+in vec2 local;
+in vec2 extent;
+flat in int type;
+
+void main() {
+    if (type == BOOM) {
+        // ellipse outline, filled when it is thinner than the ring
+        vec2 p = local * extent;
+        vec2 inner = extent - RING_WIDTH;
+        if (dot(local, local) > 1. || (inner.x > 0. && inner.y > 0. && dot(p / inner, p / inner) < 1.)) {
+            discard;
+        }
+        fragColor = vec4(1.);
+    } else if (type == DUST) {
+        if (dot(local, local) > 1.) {
+            discard;
+        }
+        fragColor = vec4(vec3(50. / 255.), 1.);
+    } else {
+        if (abs(local.x) + abs(local.y) > 1.) {
+            discard;
+        }
+        fragColor = vec4(1.);
+    }
+}
@@ -0,0 +1,52 @@
+#version 330 core
+#define BOOM 0
+#define SPARK 1
+#define BOLT 2
+#define DUST 3
+
+layout (location = 0) in vec2 vertcoord;
+layout (location = 1) in vec2 pos;
+layout (location = 2) in float angle;
+layout (location = 3) in float lifetime;
+layout (location = 4) in float kind;
+
+uniform vec2 res;
+uniform float effect_lifetime;
+
+out vec2 local;
+out vec2 extent;
+flat out int type;
+
+void main() {
+    type = int(kind);
+    local = vertcoord;
+
+    // expired particles collapse to nothing
+    if (lifetime <= 0.) {
+        gl_Position = vec4(2., 2., 2., 1.);
+        return;
+    }
+
+    float t = clamp(lifetime / effect_lifetime, 0., 1.);
+    vec2 offset;
+    if (type == BOOM) {
+        // ring inside a (r, 2r) box, rotated clockwise by angle degrees
+        float r = mix(150., 0., t);
+        extent = vec2(r / 4., r / 2.);
+        float a = radians(angle);
+        vec2 p = vertcoord * extent;
+        offset = vec2(p.x * cos(a) - p.y * sin(a), p.x * sin(a) + p.y * cos(a));
+    } else if (type == DUST) {
+        extent = vec2(lifetime * 100.);
+        offset = vertcoord * extent;
+    } else {
+        // diamond pointing along the angle
+        extent = type == SPARK ? vec2(100., 10.) * t : vec2(500., 20.) * mix(1. / 5., 1., t);
+        vec2 forward = vec2(sin(angle), cos(angle));
+        vec2 side = vec2(forward.y, -forward.x);
+        offset = vertcoord.x * extent.x * forward + vertcoord.y * extent.y * side;
+    }
+
+    // rows run top down, the same as an uploaded pygame surface
+    gl_Position = vec4((pos + offset) / res * 2. - 1., 0., 1.);
+}
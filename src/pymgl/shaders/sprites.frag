@@ -0,0 +1,16 @@
+#version 330 core
+
+layout (location = 0) out vec4 fragColor;
+
+in vec2 uvs;
+in vec4 colour;
+
+uniform sampler2D atlas;
+
+void main() {
+    vec4 color = texture(atlas, uvs) * colour;
+    if (color.a == 0.) {
+        discard;
+    }
+    fragColor = color;
+}
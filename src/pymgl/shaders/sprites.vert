@@ -0,0 +1,22 @@
+#version 330 core
+
+layout (location = 0) in vec2 vertcoord;
+layout (location = 1) in vec4 rect;
+layout (location = 2) in vec4 region;
+layout (location = 3) in vec4 tint;
+
+uniform vec2 res;
+uniform mat4 m_model;
+
+out vec2 uvs;
+out vec4 colour;
+
+void main() {
+    // a flipped sprite has its region mirrored
+    uvs = mix(region.xy, region.zw, vertcoord);
+    colour = tint;
+
+    // pygame coordinates, rows run top down
+    vec2 pos = rect.xy + rect.zw * vertcoord;
+    gl_Position = m_model * vec4(pos.x / res.x * 2. - 1., 1. - pos.y / res.y * 2., 0., 1.);
+}
@@ -0,0 +1,282 @@
+import moderngl as mgl
+import numpy as np
+import pygame as pg
+from collections import deque
+
+
+# floats per sprite instance: dest rect, atlas region, tint
+SPRITE_STRIDE = 12
+
+
+class _Settings:
+    ATLAS_SIZE = 4096
+    PADDING = 1
+    INITIAL_CAPACITY = 64
+
+
+class SpriteBatch:
+    def __init__(self, ctx: mgl.Context, program: mgl.Program, res: tuple[int, int]):
+        """
+        The `SpriteBatch` draws sprites straight onto the pygame display, in place of blitting them onto a layer.
+        Sprite frames are trimmed to their content and packed into atlas textures which stay on the GPU, so a
+        frame only uploads one small per-instance buffer and draws every sprite with one instanced draw call.
+        `blit` takes the same arguments as `pg.Surface.blit`, so anything that renders onto a layer can render
+        into a batch instead. With a `scale` set, sprites loaded scaled up by it are kept in the atlas at their
+        native size and scaled back up when drawn. Sprites can be queued on a thread without the gl context, sprites
+        new to the atlas are packed there and uploaded by the next `render`
+
+        The `SpriteBatch` takes as input:
+
+        * `ctx`: the moderngl context
+
+        * `program`: the sprite shader program
+
+        * `res`: the screen resolution
+        """
+        self.ctx = ctx
+        self.program = program
+        self.program['res'] = res
+        self.quad = self.ctx.buffer(np.array([(0, 0), (1, 0), (1, 1), (0, 0), (1, 1), (0, 1)], dtype='f4'))
+
+        # atlas pages and the packing cursor of the last one, pages are made when the first sprite on them is uploaded
+        self.pages : list[mgl.Texture] = []
+        self.num_pages = 0
+        self.regions : dict[int, tuple] = {}
+        self.sources : list[pg.Surface] = []
+        self.shelf = (0, 0, 0)
+        # sprites packed into the atlas but not uploaded yet, as the page, the pixels and where they go
+        self.uploads : deque[tuple[int, bytes, tuple]] = deque()
+
+        # sprites drawn this frame, with the atlas page of each
+        self.data = np.zeros((0, SPRITE_STRIDE), dtype='f4')
+        self.page_ids = np.zeros(0, dtype=np.int32)
+        self.num_sprites = 0
+        self.vbo = None
+        self.vao = None
+        self._reserve(_Settings.INITIAL_CAPACITY)
+        self._reserve_buffer(_Settings.INITIAL_CAPACITY)
+
+        # bytes uploaded since the last render
+        self.pending_bytes = 0
+
+        # screen pixels across each texel of the atlas
+        self.scale = 1
+
+    def _reserve(self, capacity: int):
+        """
+        Helper function which grows the queue of sprites to hold at least `capacity` sprites
+        """
+        if capacity <= self.data.shape[0]:
+            return
+        capacity = max(capacity, 2 * self.data.shape[0])
+        data = np.zeros((capacity, SPRITE_STRIDE), dtype='f4')
+        data[:self.num_sprites] = self.data[:self.num_sprites]
+        page_ids = np.zeros(capacity, dtype=np.int32)
+        page_ids[:self.num_sprites] = self.page_ids[:self.num_sprites]
+        self.data, self.page_ids = data, page_ids
+
+    def _reserve_buffer(self, capacity: int):
+        """
+        Helper function which grows the per-instance buffer to hold at least `capacity` sprites, apart from the queue
+        so that sprites can be queued on a thread without the gl context
+        """
+        if self.vbo is not None and capacity * SPRITE_STRIDE * 4 <= self.vbo.size:
+            return
+        if self.vao is not None:
+            capacity = max(capacity, 2 * self.vbo.size // (SPRITE_STRIDE * 4))
+            self.vao.release()
+            self.vbo.release()
+        self.vbo = self.ctx.buffer(reserve=capacity * SPRITE_STRIDE * 4, dynamic=True)
+        self.vao = self.ctx.vertex_array(self.program, [
+            (self.quad, '2f', 'vertcoord'),
+            (self.vbo, '4f 4f 4f/i', 'rect', 'region', 'tint'),
+        ])
+
+    def _new_page(self):
+        """
+        Helper function to start packing a new atlas page, made by `_upload`
+        """
+        self.num_pages += 1
+        self.shelf = (0, 0, 0)
+
+    def _upload(self):
+        """
+        Helper function to make the atlas pages packed so far and upload the sprites packed into them, on the thread
+        of the gl context. Sprites packed on another thread meanwhile are uploaded too, or by the next call
+        """
+        while self.uploads:
+            page, pixels, viewport = self.uploads.popleft()
+            while len(self.pages) <= page:
+                size = _Settings.ATLAS_SIZE
+                texture = self.ctx.texture((size, size), components=4)
+                texture.repeat_x = False
+                texture.repeat_y = False
+                texture.filter = (mgl.NEAREST, mgl.NEAREST)
+                self.pages.append(texture)
+            self.pages[page].write(pixels, viewport=viewport)
+            self.pending_bytes += len(pixels)
+
+    def _allocate(self, size: tuple[int, int]) -> tuple[int, int, int]:
+        """
+        Helper function to find space for a sprite in the atlas with a shelf packer, returns the page and the topleft
+        """
+        atlas_size = _Settings.ATLAS_SIZE
+        width, height = size[0] + _Settings.PADDING, size[1] + _Settings.PADDING
+        if width > atlas_size or height > atlas_size:
+            raise ValueError(f'sprite of size {size} does not fit in a {atlas_size}x{atlas_size} atlas')
+        if not self.num_pages:
+            self._new_page()
+
+        # next shelf, then next page
+        x, y, shelf_height = self.shelf
+        if x + width > atlas_size:
+            x, y, shelf_height = 0, y + shelf_height, 0
+        if y + height > atlas_size:
+            self._new_page()
+            x, y, shelf_height = self.shelf
+        self.shelf = (x + width, y, max(shelf_height, height))
+        return self.num_pages - 1, x, y
+
+    def _add(self, source: pg.Surface) -> tuple:
+        """
+        Helper function to pack a sprite into the atlas and queue its upload, colorkeyed pixels become transparent
+        """
+        trim = source.get_bounding_rect()
+        if self.scale > 1:
+            # whole texels, each of which covers `scale` pixels of the sprite across
+            left, top = trim.left // self.scale * self.scale, trim.top // self.scale * self.scale
+            right, bottom = -(-trim.right // self.scale) * self.scale, -(-trim.bottom // self.scale) * self.scale
+            trim = pg.Rect(left, top, right - left, bottom - top).clip(source.get_rect())
+        region = (0, (0, 0, 0, 0), trim, source.get_width())
+        if trim.w > 0 and trim.h > 0:
+            pixels = pg.Surface(trim.size, pg.SRCALPHA)
+            pixels.blit(source, (0, 0), trim)
+            if self.scale > 1:
+                pixels = pg.transform.scale_by(pixels, 1 / self.scale)
+            width, height = pixels.get_size()
+            page, x, y = self._allocate((width, height))
+            self.uploads.append((page, pg.image.tobytes(pixels, 'RGBA'), (x, y, width, height)))
+
+            atlas_size = _Settings.ATLAS_SIZE
+            uvs = (x / atlas_size, y / atlas_size, (x + width) / atlas_size, (y + height) / atlas_size)
+            region = (page, uvs, trim, source.get_width())
+
+        # keep the surface alive so its id is not reused
+        self.regions[id(source)] = region
+        self.sources.append(source)
+        return region
+
+    def preload(self, sources):
+        """
+        Upload sprites into the atlas ahead of drawing them, tallest first so they pack tightly
+        """
+        sources = [source for source in sources if id(source) not in self.regions]
+        for source in sorted(sources, key=lambda source: source.get_bounding_rect().h, reverse=True):
+            self._add(source)
+        self._upload()
+
+    def set_scale(self, scale: int):
+        """
+        Keep sprites in the atlas at `1 / scale` of their size, for sprites loaded scaled up by `scale` with nearest
+        neighbour sampling, which draw the same from a quarter of the texels at a scale of 2. Empties the atlas
+        """
+        self.scale = scale
+        self.clear_atlas()
+
+    def clear_atlas(self):
+        """
+        Forget every sprite in the atlas, e.g. when the sprites of a new fight are loaded. Pages are kept and reused
+        """
+        self.regions.clear()
+        self.sources.clear()
+        self.uploads.clear()
+        for page in self.pages[1:]:
+            page.release()
+        self.pages = self.pages[:1]
+        self.num_pages = 0
+        self.shelf = (0, 0, 0)
+
+    def draw(self, source: pg.Surface, pos, flip: bool = False, tint: tuple | None = None):
+        """
+        Queue a sprite for this frame. Takes as input
+
+        * `source`, the sprite
+
+        * `pos`, the topleft of the sprite on the screen
+
+        * `flip`, mirror the sprite horizontally
+
+        * `tint`, a colour the sprite is multiplied by, with an optional alpha. Default `None` (no tint)
+        """
+        region = self.regions.get(id(source))
+        if region is None:
+            region = self._add(source)
+        page, (u0, v0, u1, v1), trim, width = region
+        if trim.w == 0 or trim.h == 0:
+            return
+
+        self._reserve(self.num_sprites + 1)
+        x = pos[0] + (width - trim.right if flip else trim.left)
+        if flip:
+            u0, u1 = u1, u0
+        sprite = self.data[self.num_sprites]
+        sprite[0:8] = (x, pos[1] + trim.top, trim.w, trim.h, u0, v0, u1, v1)
+        if tint is None:
+            sprite[8:12] = 1
+        else:
+            sprite[8:12] = (tint[0] / 255, tint[1] / 255, tint[2] / 255, tint[3] / 255 if len(tint) > 3 else 1)
+        self.page_ids[self.num_sprites] = page
+        self.num_sprites += 1
+
+    def blit(self, source: pg.Surface, dest):
+        """
+        Queue a sprite for this frame with the arguments of `pg.Surface.blit`, `dest` is a position or a rect
+        """
+        if isinstance(dest, pg.Rect):
+            dest = dest.topleft
+        self.draw(source, dest)
+
+    def take(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Take the sprites queued so far, with the atlas page of each, and empty the batch, to draw them with `render`
+        while the next frame is queued, e.g. on another thread. Sprites new to the atlas are uploaded by `render`
+        """
+        queued = (self.data[:self.num_sprites].copy(), self.page_ids[:self.num_sprites].copy())
+        self.num_sprites = 0
+        return queued
+
+    def render(self, queued: tuple[np.ndarray, np.ndarray] | None = None) -> int:
+        """
+        Draw the sprites queued this frame in order onto the current framebuffer and empty the batch, or the sprites
+        of `take` given as `queued`. Sprites on the same atlas page are drawn with one instanced draw call. Uploads the
+        sprites new to the atlas first. Returns the bytes uploaded since the last render
+        """
+        self._upload()
+        if queued is None:
+            queued = (self.data[:self.num_sprites], self.page_ids[:self.num_sprites])
+            self.num_sprites = 0
+        data, page_ids = queued
+        if len(data) > 0:
+            self.program['atlas'] = 0
+
+            # one draw per run of sprites on the same page, a single run unless the atlas spilled over
+            starts = np.flatnonzero(np.diff(page_ids, prepend=-1)).tolist()
+            for start, stop in zip(starts, starts[1:] + [len(data)]):
+                run = data[start:stop]
+                self._reserve_buffer(stop - start)
+                self.vbo.write(run)
+                self.pending_bytes += run.nbytes
+                self.pages[page_ids[start]].use()
+                self.vao.render(instances=stop - start)
+
+        pending_bytes, self.pending_bytes = self.pending_bytes, 0
+        return pending_bytes
+
+    def release(self):
+        """
+        Release all GPU memory associated with the `SpriteBatch`
+        """
+        [page.release() for page in self.pages]
+        self.vao.release()
+        self.vbo.release()
+        self.quad.release()
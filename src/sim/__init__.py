@@ -0,0 +1,3 @@
+from .headless import init_headless, HeadlessAssets
+from .match import Match
+from .env import VecEnv
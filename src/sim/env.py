@@ -0,0 +1,137 @@
+import numpy as np
+
+from .match import Match, _Settings as _MatchSettings
+from ..util import get_registry
+
+
+class _Settings:
+    # action buttons, directions are held and the rest are pressed
+    BUTTONS = ('left', 'right', 'up', 'down', 'jump', 'light_attack', 'dash')
+    # per goose observation
+    OBSERVATIONS = (
+        'x', 'y', 'vx', 'vy', 'facing', 'gpa',
+        'attack_active', 'attack_id', 'attack_frame', 'attack_cooldown',
+        'dash_time', 'stunned_time',
+    )
+
+
+class VecEnv:
+    def __init__(
+        self,
+        num_envs: int,
+        assets,
+        majors: tuple[str, str] | None = None,
+        dt: float = _MatchSettings.DT,
+        max_time: float = _MatchSettings.MAX_TIME,
+    ):
+        """
+        The `VecEnv` steps `num_envs` independent headless matches per call with the `FightMenu` rules,
+        for training and evaluating bots. Both geese of every match are driven by the caller.
+
+        Observations, rewards and done flags are written into preallocated buffers, which are returned
+        by `reset` and `step` without copying, so they are overwritten by the next call.
+
+        * `assets`: a `HeadlessAssets`, see `init_headless`
+
+        * `majors`: the fighters of every match, random for every match when `None`
+
+        * `max_time`: seconds before a match is cut off as a draw
+        """
+        self.num_envs = num_envs
+        self.assets = assets
+        self.majors = majors
+        self.dt = dt
+        self.max_time = max_time
+        self.registry = get_registry(assets.path)
+        self.matches = [Match(assets) for _ in range(num_envs)]
+        self.rng = np.random.default_rng()
+
+        # buffers
+        self.obs = np.zeros((num_envs, 2, len(_Settings.OBSERVATIONS)), dtype=np.float32)
+        self.rewards = np.zeros((num_envs, 2), dtype=np.float32)
+        self.dones = np.zeros(num_envs, dtype=bool)
+        # index of the winner of matches that finished on the last step, -1 for a draw or a match still going
+        self.winners = np.full(num_envs, -1, dtype=np.int8)
+
+        # every match starts ready to step, `reset` starts them over with a seed
+        self.reset()
+
+    @staticmethod
+    def observation_index(name: str) -> int:
+        return _Settings.OBSERVATIONS.index(name)
+
+    @staticmethod
+    def button_index(name: str) -> int:
+        return _Settings.BUTTONS.index(name)
+
+    def seed(self, seed: int | None):
+        """
+        Seed the match setup and the vfx randomness
+        """
+        self.rng = np.random.default_rng(seed)
+        np.random.seed(seed)
+
+    def _reset_match(self, i: int):
+        if self.majors is None:
+            majors = tuple(self.rng.choice(self.registry.majors, 2))
+        else:
+            majors = self.majors
+        self.matches[i].reset(majors)
+        self._write_obs(i)
+
+    def _write_obs(self, i: int):
+        obs = self.obs[i]
+        for j, goose in enumerate(self.matches[i].geese):
+            obs[j] = (
+                goose.pos[0], goose.pos[1], goose.vel[0], goose.vel[1],
+                1 if goose.facing == 'right' else -1, goose.gpa,
+                goose.attack.active, goose.attack.attack_id, goose.attack.frame_index, goose.attack.cooldown,
+                goose.dash_time, goose.stunned_time,
+            )
+
+    def reset(self, seed: int | None = None) -> np.ndarray:
+        """
+        Start every match over, returns the observation buffer, shaped `[num_envs, 2, len(OBSERVATIONS)]`
+        """
+        if seed is not None:
+            self.seed(seed)
+        for i in range(self.num_envs):
+            self._reset_match(i)
+        self.rewards[:] = 0
+        self.dones[:] = False
+        self.winners[:] = -1
+        return self.obs
+
+    def step(self, actions: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Advance every match by one frame. Finished matches are reset right away, the observation is then
+        the first of the next match.
+
+        * `actions`: button states shaped `[num_envs, 2, len(BUTTONS)]`
+
+        Returns the observation, reward (gpa taken from the rival minus gpa lost, per goose) and done buffers.
+        """
+        actions = np.asarray(actions).tolist()
+        self.winners[:] = -1
+        for i, match in enumerate(self.matches):
+            for goose, buttons in zip(match.geese, actions[i]):
+                for button, value in zip(_Settings.BUTTONS, buttons):
+                    if button in goose.direction_inputs:
+                        goose.direction_inputs[button] = int(value)
+                    elif value and goose.stunned_time <= 0:
+                        goose.action_inputs[button] = 1
+
+            gpa1, gpa2 = match.geese[0].gpa, match.geese[1].gpa
+            match.step(self.dt)
+            lost1 = gpa1 - match.geese[0].gpa
+            lost2 = gpa2 - match.geese[1].gpa
+            self.rewards[i] = (lost2 - lost1, lost1 - lost2)
+
+            done = match.done or match.time >= self.max_time
+            self.dones[i] = done
+            if done:
+                self.winners[i] = -1 if match.loser is None else 1 - match.loser
+                self._reset_match(i)
+            else:
+                self._write_obs(i)
+        return self.obs, self.rewards, self.dones
@@ -0,0 +1,71 @@
+import pygame as pg
+import os
+
+from ..util import (
+    get_registry,
+    load_character_assets,
+    load_accessory_assets,
+    load_attack_assets,
+)
+
+
+def init_headless():
+    """
+    Initialize pygame without a window so that sprites can be loaded and converted. Safe to call more than once.
+    """
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    # let process pools terminate headless workers
+    os.environ.setdefault('SDL_NO_SIGNAL_HANDLERS', '1')
+    if not pg.display.get_init():
+        pg.display.init()
+    if pg.display.get_surface() is None:
+        pg.display.set_mode((1, 1))
+
+
+class HeadlessAssets:
+    def __init__(self, path: str = './assets/'):
+        """
+        The subset of `Client.Assets` used by the fight logic, loaded all at once and without a window.
+        `init_headless` must be called first.
+        """
+        self.path = path
+
+        self.registry = get_registry(path)
+        self.geese_meta_data = self.registry.geese_meta_data
+        self.accessory_meta_data = self.registry.accessory_meta_data
+        self.attack_meta_data = self.registry.attack_meta_data
+        # [major id, attack id] lookup tables
+        self.attack_damages = self.registry.damage
+        self.attack_knockbacks = self.registry.knockback
+
+        self.accessory_assets = load_accessory_assets(
+            f'{path}/accessories',
+            self.accessory_meta_data,
+            scale=2
+        )
+        self.character_assets = {}
+        self.attack_assets = {}
+        self._load_all()
+
+    def _load_all(self):
+        progress = 0
+        while True:
+            goose_major, sprites = load_character_assets(
+                f'{self.path}/geese',
+                self.geese_meta_data,
+                progress,
+                scale=2
+            )
+            if goose_major is not None:
+                self.character_assets[goose_major] = sprites
+            attack_major, sprites = load_attack_assets(
+                f'{self.path}/attacks',
+                self.attack_meta_data,
+                progress,
+                scale=2
+            )
+            if attack_major is not None:
+                self.attack_assets[attack_major] = sprites
+            if goose_major is None and attack_major is None:
+                return
+            progress += 1
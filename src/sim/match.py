@@ -0,0 +1,84 @@
+import numpy as np
+
+from ..fight import Goose, Controller, step_fight, get_loser
+
+
+class _Settings:
+    RESOLUTION = (1280, 720)
+    DT = 1 / 60
+    MAX_TIME = 90
+
+
+class Match:
+    def __init__(self, assets, width: float = _Settings.RESOLUTION[0]):
+        """
+        A headless fight between two geese, stepped with a fixed timestep using the same
+        rules as the `FightMenu` (`step_fight`, `get_loser`).
+
+        * `assets`: a `HeadlessAssets` or `Client.Assets`
+
+        * `width`: the width of the stage
+        """
+        self.assets = assets
+        self.width = width
+        self.geese = [
+            Goose(dict(major=None, x=100, facing='right')),
+            Goose(dict(major=None, x=width - 100, facing='left')),
+        ]
+
+    def reset(self, majors: tuple[str, str], seed: int | None = None):
+        """
+        Start a new fight between `majors[0]` (left) and `majors[1]` (right)
+        """
+        if seed is not None:
+            # the vfx draw from the global generator
+            np.random.seed(seed)
+        self.geese[0].reset_state(dict(major=majors[0], x=100, facing='right'))
+        self.geese[1].reset_state(dict(major=majors[1], x=self.width - 100, facing='left'))
+        # get the first drawboxes, the fight menu does this during the countdown
+        for goose in self.geese:
+            goose.animate(0, self.assets.character_assets, self.assets.accessory_assets, self.assets.attack_assets)
+
+        self.time = 0
+        self.frames = 0
+        self.loser = None
+        # (attacker index, gpa taken) for every hit
+        self.hits : list[tuple[int, float]] = []
+
+    @property
+    def done(self) -> bool:
+        return self.loser is not None
+
+    def step(self, dt: float = _Settings.DT) -> tuple[bool, bool]:
+        """
+        Advance the fight by `dt` seconds, returns whether each goose was hit
+        """
+        gpas = [goose.gpa for goose in self.geese]
+        hit1, hit2 = step_fight(self.geese[0], self.geese[1], dt, self.width, self.assets)
+        if hit1:
+            self.hits.append((1, gpas[0] - self.geese[0].gpa))
+        if hit2:
+            self.hits.append((0, gpas[1] - self.geese[1].gpa))
+
+        self.time += dt
+        self.frames += 1
+        self.loser = get_loser(self.geese[0], self.geese[1])
+        return hit1, hit2
+
+    def play(
+        self, 
+        controllers: tuple[Controller, Controller], 
+        dt: float = _Settings.DT, 
+        max_time: float = _Settings.MAX_TIME
+    ) -> int | None:
+        """
+        Play the fight out with a controller per goose. Returns the index of the winner,
+        or `None` on a draw (`max_time` ran out)
+        """
+        while not self.done and self.time < max_time:
+            controllers[0].act(self.geese[0], self.geese[1], dt)
+            controllers[1].act(self.geese[1], self.geese[0], dt)
+            self.step(dt)
+        if self.loser is None:
+            return None
+        return 1 - self.loser
@@ -0,0 +1,179 @@
+import multiprocessing as mp
+import numpy as np
+import argparse
+import json
+import time
+import os
+
+from .headless import init_headless, HeadlessAssets
+from .match import Match
+from ..util import get_registry
+from ..fight import RandomController, ScriptedController, CPUController
+from ..menus.menus import _Settings as _MenuSettings
+
+
+class _Settings:
+    CONTROLLERS = dict(
+        random=RandomController,
+        scripted=ScriptedController,
+        cpu=CPUController,
+    )
+    CHUNKSIZE = 4
+
+
+# per worker process state, set by `_init_worker`
+_match : Match = None
+
+
+def _init_worker(assets_path: str):
+    global _match
+    init_headless()
+    _match = Match(HeadlessAssets(assets_path))
+
+
+def _play(task: tuple) -> dict:
+    """
+    Play a single match in a worker process
+    """
+    majors, stage, controller, seed, max_time = task
+    controllers = (
+        _Settings.CONTROLLERS[controller](seed),
+        _Settings.CONTROLLERS[controller](seed + 1),
+    )
+    _match.reset(majors, seed=seed)
+    winner = _match.play(controllers, max_time=max_time)
+    return dict(
+        majors=majors,
+        stage=stage,
+        winner=winner,
+        time=_match.time,
+        frames=_match.frames,
+        hits=[(majors[attacker], damage) for attacker, damage in _match.hits],
+    )
+
+
+def get_tasks(
+    majors: list[str], 
+    stages: list[str], 
+    matches: int, 
+    controller: str, 
+    seed: int = 0, 
+    max_time: float = 90
+) -> list[tuple]:
+    """
+    Every ordered pair of `majors` on every stage in `stages`, `matches` times each
+    """
+    tasks = []
+    for major1 in majors:
+        for major2 in majors:
+            for stage in stages:
+                for _ in range(matches):
+                    tasks.append(((major1, major2), stage, controller, seed + 2 * len(tasks), max_time))
+    return tasks
+
+
+def run_tournament(tasks: list[tuple], workers: int | None = None, assets_path: str = './assets/') -> tuple[list[dict], float]:
+    """
+    Play all `tasks` over a process pool of `workers` processes (default: all cores).
+    Returns the match results and the wall clock time spent playing, excluding worker startup.
+    """
+    workers = workers or os.cpu_count()
+    pool = mp.Pool(workers, initializer=_init_worker, initargs=(assets_path,))
+    # wait for every worker to load its assets before starting the clock
+    pool.map(time.sleep, [0] * workers, chunksize=1)
+    start = time.perf_counter()
+    results = pool.map(_play, tasks, chunksize=_Settings.CHUNKSIZE)
+    elapsed = time.perf_counter() - start
+    pool.close()
+    pool.join()
+    return results, elapsed
+
+
+def summarize(results: list[dict], majors: list[str]) -> dict:
+    """
+    Get the win rate matrix (row goose against column goose, draws count as half a win),
+    the average match length, and the damage per hit for every major
+    """
+    index = {major: i for i, major in enumerate(majors)}
+    wins = np.zeros((len(majors), len(majors)))
+    played = np.zeros((len(majors), len(majors)))
+    damages = {major: [] for major in majors}
+    for result in results:
+        i, j = index[result['majors'][0]], index[result['majors'][1]]
+        score = 0.5 if result['winner'] is None else float(result['winner'] == 0)
+        wins[i, j] += score
+        wins[j, i] += 1 - score
+        played[i, j] += 1
+        played[j, i] += 1
+        for major, damage in result['hits']:
+            damages[major].append(damage)
+
+    return dict(
+        majors=majors,
+        win_rate=(wins / np.maximum(played, 1)).tolist(),
+        draws=sum(result['winner'] is None for result in results),
+        average_time=float(np.mean([result['time'] for result in results])),
+        average_frames=float(np.mean([result['frames'] for result in results])),
+        damage_per_hit={
+            major: dict(
+                mean=float(np.mean(values)) if values else 0.0, 
+                hits=len(values)
+            )
+            for major, values in damages.items()
+        },
+    )
+
+
+def print_summary(summary: dict, num_matches: int, elapsed: float, workers: int):
+    majors = summary['majors']
+    print('win rate (row vs column)')
+    print(' ' * 9 + ''.join(f'{major[:8]:>9}' for major in majors))
+    for major, row in zip(majors, summary['win_rate']):
+        print(f'{major[:8]:>9}' + ''.join(f'{rate:9.2f}' for rate in row))
+    print()
+    print(f'average match length: {summary["average_time"]:.2f}s ({summary["average_frames"]:.0f} frames), {summary["draws"]} draws')
+    print('damage per hit')
+    for major, stats in summary['damage_per_hit'].items():
+        print(f'{major:>9}: {stats["mean"]:.3f} over {stats["hits"]} hits')
+    print()
+    print(f'{num_matches} matches in {elapsed:.2f}s on {workers} workers: {num_matches / elapsed:.2f} matches/s')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Round robin tournament between every pair of geese on every stage')
+    parser.add_argument('-k', '--matches', type=int, default=1, help='matches per pair per stage')
+    parser.add_argument('-c', '--controller', choices=list(_Settings.CONTROLLERS), default='scripted')
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count(), help='worker processes')
+    parser.add_argument('--stages', nargs='*', default=_MenuSettings.BACKGROUNDS)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-time', type=float, default=90, help='seconds of fight before a draw')
+    parser.add_argument('--scaling', action='store_true', help='also report matches/s for 1, 2, 4, ... workers')
+    parser.add_argument('--out', type=str, default=None, help='write the summary as json')
+    parser.add_argument('--assets', type=str, default='./assets/')
+    args = parser.parse_args()
+
+    majors = list(get_registry(args.assets).majors)
+    tasks = get_tasks(majors, args.stages, args.matches, args.controller, args.seed, args.max_time)
+    results, elapsed = run_tournament(tasks, args.workers, args.assets)
+    summary = summarize(results, majors)
+    summary['matches_per_second'] = len(tasks) / elapsed
+    print_summary(summary, len(tasks), elapsed, args.workers)
+
+    if args.scaling:
+        print()
+        print('scaling')
+        summary['scaling'] = {}
+        workers = 1
+        while workers <= os.cpu_count():
+            _, elapsed = run_tournament(tasks, workers, args.assets)
+            summary['scaling'][workers] = len(tasks) / elapsed
+            print(f'{workers:>4} workers: {len(tasks) / elapsed:.2f} matches/s')
+            workers *= 2
+
+    if args.out is not None:
+        with open(args.out, 'w') as f:
+            json.dump(summary, f, indent=4)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,202 @@
+import multiprocessing as mp
+import numpy as np
+import argparse
+import json
+import time
+import os
+
+from . import tournament
+from ..util import get_registry
+
+
+class _Settings:
+    # bounds on damage (gpa per hit) and knockback (stun seconds)
+    BOUNDS = (0.05, 1.0)
+    # how hard a candidate is pushed against its win rates, and how much noise is added
+    STEP = 0.5
+    NOISE = 0.1
+    # each rung plays more matches with the better half of the remaining candidates
+    RUNGS = 3
+
+
+def _init_worker(assets_path: str):
+    tournament._init_worker(assets_path)
+
+
+def _play(task: tuple) -> tuple[int, dict]:
+    """
+    Play a single match in a worker process with the candidate's damage and knockback
+    """
+    candidate, damage, knockback, match_task = task
+    assets = tournament._match.assets
+    num_attacks = assets.registry.damage.shape[1]
+    assets.attack_damages = np.repeat(np.array(damage)[:, None], num_attacks, axis=1)
+    assets.attack_knockbacks = np.repeat(np.array(knockback)[:, None], num_attacks, axis=1)
+    return candidate, tournament._play(match_task)
+
+
+class Tuner:
+    def __init__(
+        self,
+        pool: mp.Pool,
+        majors: list[str],
+        controller: str = 'scripted',
+        max_time: float = 60,
+        seed: int = 0,
+    ):
+        """
+        The `Tuner` searches over per major damage and knockback to bring every major's win rate to 50%
+        under a fixed controller. Every generation perturbs the best configuration so far, guided by the
+        win rates it was measured with, and races the candidates with successive halving: all of them play
+        a few matches, the worse half is stopped early, and the rest play more. Candidates play the same matchups
+        with the same seeds on every rung, and the incumbent plays those of the last rung, so the finalists are
+        compared on the same matches rather than on noise from different ones.
+        """
+        self.pool = pool
+        self.majors = majors
+        self.controller = controller
+        self.max_time = max_time
+        self.rng = np.random.default_rng(seed)
+        self.seed = seed
+        self.matches_played = 0
+
+    def _match_tasks(self, num_matches: int) -> list[tuple]:
+        """
+        Helper function to draw `num_matches` matchups, each with a seed of its own
+        """
+        match_tasks = []
+        for _ in range(num_matches):
+            majors = tuple(self.rng.choice(self.majors, 2, replace=False))
+            match_tasks.append((majors, None, self.controller, self.seed, self.max_time))
+            self.seed += 2
+        return match_tasks
+
+    def _evaluate(self, candidates: list[tuple[np.ndarray, np.ndarray]], results: list[list[dict]], match_tasks: list[tuple], alive: list[int]):
+        """
+        Play every one of `match_tasks` for every candidate in `alive`, in parallel
+        """
+        tasks = []
+        for i in alive:
+            damage, knockback = candidates[i]
+            tasks.extend((i, damage.tolist(), knockback.tolist(), match_task) for match_task in match_tasks)
+        for candidate, result in self.pool.imap_unordered(_play, tasks, chunksize=2):
+            results[candidate].append(result)
+        self.matches_played += len(tasks)
+
+    def win_rates(self, results: list[dict]) -> np.ndarray:
+        """
+        Per major win rate, draws count as half a win
+        """
+        index = {major: i for i, major in enumerate(self.majors)}
+        wins = np.zeros(len(self.majors))
+        played = np.zeros(len(self.majors))
+        for result in results:
+            score = 0.5 if result['winner'] is None else float(result['winner'] == 0)
+            for major, major_score in zip(result['majors'], (score, 1 - score)):
+                wins[index[major]] += major_score
+                played[index[major]] += 1
+        # majors without matches yet are assumed balanced
+        return np.where(played > 0, wins / np.maximum(played, 1), 0.5)
+
+    def loss(self, results: list[dict]) -> float:
+        return float(np.mean((self.win_rates(results) - 0.5) ** 2))
+
+    def _perturb(self, damage: np.ndarray, knockback: np.ndarray, win_rates: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        # weaken majors that win too much and strengthen the ones that lose
+        push = -_Settings.STEP * (win_rates - 0.5)
+        damage = damage * np.exp(push * self.rng.random() + _Settings.NOISE * self.rng.standard_normal(len(damage)))
+        knockback = knockback * np.exp(push * self.rng.random() + _Settings.NOISE * self.rng.standard_normal(len(knockback)))
+        return np.clip(damage, *_Settings.BOUNDS), np.clip(knockback, *_Settings.BOUNDS)
+
+    def run(
+        self, 
+        damage: np.ndarray, 
+        knockback: np.ndarray, 
+        generations: int, 
+        population: int, 
+        matches: int
+    ) -> tuple[np.ndarray, np.ndarray, list[dict]]:
+        """
+        Tune starting from `damage` and `knockback` (per major). Candidates play `matches` matches on the
+        first rung, doubling on every rung. Returns the best damage, knockback and the convergence history.
+        """
+        history = []
+        start = time.perf_counter()
+
+        best = (damage, knockback)
+        best_results = []
+        self._evaluate([best], [best_results], self._match_tasks(matches * 2 ** (_Settings.RUNGS - 1)), [0])
+        for generation in range(generations):
+            win_rates = self.win_rates(best_results)
+            candidates = [best] + [self._perturb(*best, win_rates) for _ in range(population - 1)]
+            results = [[] for _ in range(population)]
+
+            # successive halving, every candidate on a rung plays the same matches
+            alive = list(range(1, population))
+            for rung in range(_Settings.RUNGS - 1):
+                self._evaluate(candidates, results, self._match_tasks(matches * 2 ** rung), alive)
+                alive = sorted(alive, key=lambda i: self.loss(results[i]))[:max(len(alive) // 2, 1)]
+
+            # the finishers and the incumbent play the last rung's matches, and are compared on those alone
+            final = [[] for _ in range(population)]
+            self._evaluate(candidates, final, self._match_tasks(matches * 2 ** (_Settings.RUNGS - 1)), [0] + alive)
+            winner = min([0] + alive, key=lambda i: self.loss(final[i]))
+            best, best_results = candidates[winner], final[winner]
+
+            elapsed = time.perf_counter() - start
+            history.append(dict(
+                generation=generation,
+                loss=self.loss(best_results),
+                win_rates=dict(zip(self.majors, self.win_rates(best_results).round(3).tolist())),
+                replaced=winner != 0,
+                matches_played=self.matches_played,
+                elapsed=elapsed,
+                matches_per_second=self.matches_played / elapsed,
+                candidates_per_second=(generation + 1) * (population - 1) / elapsed,
+            ))
+            print(
+                f'generation {generation}: loss {history[-1]["loss"]:.4f}, '
+                f'{self.matches_played} matches, {history[-1]["matches_per_second"]:.2f} matches/s, '
+                f'{history[-1]["candidates_per_second"]:.3f} candidates/s'
+            )
+
+        return *best, history
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tune damages.json and knockbacks.json towards 50% win rates')
+    parser.add_argument('-g', '--generations', type=int, default=10)
+    parser.add_argument('-p', '--population', type=int, default=8, help='candidates per generation, including the incumbent')
+    parser.add_argument('-m', '--matches', type=int, default=8, help='matches per candidate on the first rung')
+    parser.add_argument('-c', '--controller', choices=['random', 'scripted'], default='scripted')
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count(), help='worker processes')
+    parser.add_argument('--max-time', type=float, default=60, help='seconds of fight before a draw')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', type=str, default='./tuned', help='directory for the proposed json files and history')
+    parser.add_argument('--assets', type=str, default='./assets/')
+    args = parser.parse_args()
+
+    registry = get_registry(args.assets)
+    majors = list(registry.majors)
+    # tune per major values, starting from the current ones
+    damage = registry.damage.mean(axis=1)
+    knockback = registry.knockback.mean(axis=1)
+
+    pool = mp.Pool(args.workers, initializer=_init_worker, initargs=(args.assets,))
+    tuner = Tuner(pool, majors, args.controller, args.max_time, args.seed)
+    damage, knockback, history = tuner.run(damage, knockback, args.generations, args.population, args.matches)
+    pool.close()
+    pool.join()
+
+    os.makedirs(args.out, exist_ok=True)
+    with open(os.path.join(args.out, 'damages.json'), 'w') as f:
+        json.dump({major: round(float(value), 3) for major, value in zip(majors, damage)}, f, indent=4)
+    with open(os.path.join(args.out, 'knockbacks.json'), 'w') as f:
+        json.dump({major: round(float(value), 3) for major, value in zip(majors, knockback)}, f, indent=4)
+    with open(os.path.join(args.out, 'history.json'), 'w') as f:
+        json.dump(history, f, indent=4)
+    print(f'wrote {args.out}/damages.json, {args.out}/knockbacks.json and {args.out}/history.json')
+
+
+if __name__ == '__main__':
+    main()
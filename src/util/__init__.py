@@ -1,2 +1,7 @@
 from .asset_loader import *
-from .math_util import *
\ No newline at end of file
+from .math_util import *
+from .registry import *
+from .quality import *
+from .scheduler import *
+from .pipeline import *
+from .rasterizer import *
@@ -0,0 +1,69 @@
+from concurrent.futures import ThreadPoolExecutor, Future
+from collections import deque
+import time
+
+
+class _Settings:
+    # rolling window of frames the waits on the worker are measured over
+    WINDOW = 120
+
+
+class FramePipeline:
+    def __init__(self):
+        """
+        The `FramePipeline` runs the simulation and the cpu rasterization of the next frame on a worker thread while
+        the main thread uploads and presents the last one. pygame releases the GIL while it blits and fills, so on
+        more than one core the two overlap and frames take as long as the slower half rather than both. What is
+        presented was simulated from the input of the frame before, one frame of added latency. One frame is in
+        flight at a time, and everything it draws onto must be handed over whole when it is done, so the worker
+        never draws onto what the main thread is presenting
+        """
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='frame')
+        self.future : Future = None
+
+        # seconds the main thread waited on the worker, and the worker took, for each of the window of frames
+        self.waits = deque(maxlen=_Settings.WINDOW)
+        self.durations = deque(maxlen=_Settings.WINDOW)
+
+    @property
+    def busy(self) -> bool:
+        return self.future is not None
+
+    def submit(self, job, *args):
+        """
+        Start `job(*args)` on the worker thread, the frame before must have been taken with `result`
+        """
+        def timed():
+            start = time.perf_counter()
+            frame = job(*args)
+            self.durations.append(time.perf_counter() - start)
+            return frame
+
+        self.future = self.executor.submit(timed)
+
+    def result(self):
+        """
+        Wait for the frame in flight and return what its job returned, raising what it raised
+        """
+        start = time.perf_counter()
+        future, self.future = self.future, None
+        frame = future.result()
+        self.waits.append(time.perf_counter() - start)
+        return frame
+
+    @property
+    def wait(self) -> float:
+        """
+        The average seconds the main thread waited on the worker over the window, the part of the worker's time
+        which did not overlap
+        """
+        if not self.waits:
+            return 0
+        return sum(self.waits) / len(self.waits)
+
+    def close(self):
+        """
+        Wait for the frame in flight and stop the worker thread
+        """
+        self.executor.shutdown(wait=True)
+        self.future = None
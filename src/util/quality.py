@@ -0,0 +1,109 @@
+from collections import deque
+
+
+class _Settings:
+    # rolling window of frame times
+    WINDOW = 60
+    # step down when the window averages over budget, up when it leaves this much headroom
+    DOWNGRADE_LOAD = 1.15
+    UPGRADE_LOAD = 0.6
+    # frames to hold a level before stepping down or back up, stepping up waits longer
+    DOWNGRADE_HOLD = 60
+    UPGRADE_HOLD = 300
+
+    # from best to worst
+    QUALITY_LEVELS = (
+        dict(
+            name='high',
+            particle_caps=dict(boom=3, spark=5, bolt=1, dust=10),
+            blur_taps=20, blur_scale=1 / 2, glow=True,
+        ),
+        dict(
+            name='medium',
+            particle_caps=dict(boom=3, spark=3, bolt=1, dust=6),
+            blur_taps=10, blur_scale=1 / 2, glow=True,
+        ),
+        dict(
+            name='low',
+            particle_caps=dict(boom=1, spark=1, bolt=1, dust=2),
+            blur_taps=6, blur_scale=1 / 4, glow=True,
+        ),
+        dict(
+            name='minimal',
+            particle_caps=dict(boom=0, spark=0, bolt=0, dust=0),
+            blur_taps=0, blur_scale=1 / 4, glow=False,
+        ),
+    )
+
+
+class QualityGovernor:
+    def __init__(self, budget: float = 1 / 60, level: int = 0):
+        """
+        The `QualityGovernor` watches a rolling window of frame times against a budget and steps through
+        `QUALITY_LEVELS`, trading particles and glow for frame rate. A level is held for a while before it
+        changes again, and stepping back up needs far more headroom than stepping down, so levels don't flap.
+
+        The `QualityGovernor` takes as input:
+
+        * `budget`: the target frame time in seconds
+
+        * `level`: the starting level, 0 is the best
+        """
+        self.budget = budget
+        self.level = level
+        self.frame_times = deque(maxlen=_Settings.WINDOW)
+        self.total = 0
+        self.held = 0
+
+    @property
+    def settings(self) -> dict:
+        return _Settings.QUALITY_LEVELS[self.level]
+
+    @property
+    def levels(self) -> tuple[dict, ...]:
+        """
+        The settings of every level, from best to worst
+        """
+        return _Settings.QUALITY_LEVELS
+
+    @property
+    def name(self) -> str:
+        return self.settings['name']
+
+    @property
+    def load(self) -> float:
+        """
+        The average frame time over the window as a fraction of the budget
+        """
+        if not self.frame_times:
+            return 0
+        return self.total / len(self.frame_times) / self.budget
+
+    def _set_level(self, level: int):
+        self.level = level
+        self.frame_times.clear()
+        self.total = 0
+        self.held = 0
+
+    def update(self, frame_time: float) -> bool:
+        """
+        Record the time a frame took, returns whether the quality level changed
+        """
+        if len(self.frame_times) == self.frame_times.maxlen:
+            self.total -= self.frame_times[0]
+        self.frame_times.append(frame_time)
+        self.total += frame_time
+        self.held += 1
+
+        # only judge a level on a full window
+        if len(self.frame_times) < self.frame_times.maxlen:
+            return False
+        if self.load > _Settings.DOWNGRADE_LOAD and self.held >= _Settings.DOWNGRADE_HOLD:
+            if self.level < len(_Settings.QUALITY_LEVELS) - 1:
+                self._set_level(self.level + 1)
+                return True
+        elif self.load < _Settings.UPGRADE_LOAD and self.held >= _Settings.UPGRADE_HOLD:
+            if self.level > 0:
+                self._set_level(self.level - 1)
+                return True
+        return False
@@ -0,0 +1,81 @@
+from concurrent.futures import ThreadPoolExecutor
+
+
+class DrawList:
+    def __init__(self):
+        """
+        The `DrawList` records the draw calls of a layer, which a `LayerRasterizer` makes onto the layer later.
+        `fill`, `blit` and `blits` take the arguments of `pg.Surface`'s, so anything that renders onto a layer with
+        them can render onto a `DrawList` instead, anything else is recorded with `draw`. Arguments are kept as they
+        are, so they must not change until the calls are made
+        """
+        self.calls : list[tuple] = []
+
+    def fill(self, *args, **kwargs):
+        self.calls.append(('fill', args, kwargs))
+
+    def blit(self, *args, **kwargs):
+        self.calls.append(('blit', args, kwargs))
+
+    def blits(self, *args, **kwargs):
+        self.calls.append(('blits', args, kwargs))
+
+    def clear(self, color):
+        """
+        Record a fill with `color` ahead of every call recorded so far, e.g. once it is known the layer is used
+        """
+        self.calls.insert(0, ('fill', (color,), {}))
+
+    def draw(self, job, *args, **kwargs):
+        """
+        Record `job(layer, *args, **kwargs)`, e.g. `pg.draw.rect` or the `render` of a `Font`
+        """
+        self.calls.append((job, args, kwargs))
+
+    def run(self, layer):
+        """
+        Make the recorded calls onto `layer` in order, and forget them
+        """
+        calls, self.calls = self.calls, []
+        for job, args, kwargs in calls:
+            if isinstance(job, str):
+                getattr(layer, job)(*args, **kwargs)
+            else:
+                job(layer, *args, **kwargs)
+
+
+class LayerRasterizer:
+    def __init__(self, threads: int = 1):
+        """
+        The `LayerRasterizer` makes the recorded calls of the `DrawList`s of a frame's layers, which draw onto
+        surfaces of their own and do not depend on each other, on a pool of threads, the calls of each layer in order
+        on one thread. pygame releases the GIL while it fills and blits, so on more than one core layers are drawn at
+        the same time. With one thread the layers are drawn one after another on the calling thread
+
+        The `LayerRasterizer` takes as input:
+
+        * `threads`: how many layers are drawn at the same time
+        """
+        self.threads = threads
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='raster') if threads > 1 else None
+
+    def run(self, layers: dict[str, any], draw_lists: dict[str, DrawList]):
+        """
+        Make the calls of the draw list of each of `layers` onto it, a surface or anything with the methods recorded,
+        and wait for every layer to be drawn, raising what a call raised
+        """
+        jobs = [(draw_lists[name], layer) for name, layer in layers.items() if draw_lists[name].calls]
+        if self.executor is None:
+            for draw_list, layer in jobs:
+                draw_list.run(layer)
+            return
+        futures = [self.executor.submit(draw_list.run, layer) for draw_list, layer in jobs]
+        for future in futures:
+            future.result()
+
+    def close(self):
+        """
+        Stop the pool of threads
+        """
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
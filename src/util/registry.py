@@ -0,0 +1,125 @@
+import numpy as np
+import json
+import os
+
+
+DEFAULT_ASSETS_PATH = os.path.normpath(os.path.join(os.path.dirname(__file__), '..', '..', 'assets'))
+
+# attack directions and kinds, in the order used by `ConfigRegistry.attack_table`
+ATTACK_DIRECTIONS = ('n', 's', 'd')
+ATTACK_KINDS = ('light', 'air')
+
+# where an attack sprite is placed relative to its goose
+ANCHOR_TOP = 0
+ANCHOR_SIDE = 1
+ANCHOR_CENTER = 2
+ANCHOR_BOTTOM = 3
+
+
+def _load_json(path: str):
+    with open(path) as f:
+        return json.load(f)
+
+
+def _attack_anchor(attack_type: str) -> int:
+    if attack_type[0] == 'n':
+        return ANCHOR_TOP
+    if attack_type[0] == 's':
+        return ANCHOR_SIDE
+    if 'light' in attack_type:
+        return ANCHOR_CENTER
+    return ANCHOR_BOTTOM
+
+
+class ConfigRegistry:
+    def __init__(self, path: str):
+        """
+        The `ConfigRegistry` loads the fighter and attack meta data once, assigns integer ids to
+        majors, animations and attack types, and compiles the meta data into lookup tables indexed
+        by those ids. Use `get_registry` to share a registry instead of creating one.
+
+        * `path`: the assets directory
+        """
+        self.path = path
+
+        # meta data, as loaded
+        self.geese_meta_data = _load_json(f'{path}/geese/geese.json')
+        self.accessory_meta_data = _load_json(f'{path}/accessories/accessories.json')
+        self.attack_meta_data = _load_json(f'{path}/attacks/attacks.json')
+        self.damage_meta_data = _load_json(f'{path}/attacks/damages.json')
+        self.knockback_meta_data = _load_json(f'{path}/attacks/knockbacks.json')
+
+        self._assign_ids()
+        self._compile_tables()
+
+    def _assign_ids(self):
+        """
+        Helper function to assign integer ids to majors, animations and attack types
+        """
+        self.majors : tuple[str] = tuple(self.geese_meta_data['geese'])
+        self.major_ids = {major: i for i, major in enumerate(self.majors)}
+
+        self.attack_types : tuple[str] = tuple(self.attack_meta_data['animations'])
+        self.attack_ids = {attack_type: i for i, attack_type in enumerate(self.attack_types)}
+
+        self.animations : tuple[str] = tuple(
+            [animation for animation, _ in self.geese_meta_data['base']] + self.geese_meta_data['light_attacks']
+        )
+        self.animation_ids = {animation: i for i, animation in enumerate(self.animations)}
+
+    def _compile_tables(self):
+        """
+        Helper function to compile the meta data into numpy lookup tables
+        """
+        num_majors = len(self.majors)
+        num_attacks = len(self.attack_types)
+
+        # attack id from [direction, kind]
+        self.attack_table = np.array([
+            [self.attack_ids[f'{direction}_{kind}'] for kind in ATTACK_KINDS]
+            for direction in ATTACK_DIRECTIONS
+        ], dtype=np.int32)
+        # per attack rules
+        self.attack_anchor = np.array([_attack_anchor(attack_type) for attack_type in self.attack_types], dtype=np.int32)
+        self.attack_is_air = np.array(['air' in attack_type for attack_type in self.attack_types])
+        self.attack_animation = np.array([self.animation_ids[attack_type] for attack_type in self.attack_types], dtype=np.int32)
+
+        # frame counts, [major, animation] and [major, attack]
+        base_frames = [num_frames for _, num_frames in self.geese_meta_data['base']]
+        self.animation_frames = np.array([
+            base_frames + self.geese_meta_data[major]['light']
+            for major in self.majors
+        ], dtype=np.int32)
+        self.attack_frames = np.array([
+            self.attack_meta_data[major] for major in self.majors
+        ], dtype=np.int32)
+
+        # damage and knockback, [major, attack]
+        self.damage = np.zeros((num_majors, num_attacks))
+        self.knockback = np.zeros((num_majors, num_attacks))
+        for table, meta_data in [(self.damage, self.damage_meta_data), (self.knockback, self.knockback_meta_data)]:
+            for major, value in meta_data.items():
+                if isinstance(value, dict): # per attack values
+                    for attack_type, attack_value in value.items():
+                        table[self.major_ids[major], self.attack_ids[attack_type]] = attack_value
+                else:
+                    table[self.major_ids[major]] = value
+
+    def get_attack(self, direction: int, air: bool) -> int:
+        """
+        Get the attack id from an index into `ATTACK_DIRECTIONS` and whether the goose is in the air
+        """
+        return self.attack_table[direction, int(air)]
+
+
+_registries : dict[str, ConfigRegistry] = {}
+
+
+def get_registry(path: str = DEFAULT_ASSETS_PATH) -> ConfigRegistry:
+    """
+    Get the `ConfigRegistry` for the assets at `path`, loading it on first use
+    """
+    path = os.path.normpath(os.path.abspath(path))
+    if path not in _registries:
+        _registries[path] = ConfigRegistry(path)
+    return _registries[path]
@@ -0,0 +1,209 @@
+from collections import deque
+import pygame as pg
+import numpy as np
+import time
+
+
+class _Settings:
+    # rolling window of frames the jitter and cpu use are measured over
+    WINDOW = 120
+    # updates run at most this many times per frame to catch up, the rest of the time behind is dropped
+    MAX_UPDATES = 5
+    # how quickly the estimates of oversleeping and of the time a frame takes follow new samples
+    SMOOTHING = 0.1
+    # deviations of the estimates added to them, so a late wake up or a slow frame rarely misses its deadline
+    MARGIN_DEVIATIONS = 3
+    # seconds before a deadline to stop sleeping and spin when nothing has been measured yet
+    SPIN = 0.002
+    # seconds between looks at the event queue when idle
+    IDLE_POLL = 0.005
+
+
+class _Estimate:
+    def __init__(self, value: float):
+        # a moving average and mean absolute deviation of samples
+        self.mean = value
+        self.deviation = 0
+
+    def add(self, sample: float):
+        self.deviation += _Settings.SMOOTHING * (abs(sample - self.mean) - self.deviation)
+        self.mean += _Settings.SMOOTHING * (sample - self.mean)
+
+    @property
+    def upper(self) -> float:
+        return self.mean + _Settings.MARGIN_DEVIATIONS * self.deviation
+
+
+class FrameScheduler:
+    def __init__(
+        self,
+        render_rate: float | None = 60,
+        update_rate: float | None = None,
+        idle_rate: float = 10,
+        vsync: bool = False,
+        refresh_rate: float = 60
+    ):
+        """
+        The `FrameScheduler` paces the main loop. Frames are rendered at most `render_rate` times per second and
+        the time between them is slept rather than spun: the OS is asked to wake up a learned margin before the
+        deadline and the rest is spun, so frames start on time without burning a core. Updates either run once per
+        frame with the time since the last one, or at their own fixed rate. When nothing animates, the loop drops
+        to `idle_rate` and wakes up as soon as there is input.
+
+        With vsync the buffer swap already waits for the display's refresh, so instead the next frame starts just
+        late enough to finish right before the refresh after the last one, by how long frames have been taking.
+        The swap then barely waits, and what is drawn is fresher.
+
+        The `FrameScheduler` takes as input:
+
+        * `render_rate`: the most frames rendered per second, `None` does not cap them
+
+        * `update_rate`: updates per second with a fixed time step, `None` updates once per frame
+
+        * `idle_rate`: frames per second when idle
+
+        * `vsync`: whether the buffer swap waits for the display's refresh
+
+        * `refresh_rate`: the display's refresh rate, refined by the measured time between swaps with vsync
+        """
+        self.render_rate = render_rate
+        self.update_rate = update_rate
+        self.idle_rate = idle_rate
+        self.vsync = vsync
+
+        # when the next frame and update are due
+        now = time.perf_counter()
+        self.next_frame = now
+        self.last_update = now
+        self.update_time = 0
+
+        # how late sleeps wake up, how long a frame takes, and the time between refreshes with vsync
+        self.oversleep = _Estimate(_Settings.SPIN)
+        self.frame_cost = _Estimate(0)
+        self.refresh = _Estimate(1 / refresh_rate)
+        self.last_swap = None
+        self.frame_start = now
+
+        # time between frames which were not idle, and the wall and cpu time of the window of frames
+        self.intervals = deque(maxlen=_Settings.WINDOW)
+        self.times = deque(maxlen=_Settings.WINDOW)
+        # time from reading the input a frame was updated with to swapping it onto the display
+        self.latencies = deque(maxlen=_Settings.WINDOW)
+        self.idle = False
+
+    def _sleep_until(self, deadline: float):
+        """
+        Helper function to sleep until `deadline`, waking up early by how late sleeps have been waking up and
+        spinning the rest
+        """
+        remaining = deadline - time.perf_counter()
+        if remaining > self.oversleep.upper:
+            asked = remaining - self.oversleep.upper
+            start = time.perf_counter()
+            time.sleep(asked)
+            self.oversleep.add(time.perf_counter() - start - asked)
+        while time.perf_counter() < deadline:
+            pass
+
+    def _get_deadline(self) -> float:
+        """
+        Helper function to get when the next frame should start
+        """
+        if self.vsync and self.last_swap is not None:
+            # the refresh after the last swap, or the one closest to the capped rate, less the time to draw the frame
+            refreshes = 1 if not self.render_rate else max(1, round(1 / (self.render_rate * self.refresh.mean)))
+            return self.last_swap + refreshes * self.refresh.mean - self.frame_cost.upper
+        return self.next_frame
+
+    def wait(self, idle: bool = False):
+        """
+        Wait until the next frame is due. When `idle`, e.g. a menu with nothing animating, that is `1 / idle_rate`
+        after the last frame or as soon as there is input, which is left on the event queue in order
+        """
+        if idle:
+            deadline = self.frame_start + 1 / self.idle_rate
+            while not pg.event.peek() and time.perf_counter() < deadline:
+                time.sleep(min(_Settings.IDLE_POLL, max(deadline - time.perf_counter(), 0)))
+            # the first update after idling steps by at most a frame rather than by the time spent idle
+            interval = 1 / self.render_rate if self.render_rate else self.refresh.mean
+            self.last_update = max(self.last_update, time.perf_counter() - interval)
+        else:
+            self._sleep_until(self._get_deadline())
+
+        now = time.perf_counter()
+        # frames paced by input are left out of the jitter
+        if not idle and not self.idle:
+            self.intervals.append(now - self.frame_start)
+        self.idle = idle
+        self.frame_start = now
+        if self.render_rate:
+            # deadlines keep their cadence unless the frame is late by a whole frame
+            self.next_frame = max(self.next_frame + 1 / self.render_rate, now)
+
+    def get_updates(self) -> list[float]:
+        """
+        The time step of each update to run this frame, one with the time since the last update without a fixed
+        update rate. When idle, one step as nothing animates
+        """
+        now = time.perf_counter()
+        if not self.update_rate:
+            dt = now - self.last_update
+            self.last_update = now
+            return [dt]
+
+        step = 1 / self.update_rate
+        if self.idle:
+            self.last_update = now
+            self.update_time = 0
+            return [step]
+        self.update_time += now - self.last_update
+        self.last_update = now
+        updates = min(int(self.update_time / step), _Settings.MAX_UPDATES)
+        self.update_time = 0 if updates == _Settings.MAX_UPDATES else self.update_time - updates * step
+        return [step] * updates
+
+    def swap(self, polled: float | None = None):
+        """
+        Swap the frame drawn since `wait` onto the display with `pg.display.flip`, and record how long it took and,
+        given the `time.perf_counter()` at which the input it was updated with was read as `polled`, its latency
+        """
+        drawn = time.perf_counter()
+        pg.display.flip()
+        now = time.perf_counter()
+        # time between swaps which waited for one refresh, a missed refresh is not the refresh rate
+        if self.vsync and self.last_swap is not None and round((now - self.last_swap) / self.refresh.mean) == 1:
+            self.refresh.add(now - self.last_swap)
+        # the swap waits for the refresh with vsync, which is not part of drawing the frame
+        self.frame_cost.add((drawn if self.vsync else now) - self.frame_start)
+        self.last_swap = now
+        self.times.append((now, time.process_time()))
+        if polled is not None:
+            self.latencies.append(now - polled)
+
+    @property
+    def jitter(self) -> float:
+        """
+        The standard deviation in seconds of the time between frames over the window, leaving out idle frames
+        """
+        if len(self.intervals) < 2:
+            return 0
+        return float(np.std(self.intervals))
+
+    @property
+    def latency(self) -> float:
+        """
+        The average seconds from reading input to swapping the frame updated with it onto the display over the window
+        """
+        if not self.latencies:
+            return 0
+        return float(np.mean(self.latencies))
+
+    @property
+    def cpu(self) -> float:
+        """
+        The cpu time of the process over the window as a fraction of the wall time, above 1 with busy threads
+        """
+        if len(self.times) < 2:
+            return 0
+        (start, start_cpu), (end, end_cpu) = self.times[0], self.times[-1]
+        return (end_cpu - start_cpu) / max(end - start, 1e-9)